@@ -27,17 +27,110 @@ class Settings:
     queue_max_retries: int
     queue_retry_delay: int
     queue_rate_limit_per_user: int
+    queue_autoscale_enabled: bool
+    queue_min_workers: int
+    queue_autoscale_ceiling: int
+    queue_autoscale_interval: float
+    autoscale_max_load_per_cpu: float
+    autoscale_min_free_memory_percent: int
+    autoscale_min_free_disk_mb: int
+    admin_user_ids: frozenset[int]
+    admission_enabled: bool
+    admission_defer_after_seconds: int
+    admission_reject_after_seconds: int
+    admission_max_deferred: int
+    storage_budget_gb: float
+    storage_min_free_gb: float
+    storage_stale_hours: float
+    storage_janitor_interval: int
+    storage_wait_timeout: int
+    metrics_enabled: bool
+    metrics_host: str
+    metrics_port: int
+    metrics_path: str
+    tracing_enabled: bool
+    trace_capacity: int
+    trace_export_path: Optional[str]
+    trace_otlp_endpoint: Optional[str]
+    trace_slow_report_interval: int
+    trace_slow_report_count: int
+    memory_profiling_enabled: bool
+    memory_tracemalloc_frames: int
+    memory_stage_snapshots: bool
+    memory_sample_interval: float
+    memory_top_n: int
+    telegram_global_rate_per_second: float
+    telegram_chat_rate_per_second: float
+    telegram_group_rate_per_minute: float
+    telegram_flood_max_retries: int
+    delivery_mode: str
+    delivery_max_text_messages: int
+    delivery_archive_threshold_kb: int
+    progress_update_interval: float
+
+    executor_cpu_workers: int
+    executor_disk_workers: int
+    executor_network_workers: int
 
     audio_use_streaming: bool
     audio_target_bitrate: str
     audio_target_sample_rate: int
     audio_target_channels: int
     audio_compression_threshold_mb: int
+    audio_parallel_transcode: bool
+    audio_parallel_max_processes: int
+    audio_parallel_min_duration: int
+    audio_vad_enabled: bool
+    audio_vad_min_duration: int
+    audio_vad_min_savings_percent: int
+
+    voice_batch_enabled: bool
+    voice_batch_window_seconds: float
+    voice_batch_max_clip_seconds: int
+    voice_batch_max_clips: int
+
+    hedging_enabled: bool
+    hedging_max_duration: int
+    hedging_percentile: int
+    hedging_default_delay: float
+
+    circuit_failure_rate_percent: int
+    circuit_consecutive_failures: int
+    circuit_open_seconds: int
+    groq_rate_limit_rpm: int
+    groq_rate_limit_audio_seconds_per_hour: int
+    deepgram_rate_limit_rpm: int
+    deepgram_rate_limit_audio_seconds_per_hour: int
+    rate_limit_max_retries: int
+    groq_base_url: str
+    deepgram_base_url: str
+    deepgram_callback_url: Optional[str]
+    deepgram_callback_path: str
+    deepgram_callback_host: str
+    deepgram_callback_port: int
+    deepgram_callback_secret: Optional[str]
+    deepgram_callback_min_duration: int
+    deepgram_callback_timeout: int
+    local_whisper_enabled: bool
+    local_whisper_model: str
+    local_whisper_processes: int
+    local_whisper_compute_type: str
+    local_whisper_language: Optional[str]
+    local_whisper_max_duration: int
 
     webhook_url: Optional[str]
     webhook_path: str
     webhook_port: int
     webhook_secret: Optional[str]
+    webhook_host: str
+    webhook_delete_on_shutdown: bool
+    app_mode: str
+    broker_url: str
+    broker_visibility_timeout: int
+    job_journal_enabled: bool
+    job_journal_path: str
+    job_journal_retention_days: int
+    shutdown_grace_seconds: int
 
 
 def load_settings() -> Settings:
@@ -61,9 +154,9 @@ def load_settings() -> Settings:
         raise RuntimeError("Missing TELEGRAM_API_ID in environment or .env file.")
     if not api_hash:
         raise RuntimeError("Missing TELEGRAM_API_HASH in environment or .env file.")
-    if provider not in {"groq", "deepgram"}:
+    if provider not in {"groq", "deepgram", "auto"}:
         raise RuntimeError(
-            "TRANSCRIPTION_PROVIDER must be either 'groq' or 'deepgram'."
+            "TRANSCRIPTION_PROVIDER must be 'groq', 'deepgram' or 'auto'."
         )
     if provider == "groq" and not groq_key:
         raise RuntimeError("Missing GROQ_API_KEY for Groq transcription provider.")
@@ -71,6 +164,10 @@ def load_settings() -> Settings:
         raise RuntimeError(
             "Missing DEEPGRAM_API_KEY for Deepgram transcription provider."
         )
+    if provider == "auto" and not (groq_key or deepgram_key):
+        raise RuntimeError(
+            "Auto provider routing needs GROQ_API_KEY and/or DEEPGRAM_API_KEY."
+        )
 
     try:
         api_id_int = int(api_id)
@@ -100,6 +197,79 @@ def load_settings() -> Settings:
     queue_max_retries = int(os.getenv("QUEUE_MAX_RETRIES", "2"))
     queue_retry_delay = int(os.getenv("QUEUE_RETRY_DELAY", "5"))
     queue_rate_limit = int(os.getenv("QUEUE_RATE_LIMIT_PER_USER", "3"))
+    queue_autoscale_enabled = os.getenv(
+        "QUEUE_AUTOSCALE_ENABLED", "false"
+    ).strip().lower() in {"1", "true", "yes", "on"}
+    queue_min_workers = int(os.getenv("QUEUE_MIN_WORKERS", "1"))
+    queue_autoscale_ceiling = int(os.getenv("QUEUE_AUTOSCALE_CEILING", "32"))
+    queue_autoscale_interval = float(os.getenv("QUEUE_AUTOSCALE_INTERVAL", "10"))
+    autoscale_max_load_per_cpu = float(os.getenv("AUTOSCALE_MAX_LOAD_PER_CPU", "1.5"))
+    autoscale_min_free_memory_percent = int(
+        os.getenv("AUTOSCALE_MIN_FREE_MEMORY_PERCENT", "15")
+    )
+    autoscale_min_free_disk_mb = int(os.getenv("AUTOSCALE_MIN_FREE_DISK_MB", "2048"))
+    admission_enabled = os.getenv("ADMISSION_ENABLED", "true").strip().lower() in {
+        "1",
+        "true",
+        "yes",
+        "on",
+    }
+    admission_defer_after = int(os.getenv("ADMISSION_DEFER_AFTER_SECONDS", "1800"))
+    admission_reject_after = int(os.getenv("ADMISSION_REJECT_AFTER_SECONDS", "7200"))
+    admission_max_deferred = int(os.getenv("ADMISSION_MAX_DEFERRED", "20"))
+    storage_budget_gb = float(os.getenv("STORAGE_BUDGET_GB", "20"))
+    storage_min_free_gb = float(os.getenv("STORAGE_MIN_FREE_GB", "2"))
+    storage_stale_hours = float(os.getenv("STORAGE_STALE_HOURS", "6"))
+    storage_janitor_interval = int(os.getenv("STORAGE_JANITOR_INTERVAL", "1800"))
+    storage_wait_timeout = int(os.getenv("STORAGE_WAIT_TIMEOUT", "1800"))
+    metrics_enabled = os.getenv("METRICS_ENABLED", "true").strip().lower() in {
+        "1",
+        "true",
+        "yes",
+        "on",
+    }
+    metrics_host = os.getenv("METRICS_HOST", "127.0.0.1")
+    metrics_port = int(os.getenv("METRICS_PORT", "9108"))
+    metrics_path = os.getenv("METRICS_PATH", "/metrics")
+    tracing_enabled = os.getenv("TRACING_ENABLED", "true").strip().lower() in {
+        "1",
+        "true",
+        "yes",
+        "on",
+    }
+    trace_capacity = int(os.getenv("TRACE_CAPACITY", "500"))
+    trace_export_path = os.getenv("TRACE_EXPORT_PATH") or None
+    trace_otlp_endpoint = os.getenv("TRACE_OTLP_ENDPOINT") or None
+    trace_slow_report_interval = int(os.getenv("TRACE_SLOW_REPORT_INTERVAL", "300"))
+    trace_slow_report_count = int(os.getenv("TRACE_SLOW_REPORT_COUNT", "5"))
+    memory_profiling_enabled = os.getenv(
+        "MEMORY_PROFILING_ENABLED", "false"
+    ).strip().lower() in {"1", "true", "yes", "on"}
+    memory_tracemalloc_frames = int(os.getenv("MEMORY_TRACEMALLOC_FRAMES", "0"))
+    memory_stage_snapshots = os.getenv(
+        "MEMORY_STAGE_SNAPSHOTS", "false"
+    ).strip().lower() in {"1", "true", "yes", "on"}
+    memory_sample_interval = float(os.getenv("MEMORY_SAMPLE_INTERVAL", "1"))
+    memory_top_n = int(os.getenv("MEMORY_TOP_N", "10"))
+    telegram_global_rate = float(os.getenv("TELEGRAM_GLOBAL_RATE_PER_SECOND", "30"))
+    telegram_chat_rate = float(os.getenv("TELEGRAM_CHAT_RATE_PER_SECOND", "1"))
+    telegram_group_rate = float(os.getenv("TELEGRAM_GROUP_RATE_PER_MINUTE", "20"))
+    telegram_flood_max_retries = int(os.getenv("TELEGRAM_FLOOD_MAX_RETRIES", "5"))
+    delivery_mode = os.getenv("DELIVERY_MODE", "group").strip().lower()
+    delivery_max_text_messages = int(os.getenv("DELIVERY_MAX_TEXT_MESSAGES", "2"))
+    delivery_archive_threshold_kb = int(
+        os.getenv("DELIVERY_ARCHIVE_THRESHOLD_KB", "1024")
+    )
+    progress_update_interval = float(os.getenv("PROGRESS_UPDATE_INTERVAL", "5"))
+    admin_user_ids = frozenset(
+        int(value)
+        for value in (os.getenv("ADMIN_USER_IDS") or "").split(",")
+        if value.strip()
+    )
+
+    executor_cpu_workers = int(os.getenv("EXECUTOR_CPU_WORKERS") or os.cpu_count() or 1)
+    executor_disk_workers = int(os.getenv("EXECUTOR_DISK_WORKERS", "4"))
+    executor_network_workers = int(os.getenv("EXECUTOR_NETWORK_WORKERS", "10"))
 
     audio_streaming = os.getenv("AUDIO_USE_STREAMING", "true").strip().lower() in {
         "1",
@@ -111,11 +281,124 @@ def load_settings() -> Settings:
     audio_sample_rate = int(os.getenv("AUDIO_TARGET_SAMPLE_RATE", "16000"))
     audio_channels = int(os.getenv("AUDIO_TARGET_CHANNELS", "1"))
     audio_threshold = int(os.getenv("AUDIO_COMPRESSION_THRESHOLD_MB", "30"))
+    audio_parallel = os.getenv("AUDIO_PARALLEL_TRANSCODE", "true").strip().lower() in {
+        "1",
+        "true",
+        "yes",
+        "on",
+    }
+    audio_parallel_processes = int(
+        os.getenv("AUDIO_PARALLEL_MAX_PROCESSES") or os.cpu_count() or 1
+    )
+    audio_parallel_min_duration = int(os.getenv("AUDIO_PARALLEL_MIN_DURATION", "1200"))
+    audio_vad_enabled = os.getenv("AUDIO_VAD_ENABLED", "false").strip().lower() in {
+        "1",
+        "true",
+        "yes",
+        "on",
+    }
+    audio_vad_min_duration = int(os.getenv("AUDIO_VAD_MIN_DURATION", "60"))
+    audio_vad_min_savings = int(os.getenv("AUDIO_VAD_MIN_SAVINGS_PERCENT", "10"))
+
+    voice_batch_enabled = os.getenv("VOICE_BATCH_ENABLED", "false").strip().lower() in {
+        "1",
+        "true",
+        "yes",
+        "on",
+    }
+    voice_batch_window = float(os.getenv("VOICE_BATCH_WINDOW_SECONDS", "2"))
+    voice_batch_max_clip = int(os.getenv("VOICE_BATCH_MAX_CLIP_SECONDS", "15"))
+    voice_batch_max_clips = int(os.getenv("VOICE_BATCH_MAX_CLIPS", "10"))
+
+    hedging_enabled = os.getenv("HEDGING_ENABLED", "false").strip().lower() in {
+        "1",
+        "true",
+        "yes",
+        "on",
+    }
+    hedging_max_duration = int(os.getenv("HEDGING_MAX_DURATION", "120"))
+    hedging_percentile = int(os.getenv("HEDGING_PERCENTILE", "95"))
+    hedging_default_delay = float(os.getenv("HEDGING_DEFAULT_DELAY", "15"))
+
+    circuit_failure_rate = int(os.getenv("CIRCUIT_FAILURE_RATE_PERCENT", "50"))
+    circuit_consecutive = int(os.getenv("CIRCUIT_CONSECUTIVE_FAILURES", "3"))
+    circuit_open_seconds = int(os.getenv("CIRCUIT_OPEN_SECONDS", "60"))
+
+    groq_rate_limit_rpm = int(os.getenv("GROQ_RATE_LIMIT_RPM", "20"))
+    groq_rate_limit_audio = int(
+        os.getenv("GROQ_RATE_LIMIT_AUDIO_SECONDS_PER_HOUR", "7200")
+    )
+    deepgram_rate_limit_rpm = int(os.getenv("DEEPGRAM_RATE_LIMIT_RPM", "0"))
+    deepgram_rate_limit_audio = int(
+        os.getenv("DEEPGRAM_RATE_LIMIT_AUDIO_SECONDS_PER_HOUR", "0")
+    )
+    rate_limit_max_retries = int(os.getenv("RATE_LIMIT_MAX_RETRIES", "3"))
+
+    groq_base_url = (
+        os.getenv("GROQ_BASE_URL")
+        or "https://api.groq.com/openai/v1/audio/transcriptions"
+    ).strip()
+    deepgram_base_url = (
+        os.getenv("DEEPGRAM_BASE_URL") or "https://api.deepgram.com/v1/listen"
+    ).strip()
+    deepgram_callback_url = os.getenv("DEEPGRAM_CALLBACK_URL")
+    deepgram_callback_path = os.getenv(
+        "DEEPGRAM_CALLBACK_PATH", "/deepgram/callback"
+    ).strip()
+    deepgram_callback_host = os.getenv("DEEPGRAM_CALLBACK_HOST", "0.0.0.0").strip()
+    deepgram_callback_port = int(os.getenv("DEEPGRAM_CALLBACK_PORT", "8081"))
+    deepgram_callback_secret = os.getenv("DEEPGRAM_CALLBACK_SECRET")
+    deepgram_callback_min_duration = int(
+        os.getenv("DEEPGRAM_CALLBACK_MIN_DURATION", "600")
+    )
+    deepgram_callback_timeout = int(os.getenv("DEEPGRAM_CALLBACK_TIMEOUT", "1800"))
+
+    local_whisper_enabled = os.getenv(
+        "LOCAL_WHISPER_ENABLED", "false"
+    ).strip().lower() in {
+        "1",
+        "true",
+        "yes",
+        "on",
+    }
+    local_whisper_model = (os.getenv("LOCAL_WHISPER_MODEL") or "tiny").strip()
+    local_whisper_processes = int(os.getenv("LOCAL_WHISPER_PROCESSES", "1"))
+    local_whisper_compute_type = (
+        (os.getenv("LOCAL_WHISPER_COMPUTE_TYPE") or "int8").strip().lower()
+    )
+    local_whisper_language = (os.getenv("LOCAL_WHISPER_LANGUAGE") or "").strip() or None
+    local_whisper_max_duration = int(os.getenv("LOCAL_WHISPER_MAX_DURATION", "30"))
 
     webhook_url = os.getenv("WEBHOOK_URL")
     webhook_path = os.getenv("WEBHOOK_PATH", "/webhook").strip()
     webhook_port = int(os.getenv("WEBHOOK_PORT", "8080"))
     webhook_secret = os.getenv("WEBHOOK_SECRET")
+    webhook_host = os.getenv("WEBHOOK_HOST", "0.0.0.0").strip()
+
+    app_mode = (os.getenv("APP_MODE") or "all").strip().lower()
+    if app_mode not in {"all", "frontend", "worker"}:
+        raise RuntimeError("APP_MODE must be 'all', 'frontend' or 'worker'.")
+    broker_url = (os.getenv("BROKER_URL") or "sqlite:///~/.transhades/jobs.db").strip()
+    broker_visibility_timeout = int(os.getenv("BROKER_VISIBILITY_TIMEOUT", "3600"))
+    job_journal_enabled = os.getenv("JOB_JOURNAL_ENABLED", "true").strip().lower() in {
+        "1",
+        "true",
+        "yes",
+        "on",
+    }
+    job_journal_path = (
+        os.getenv("JOB_JOURNAL_PATH") or "~/.transhades/journal.db"
+    ).strip()
+    job_journal_retention_days = int(os.getenv("JOB_JOURNAL_RETENTION_DAYS", "7"))
+    shutdown_grace_seconds = int(os.getenv("SHUTDOWN_GRACE_SECONDS", "60"))
+    webhook_delete_on_shutdown = os.getenv(
+        "WEBHOOK_DELETE_ON_SHUTDOWN", "true"
+    ).strip().lower() in {
+        "1",
+        "true",
+        "yes",
+        "on",
+    }
 
     return Settings(
         telegram_bot_token=telegram_token,
@@ -135,13 +418,102 @@ def load_settings() -> Settings:
         queue_max_retries=queue_max_retries,
         queue_retry_delay=queue_retry_delay,
         queue_rate_limit_per_user=queue_rate_limit,
+        queue_autoscale_enabled=queue_autoscale_enabled,
+        queue_min_workers=queue_min_workers,
+        queue_autoscale_ceiling=queue_autoscale_ceiling,
+        queue_autoscale_interval=queue_autoscale_interval,
+        autoscale_max_load_per_cpu=autoscale_max_load_per_cpu,
+        autoscale_min_free_memory_percent=autoscale_min_free_memory_percent,
+        autoscale_min_free_disk_mb=autoscale_min_free_disk_mb,
+        admin_user_ids=admin_user_ids,
+        admission_enabled=admission_enabled,
+        admission_defer_after_seconds=admission_defer_after,
+        admission_reject_after_seconds=admission_reject_after,
+        admission_max_deferred=admission_max_deferred,
+        storage_budget_gb=storage_budget_gb,
+        storage_min_free_gb=storage_min_free_gb,
+        storage_stale_hours=storage_stale_hours,
+        storage_janitor_interval=storage_janitor_interval,
+        storage_wait_timeout=storage_wait_timeout,
+        metrics_enabled=metrics_enabled,
+        metrics_host=metrics_host,
+        metrics_port=metrics_port,
+        metrics_path=metrics_path,
+        tracing_enabled=tracing_enabled,
+        trace_capacity=trace_capacity,
+        trace_export_path=trace_export_path,
+        trace_otlp_endpoint=trace_otlp_endpoint,
+        trace_slow_report_interval=trace_slow_report_interval,
+        trace_slow_report_count=trace_slow_report_count,
+        memory_profiling_enabled=memory_profiling_enabled,
+        memory_tracemalloc_frames=memory_tracemalloc_frames,
+        memory_stage_snapshots=memory_stage_snapshots,
+        memory_sample_interval=memory_sample_interval,
+        memory_top_n=memory_top_n,
+        telegram_global_rate_per_second=telegram_global_rate,
+        telegram_chat_rate_per_second=telegram_chat_rate,
+        telegram_group_rate_per_minute=telegram_group_rate,
+        telegram_flood_max_retries=telegram_flood_max_retries,
+        delivery_mode=delivery_mode,
+        delivery_max_text_messages=delivery_max_text_messages,
+        delivery_archive_threshold_kb=delivery_archive_threshold_kb,
+        progress_update_interval=progress_update_interval,
+        executor_cpu_workers=executor_cpu_workers,
+        executor_disk_workers=executor_disk_workers,
+        executor_network_workers=executor_network_workers,
         audio_use_streaming=audio_streaming,
         audio_target_bitrate=audio_bitrate,
         audio_target_sample_rate=audio_sample_rate,
         audio_target_channels=audio_channels,
         audio_compression_threshold_mb=audio_threshold,
+        audio_parallel_transcode=audio_parallel,
+        audio_parallel_max_processes=audio_parallel_processes,
+        audio_parallel_min_duration=audio_parallel_min_duration,
+        audio_vad_enabled=audio_vad_enabled,
+        audio_vad_min_duration=audio_vad_min_duration,
+        audio_vad_min_savings_percent=audio_vad_min_savings,
+        voice_batch_enabled=voice_batch_enabled,
+        voice_batch_window_seconds=voice_batch_window,
+        voice_batch_max_clip_seconds=voice_batch_max_clip,
+        voice_batch_max_clips=voice_batch_max_clips,
+        hedging_enabled=hedging_enabled,
+        hedging_max_duration=hedging_max_duration,
+        hedging_percentile=hedging_percentile,
+        hedging_default_delay=hedging_default_delay,
+        circuit_failure_rate_percent=circuit_failure_rate,
+        circuit_consecutive_failures=circuit_consecutive,
+        circuit_open_seconds=circuit_open_seconds,
+        groq_rate_limit_rpm=groq_rate_limit_rpm,
+        groq_rate_limit_audio_seconds_per_hour=groq_rate_limit_audio,
+        deepgram_rate_limit_rpm=deepgram_rate_limit_rpm,
+        deepgram_rate_limit_audio_seconds_per_hour=deepgram_rate_limit_audio,
+        rate_limit_max_retries=rate_limit_max_retries,
+        groq_base_url=groq_base_url,
+        deepgram_base_url=deepgram_base_url,
+        deepgram_callback_url=deepgram_callback_url,
+        deepgram_callback_path=deepgram_callback_path,
+        deepgram_callback_host=deepgram_callback_host,
+        deepgram_callback_port=deepgram_callback_port,
+        deepgram_callback_secret=deepgram_callback_secret,
+        deepgram_callback_min_duration=deepgram_callback_min_duration,
+        deepgram_callback_timeout=deepgram_callback_timeout,
+        local_whisper_enabled=local_whisper_enabled,
+        local_whisper_model=local_whisper_model,
+        local_whisper_processes=local_whisper_processes,
+        local_whisper_compute_type=local_whisper_compute_type,
+        local_whisper_language=local_whisper_language,
+        local_whisper_max_duration=local_whisper_max_duration,
         webhook_url=webhook_url,
         webhook_path=webhook_path,
         webhook_port=webhook_port,
         webhook_secret=webhook_secret,
+        webhook_host=webhook_host,
+        webhook_delete_on_shutdown=webhook_delete_on_shutdown,
+        app_mode=app_mode,
+        broker_url=broker_url,
+        broker_visibility_timeout=broker_visibility_timeout,
+        job_journal_enabled=job_journal_enabled,
+        job_journal_path=job_journal_path,
+        job_journal_retention_days=job_journal_retention_days,
+        shutdown_grace_seconds=shutdown_grace_seconds,
     )
@@ -1,8 +1,26 @@
+from typing import Optional
+
 from aiogram import Router
-from aiogram.filters import Command
+from aiogram.filters import Command, CommandObject
 from aiogram.types import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup, Message
 
 from ..services import DeepgramModelPreferences, ProviderPreferences, TranscriberRegistry
+from ..services.admission import AdmissionController, format_eta
+from ..services.autoscaler import ResizableLimiter, WorkerAutoscaler
+from ..services.deepgram_callback import DeepgramCallbackServer
+from ..services.delivery import DELIVERY_MODES, DeliveryPreferences
+from ..services.executors import StageExecutors
+from ..services.memory_profiler import (
+    MEGABYTE,
+    MemoryProfiler,
+    read_available_memory,
+    read_peak_rss,
+    read_rss,
+)
+from ..services.routing import AUTO_PROVIDER
+from ..services.storage import StorageManager
+from ..services.tracing import TaskTracer
+from ..services.queue_service import TaskQueue
 
 router = Router()
 
@@ -22,8 +40,250 @@ async def help_command(message: Message) -> None:
         "Gunakan bot ini dengan mengirimkan atau mem-forward media audio/video. "
         "Bot akan mengonversi file besar ke mp3 bila diperlukan dan mengirimkan hasil "
         "transkrip sebagai teks, file .txt, dan .srt. "
-        "Gunakan /provider <groq|deepgram> untuk memilih penyedia transkripsi per chat."
+        "Gunakan /provider <groq|deepgram|auto> untuk memilih penyedia transkripsi per chat. "
+        "Mode auto memilih provider tercepat untuk setiap file. "
+        "Gunakan /delivery untuk memilih cara hasil dikirim (album, zip, atau terpisah)."
+    )
+
+
+@router.message(Command("stats"))
+async def stats_command(
+    message: Message,
+    task_queue: TaskQueue,
+    stage_executors: StageExecutors,
+    transcriber_registry: TranscriberRegistry,
+    deepgram_callbacks: Optional[DeepgramCallbackServer] = None,
+    worker_limiter: Optional[ResizableLimiter] = None,
+    admission_controller: Optional[AdmissionController] = None,
+    storage_manager: Optional[StorageManager] = None,
+) -> None:
+    queue_stats = await task_queue.get_stats()
+    lines = ["📊 Status pemrosesan", ""]
+    if worker_limiter:
+        active, max_workers = worker_limiter.active, worker_limiter.limit
+    else:
+        active, max_workers = queue_stats["active_workers"], task_queue.max_workers
+    lines.append(
+        f"Antrian: {queue_stats['queue_size']} | "
+        f"Worker aktif: {active}/{max_workers}"
+    )
+    for name, stats in stage_executors.stats().items():
+        lines.append(
+            f"{name}: {stats['active']}/{stats['max_workers']} aktif, "
+            f"{stats['queued']} menunggu, "
+            f"rata-rata tunggu {stats['avg_wait_seconds']:.1f}s"
+        )
+    for provider in transcriber_registry.providers():
+        health = transcriber_registry.health(provider)
+        if health:
+            lines.append(
+                f"{provider}: circuit {health.state}, "
+                f"error rate {health.error_rate * 100:.0f}%"
+            )
+    if admission_controller:
+        wait = admission_controller.wait_seconds(max_workers)
+        lines.append(
+            f"Estimasi tunggu: {format_eta(wait)} | "
+            f"ditunda: {admission_controller.deferred}, "
+            f"ditolak: {admission_controller.rejected}"
+        )
+    if storage_manager:
+        megabyte = 1024 * 1024
+        lines.append(
+            f"Disk: {storage_manager.reserved_bytes // megabyte}/"
+            f"{storage_manager.budget_bytes // megabyte} MB dipesan, "
+            f"{storage_manager.waiting} menunggu, "
+            f"janitor {storage_manager.swept_files} file"
+        )
+    if deepgram_callbacks:
+        lines.append(
+            f"Callback Deepgram: {deepgram_callbacks.pending} menunggu, "
+            f"{deepgram_callbacks.received} diterima"
+        )
+    await message.answer("\n".join(lines))
+
+
+@router.message(Command("workers"))
+async def workers_command(
+    message: Message,
+    command: CommandObject,
+    worker_limiter: ResizableLimiter,
+    task_queue: TaskQueue,
+    admin_user_ids: frozenset = frozenset(),
+    worker_autoscaler: Optional[WorkerAutoscaler] = None,
+) -> None:
+    if not message.from_user or message.from_user.id not in admin_user_ids:
+        await message.answer("Perintah ini hanya untuk admin (ADMIN_USER_IDS).")
+        return
+
+    args = (command.args or "").split()
+    if args:
+        try:
+            bounds = [int(value) for value in args]
+        except ValueError:
+            bounds = []
+        if len(bounds) not in (1, 2) or min(bounds) < 1:
+            await message.answer("Format: /workers <max> atau /workers <min> <max>")
+            return
+        min_workers, max_workers = (bounds[0], bounds[-1]) if len(bounds) == 2 else (1, bounds[0])
+        if worker_autoscaler:
+            worker_autoscaler.set_bounds(min_workers, max_workers)
+            # Pull the current size inside the new bounds right away.
+            worker_limiter.resize(
+                min(
+                    max(worker_limiter.limit, worker_autoscaler.min_workers),
+                    worker_autoscaler.max_workers,
+                )
+            )
+        else:
+            worker_limiter.resize(min(max_workers, task_queue.max_workers))
+
+    lines = ["👷 Worker", ""]
+    lines.append(
+        f"Aktif: {worker_limiter.active}/{worker_limiter.limit} | "
+        f"menunggu slot: {worker_limiter.waiting}"
     )
+    if worker_autoscaler:
+        lines.append(
+            f"Autoscaling: {worker_autoscaler.min_workers}-{worker_autoscaler.max_workers} "
+            f"(batas {worker_autoscaler.ceiling}), terakhir: {worker_autoscaler.last_reason}"
+        )
+        resources = worker_autoscaler.last_resources
+        if resources:
+            if resources.load_per_cpu is not None:
+                lines.append(f"Load/CPU: {resources.load_per_cpu:.2f}")
+            if resources.free_memory_ratio is not None:
+                lines.append(f"Memori bebas: {resources.free_memory_ratio:.0%}")
+            if resources.free_disk_bytes is not None:
+                lines.append(f"Disk bebas: {resources.free_disk_bytes // (1024 * 1024)}MB")
+    else:
+        lines.append(f"Autoscaling nonaktif (batas {task_queue.max_workers})")
+    await message.answer("\n".join(lines))
+
+
+@router.message(Command("trace"))
+async def trace_command(
+    message: Message,
+    command: CommandObject,
+    admin_user_ids: frozenset = frozenset(),
+    task_tracer: Optional[TaskTracer] = None,
+) -> None:
+    if not message.from_user or message.from_user.id not in admin_user_ids:
+        await message.answer("Perintah ini hanya untuk admin (ADMIN_USER_IDS).")
+        return
+    if not task_tracer:
+        await message.answer("Tracing nonaktif (TRACING_ENABLED=false).")
+        return
+
+    task_id = (command.args or "").strip()
+    if not task_id:
+        traces = task_tracer.recent()
+        if not traces:
+            await message.answer("Belum ada task yang dilacak di proses ini.")
+            return
+        lines = ["🔎 Task terakhir (/trace <task_id> untuk detail)", ""]
+        for trace in traces:
+            stage = trace.slowest()
+            state = "" if trace.finished else " (berjalan)"
+            slowest = f", terlama: {stage.name} {stage.duration:.1f}s" if stage else ""
+            lines.append(f"{trace.key[:8]} {trace.duration:.1f}s{state}{slowest}")
+        await message.answer("\n".join(lines))
+        return
+
+    trace = task_tracer.find(task_id)
+    if not trace:
+        await message.answer(f"Trace untuk task {task_id} tidak ditemukan.")
+        return
+    state = "selesai" if trace.finished else "berjalan"
+    if trace.root.error:
+        state = f"gagal ({trace.root.error})"
+    lines = [
+        f"🔎 Task {trace.key[:8]}: {trace.duration:.1f}s, {state}",
+        f"Trace ID: {trace.trace_id}",
+        "",
+    ]
+    lines.extend(trace.summary() or ["(belum ada stage)"])
+    await message.answer("\n".join(lines))
+
+
+@router.message(Command("memory"))
+async def memory_command(
+    message: Message,
+    command: CommandObject,
+    worker_limiter: ResizableLimiter,
+    admin_user_ids: frozenset = frozenset(),
+    memory_profiler: Optional[MemoryProfiler] = None,
+) -> None:
+    if not message.from_user or message.from_user.id not in admin_user_ids:
+        await message.answer("Perintah ini hanya untuk admin (ADMIN_USER_IDS).")
+        return
+    if not memory_profiler:
+        await message.answer("Profiling memori nonaktif (MEMORY_PROFILING_ENABLED=false).")
+        return
+
+    arg = (command.args or "").strip()
+    if arg == "top":
+        sites = memory_profiler.top_allocations()
+        if not sites:
+            await message.answer("tracemalloc nonaktif (MEMORY_TRACEMALLOC_FRAMES=0).")
+            return
+        await message.answer("\n".join(["🧠 Alokasi terbesar sejak start", "", *sites]))
+        return
+    if arg:
+        stage = memory_profiler.stages.get(arg)
+        if not stage:
+            await message.answer(f"Belum ada data untuk stage {arg}.")
+            return
+        lines = [
+            f"🧠 Stage {arg}: {stage.count}x",
+            f"RSS rata-rata {stage.mean_rss_delta / MEGABYTE:+.1f}MB, "
+            f"maks {stage.max_rss_delta / MEGABYTE:+.1f}MB",
+        ]
+        if stage.top_sites:
+            lines += ["", "Alokasi terbesar (snapshot stage):", *stage.top_sites]
+        await message.answer("\n".join(lines))
+        return
+
+    lines = ["🧠 Memori", ""]
+    rss = read_rss()
+    if rss is not None:
+        lines.append(f"RSS: {rss / MEGABYTE:.0f}MB (puncak {read_peak_rss() / MEGABYTE:.0f}MB)")
+    traced = memory_profiler.traced_memory()
+    if traced:
+        current, peak = traced
+        lines.append(f"Heap Python: {current / MEGABYTE:.0f}MB (puncak {peak / MEGABYTE:.0f}MB)")
+    cache_bytes = await memory_profiler.cache_bytes()
+    if cache_bytes is not None:
+        lines.append(f"Cache transkrip: ~{cache_bytes / MEGABYTE:.1f}MB")
+
+    if memory_profiler.stages:
+        lines += ["", "Per stage (pertumbuhan RSS rata-rata / maks):"]
+        for name, stage in sorted(
+            memory_profiler.stages.items(), key=lambda item: -item[1].max_rss_delta
+        ):
+            lines.append(
+                f"{name}: {stage.mean_rss_delta / MEGABYTE:+.1f}MB / "
+                f"{stage.max_rss_delta / MEGABYTE:+.1f}MB ({stage.count}x)"
+            )
+
+    percentiles = memory_profiler.growth_percentiles()
+    if percentiles:
+        lines += [
+            "",
+            f"Puncak per task ({len(memory_profiler.task_growth)} terakhir): "
+            f"p50 {percentiles['p50'] / MEGABYTE:.0f}MB, "
+            f"p95 {percentiles['p95'] / MEGABYTE:.0f}MB, "
+            f"maks {percentiles['max'] / MEGABYTE:.0f}MB",
+        ]
+        suggested = memory_profiler.suggest_workers()
+        available = read_available_memory()
+        if suggested and available:
+            lines.append(
+                f"Memori tersedia {available / MEGABYTE:.0f}MB → cukup untuk ~{suggested} "
+                f"task bersamaan (batas worker sekarang {worker_limiter.limit})"
+            )
+    lines += ["", "/memory top — alokasi terbesar, /memory <stage> — detail stage"]
+    await message.answer("\n".join(lines))
 
 
 def _build_provider_keyboard(
@@ -34,7 +294,10 @@ def _build_provider_keyboard(
 ) -> InlineKeyboardMarkup:
     current_provider = provider_preferences.get(chat_id)
     keyboard = []
-    for provider in transcriber_registry.providers():
+    providers = list(transcriber_registry.providers())
+    if len(providers) > 1:
+        providers.append(AUTO_PROVIDER)
+    for provider in providers:
         label = provider.title()
         if provider == current_provider:
             label = "✅ " + label
@@ -87,7 +350,10 @@ async def provider_callback(
         return
 
     provider = query.data.split(":", maxsplit=1)[1]
-    if provider not in transcriber_registry.providers():
+    available = set(transcriber_registry.providers())
+    if len(available) > 1:
+        available.add(AUTO_PROVIDER)
+    if provider not in available:
         await query.answer("Provider tidak tersedia.", show_alert=True)
         return
 
@@ -150,3 +416,61 @@ async def deepgram_model_callback(
         reply_markup=keyboard,
     )
     await query.answer("Model Deepgram diperbarui.")
+
+
+def _build_delivery_keyboard(current_mode: str) -> InlineKeyboardMarkup:
+    keyboard = []
+    for mode, caption in DELIVERY_MODES.items():
+        label = f"{mode}: {caption}"
+        if mode == current_mode:
+            label = "✅ " + label
+        keyboard.append([InlineKeyboardButton(text=label, callback_data=f"delivery:{mode}")])
+    return InlineKeyboardMarkup(inline_keyboard=keyboard)
+
+
+@router.message(Command("delivery"))
+async def delivery_command(
+    message: Message,
+    command: CommandObject,
+    delivery_preferences: DeliveryPreferences,
+) -> None:
+    mode = (command.args or "").strip().lower()
+    if mode:
+        if mode not in DELIVERY_MODES:
+            await message.answer(
+                f"Mode tidak dikenal. Pilihan: {', '.join(DELIVERY_MODES)}."
+            )
+            return
+        delivery_preferences.set(message.chat.id, mode)
+        await message.answer(f"Cara pengiriman hasil diubah ke {mode}.")
+        return
+
+    await message.answer(
+        "Pilih cara hasil transkrip dikirim ke chat ini:",
+        reply_markup=_build_delivery_keyboard(delivery_preferences.get(message.chat.id)),
+    )
+
+
+@router.callback_query(lambda c: c.data and c.data.startswith("delivery:"))
+async def delivery_callback(
+    query: CallbackQuery,
+    delivery_preferences: DeliveryPreferences,
+) -> None:
+    if not query.data:
+        return
+
+    mode = query.data.split(":", maxsplit=1)[1]
+    if mode not in DELIVERY_MODES:
+        await query.answer("Mode tidak didukung.", show_alert=True)
+        return
+
+    if mode == delivery_preferences.get(query.message.chat.id):
+        await query.answer("Mode sudah aktif.")
+        return
+
+    delivery_preferences.set(query.message.chat.id, mode)
+    await query.message.edit_text(
+        f"Cara pengiriman hasil diubah ke {mode}.",
+        reply_markup=_build_delivery_keyboard(mode),
+    )
+    await query.answer("Cara pengiriman diperbarui.")
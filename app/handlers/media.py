@@ -1,28 +1,21 @@
 from __future__ import annotations
 
 import asyncio
-import io
+import hashlib
 import logging
 import re
 import subprocess
+import time
+from contextlib import asynccontextmanager, nullcontext
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
-from aiogram import Router
-from aiogram.types import Message, BufferedInputFile
+from aiogram import Bot, Router
+from aiogram.types import Message, BufferedInputFile, InputMediaDocument
 from aiogram.utils.chat_action import ChatActionSender
 from requests import HTTPError
-from rich.progress import (
-    BarColumn,
-    DownloadColumn,
-    Progress,
-    SpinnerColumn,
-    TextColumn,
-    TimeElapsedColumn,
-    TransferSpeedColumn,
-)
 
 from ..services import (
     DeepgramModelPreferences,
@@ -32,7 +25,67 @@ from ..services import (
     TranscriptionResult,
 )
 from ..services.audio_optimizer import AudioOptimizer, TranscriptCache
-from ..services.queue_service import TaskQueue, TranscriptionTask
+from ..services.admission import (
+    DEFER,
+    DOWNLOAD,
+    PREPARE,
+    REJECT,
+    TRANSCRIBE,
+    AdmissionController,
+    format_eta,
+)
+from ..services.autoscaler import ResizableLimiter
+from ..services.broker import Job, JobBroker
+from ..services.queue_service import TaskQueue
+from ..services.deepgram_callback import DeepgramCallbackServer
+from ..services.delivery import (
+    ARCHIVE,
+    CAPTION_LIMIT,
+    SEPARATE,
+    DeliveryOptions,
+    DeliveryPreferences,
+    build_archive,
+    split_message,
+)
+from ..services.executors import StageExecutors
+from ..services.hedging import ProviderHedger
+from ..services.job_journal import (
+    DELIVERING,
+    DONE,
+    DOWNLOADING,
+    FAILED,
+    TRANSCODING,
+    TRANSCRIBING,
+    JobJournal,
+    JobRecorder,
+    JobState,
+)
+from ..services.metrics import PipelineMetrics
+from ..services.outbound import OutboundSender
+from ..services.progress import ProgressReporter
+from ..services.provider_gateway import ProviderGateway
+from ..services.reply_target import ReplyTarget
+from ..services.transcription import ProviderUnavailable, is_provider_failure
+from ..services.routing import AUTO_PROVIDER, ProviderRouter
+from ..services.segmented_transcode import SegmentedTranscoder
+from ..services.storage import (
+    DEFAULT_DOWNLOAD_DIR,
+    Reservation,
+    StorageFull,
+    StorageManager,
+)
+from ..services.tracing import TaskTracer, record_error, span, trace_task
+from ..services.transcode_planner import (
+    PASSTHROUGH,
+    REMUX,
+    TRANSCODE,
+    NoAudioTrack,
+    TranscodePlan,
+    plan_transcode,
+    probe_media,
+)
+from ..services.vad import TimelineMap, VoiceActivityDetector
+from ..services.voice_batcher import VoiceNoteBatcher
 
 logger = logging.getLogger(__name__)
 
@@ -40,7 +93,6 @@ router = Router()
 
 TELEGRAM_FILE_DOWNLOAD_LIMIT = 2 * 1024 * 1024 * 1024  # 2 GB via MTProto.
 TELEGRAM_MESSAGE_LIMIT = 4000
-PROGRESS_BAR_THRESHOLD = 50 * 1024 * 1024  # Show progress bar for downloads >= 50MB.
 DEFAULT_PAYLOAD_LIMIT = 25 * 1024 * 1024  # Fallback payload limit (~25MB).
 
 
@@ -49,6 +101,8 @@ class MediaMeta:
     display_name: str
     suffix: str
     file_size: Optional[int]
+    duration: Optional[int] = None
+    file_unique_id: Optional[str] = None
 
 
 @router.message()
@@ -61,14 +115,41 @@ async def handle_media(
     audio_optimizer: AudioOptimizer,
     transcript_cache: Optional[TranscriptCache],
     task_queue: TaskQueue,
+    stage_executors: StageExecutors,
+    provider_gateway: ProviderGateway,
     compression_threshold_mb: int = 30,
+    progress_interval: float = 5.0,
+    segmented_transcoder: Optional[SegmentedTranscoder] = None,
+    voice_activity_detector: Optional[VoiceActivityDetector] = None,
+    voice_batcher: Optional[VoiceNoteBatcher] = None,
+    provider_hedger: Optional[ProviderHedger] = None,
+    provider_router: Optional[ProviderRouter] = None,
+    deepgram_callbacks: Optional[DeepgramCallbackServer] = None,
+    job_broker: Optional[JobBroker] = None,
+    job_journal: Optional[JobJournal] = None,
+    worker_limiter: Optional[ResizableLimiter] = None,
+    admission_controller: Optional[AdmissionController] = None,
+    storage_manager: Optional[StorageManager] = None,
+    pipeline_metrics: Optional[PipelineMetrics] = None,
+    task_tracer: Optional[TaskTracer] = None,
+    outbound_sender: Optional[OutboundSender] = None,
+    delivery_preferences: Optional[DeliveryPreferences] = None,
 ) -> None:
     meta = _pick_media(message)
     if not meta:
         return
 
+    target = ReplyTarget.from_message(
+        message,
+        outbound_sender,
+        (
+            delivery_preferences.for_chat(message.chat.id)
+            if delivery_preferences
+            else None
+        ),
+    )
     if meta.file_size and meta.file_size > TELEGRAM_FILE_DOWNLOAD_LIMIT:
-        await message.answer(
+        await target.answer(
             "Ukuran file melebihi 2GB sehingga tidak bisa diunduh. "
             "Silakan kompres atau bagi menjadi beberapa bagian terlebih dahulu."
         )
@@ -79,7 +160,11 @@ async def handle_media(
     prepared_path: Path = download_path
 
     requested_provider = provider_preferences.get(message.chat.id)
-    transcriber = transcriber_registry.get(requested_provider)
+    if requested_provider == AUTO_PROVIDER and provider_router:
+        # The concrete provider is picked per task once the file is known.
+        transcriber = transcriber_registry.get(transcriber_registry.default_provider)
+    else:
+        transcriber = transcriber_registry.get(requested_provider)
     if not transcriber:
         fallback = transcriber_registry.default_provider
         transcriber = transcriber_registry.get(fallback)
@@ -87,48 +172,154 @@ async def handle_media(
         requested_provider = fallback
 
     if not transcriber:
-        await message.answer("Tidak ada provider transkripsi yang tersedia saat ini.")
+        await target.answer("Tidak ada provider transkripsi yang tersedia saat ini.")
         return
 
     provider_key = getattr(transcriber, "provider_name", requested_provider)
     provider_display = provider_key
+    requested_model: Optional[str] = None
 
     if provider_key == "deepgram":
         model = deepgram_model_preferences.get(message.chat.id)
+        if requested_provider != AUTO_PROVIDER:
+            requested_model = model
         if hasattr(transcriber, "with_model"):
             transcriber = transcriber.with_model(model)
         provider_display = f"deepgram ({model})"
 
     payload_limit = getattr(transcriber, "max_payload_bytes", DEFAULT_PAYLOAD_LIMIT)
 
+    job = Job(
+        chat_id=message.chat.id,
+        message_id=message.message_id,
+        provider=requested_provider,
+        model=requested_model,
+        file_unique_id=meta.file_unique_id,
+        display_name=meta.display_name,
+        suffix=meta.suffix,
+        file_size=meta.file_size,
+        duration=meta.duration,
+        source_name=target.source_name,
+        delivery=target.delivery.mode,
+    )
+
+    if job_broker is not None:
+        # Front-end mode: a worker process downloads and transcribes.
+        await job_broker.put(job)
+        await target.status(
+            f"🎵 Audio Anda dalam antrian pemrosesan!\n\n"
+            f"📋 Task ID: `{job.job_id[:8]}`\n"
+            f"⏳ Posisi antrian: {await job_broker.size()}\n\n"
+            f"Hasil akan dikirim otomatis saat selesai."
+        )
+        logger.info(
+            "Job %s enqueued to broker for chat %s", job.job_id[:8], message.chat.id
+        )
+        return
+
+    def current_workers() -> int:
+        return worker_limiter.limit if worker_limiter else task_queue.max_workers
+
+    admission = None
+    if admission_controller:
+        admission = admission_controller.assess(
+            meta.file_size, meta.duration, current_workers()
+        )
+        if admission.action == REJECT:
+            admission_controller.reject()
+            logger.warning(
+                "Task ditolak untuk chat %s: ETA %.0fs melebihi batas",
+                message.chat.id,
+                admission.eta_seconds,
+            )
+            await target.answer(
+                "🚦 Server sedang sangat sibuk. Perkiraan waktu tunggu "
+                f"{format_eta(admission.eta_seconds)} melebihi batas, sehingga "
+                "file ini tidak bisa diterima sekarang. Silakan kirim ulang nanti "
+                "atau kirim potongan yang lebih pendek."
+            )
+            return
+
+    if job_journal:
+        await job_journal.enqueue(job, download_path=str(download_path))
+
+    processor_kwargs = {
+        "telethon_downloader": telethon_downloader,
+        "transcriber_registry": transcriber_registry,
+        "provider_preferences": provider_preferences,
+        "deepgram_model_preferences": deepgram_model_preferences,
+        "audio_optimizer": audio_optimizer,
+        "transcript_cache": transcript_cache,
+        "stage_executors": stage_executors,
+        "provider_gateway": provider_gateway,
+        "compression_threshold_mb": compression_threshold_mb,
+        "progress_interval": progress_interval,
+        "segmented_transcoder": segmented_transcoder,
+        "voice_activity_detector": voice_activity_detector,
+        "voice_batcher": voice_batcher,
+        "provider_hedger": provider_hedger,
+        "provider_router": provider_router,
+        "deepgram_callbacks": deepgram_callbacks,
+        "job_journal": job_journal,
+        "admission_controller": admission_controller,
+        "storage_manager": storage_manager,
+        "pipeline_metrics": pipeline_metrics,
+        "task_tracer": task_tracer,
+    }
+
+    if admission and admission.action == DEFER:
+        await target.status(
+            "🚦 Antrian sedang panjang, file Anda ditunda dan akan diproses "
+            "otomatis begitu kapasitas tersedia.\n\n"
+            f"📋 Task ID: `{job.job_id[:8]}`\n"
+            f"⏱️ Perkiraan selesai: {format_eta(admission.eta_seconds)}"
+        )
+        logger.info(
+            "Job %s ditunda (ETA %.0fs) untuk chat %s",
+            job.job_id[:8],
+            admission.eta_seconds,
+            message.chat.id,
+        )
+        task = asyncio.ensure_future(
+            _submit_when_admitted(
+                admission_controller,
+                current_workers,
+                task_queue,
+                job,
+                target,
+                download_path,
+                processor_kwargs,
+                worker_limiter,
+            )
+        )
+        _admission_waiters.add(task)
+        task.add_done_callback(_admission_waiters.discard)
+        return
+
     # Submit to queue for async processing
     try:
-        task_id = await task_queue.submit(
-            chat_id=message.chat.id,
-            message_id=message.message_id,
-            file_path=download_path,
-            provider=requested_provider,
-            priority=0,
-            processor=lambda task: _process_transcription_task(
-                task=task,
-                message=message,
-                telethon_downloader=telethon_downloader,
-                transcriber_registry=transcriber_registry,
-                provider_preferences=provider_preferences,
-                deepgram_model_preferences=deepgram_model_preferences,
-                audio_optimizer=audio_optimizer,
-                transcript_cache=transcript_cache,
-                compression_threshold_mb=compression_threshold_mb,
-                meta=meta,
-            ),
+        task_id = await _submit_job(
+            task_queue,
+            job,
+            target,
+            download_path,
+            processor_kwargs,
+            worker_limiter,
         )
 
+        if task_tracer:
+            task_tracer.alias(task_id, job.job_id)
         queue_stats = await task_queue.get_stats()
-        await message.answer(
+        if admission:
+            eta_line = f"⏱️ Perkiraan selesai: {format_eta(admission.eta_seconds)}\n"
+        else:
+            eta_line = ""
+        await target.status(
             f"🎵 Audio Anda dalam antrian pemrosesan!\n\n"
             f"📋 Task ID: `{task_id[:8]}`\n"
             f"⏳ Posisi antrian: {queue_stats['queue_size']}\n"
-            f"👷 Worker aktif: {queue_stats['active_workers']}/{task_queue.max_workers}\n\n"
+            f"{eta_line}"
+            f"👷 Worker aktif: {queue_stats['active_workers']}/{current_workers()}\n\n"
             f"Hasil akan dikirim otomatis saat selesai."
         )
         logger.info(
@@ -137,97 +328,492 @@ async def handle_media(
 
     except RuntimeError as rate_err:
         logger.warning("Rate limit exceeded for user %s: %s", message.chat.id, rate_err)
-        await message.answer(
+        await JobRecorder(job_journal, job.job_id).record(FAILED, error=str(rate_err))
+        await target.answer(
             "⚠️ Anda memiliki terlalu banyak task yang sedang diproses.\n"
             "Silakan tunggu task sebelumnya selesai terlebih dahulu."
         )
 
 
-async def _process_transcription_task(
-    task: TranscriptionTask,
-    message: Message,
+async def _submit_when_admitted(
+    admission_controller: AdmissionController,
+    current_workers,
+    task_queue: TaskQueue,
+    job: Job,
+    target: ReplyTarget,
+    download_path: Path,
+    processor_kwargs: dict,
+    worker_limiter: Optional[ResizableLimiter],
+) -> None:
+    """Submit a deferred task once the backlog has room for it again."""
+    await admission_controller.wait_for_capacity(
+        job.job_id, job.file_size, job.duration, current_workers
+    )
+    try:
+        await _submit_job(
+            task_queue, job, target, download_path, processor_kwargs, worker_limiter
+        )
+    except RuntimeError as err:
+        logger.warning("Job tertunda %s gagal diantrikan: %s", job.job_id[:8], err)
+        await JobRecorder(processor_kwargs.get("job_journal"), job.job_id).record(
+            FAILED, error=str(err)
+        )
+        await target.answer(
+            "⚠️ File yang ditunda gagal dimasukkan ke antrian. Silakan kirim ulang."
+        )
+        return
+    logger.info("Job tertunda %s masuk antrian", job.job_id[:8])
+
+
+async def _submit_job(
+    task_queue: TaskQueue,
+    job: Job,
+    target: ReplyTarget,
+    download_path: Path,
+    processor_kwargs: dict,
+    worker_limiter: Optional[ResizableLimiter] = None,
+) -> str:
+    meta = meta_from_job(job)
+    admission = processor_kwargs.get("admission_controller")
+    if admission:
+        # Registered before the first await so concurrent ETAs include it.
+        admission.admit(job.job_id, job.file_size, job.duration)
+    submitted_at = time.time()
+
+    async def processor(task) -> None:
+        async with worker_limiter.slot() if worker_limiter else nullcontext():
+            if admission:
+                admission.start(job.job_id)
+            try:
+                await process_transcription(
+                    target=target,
+                    meta=meta,
+                    requested_provider=task.provider,
+                    requested_model=job.model,
+                    download_path=task.file_path,
+                    job_id=job.job_id,
+                    queued_at=submitted_at,
+                    **processor_kwargs,
+                )
+            finally:
+                if admission:
+                    admission.finish(job.job_id)
+
+    try:
+        return await task_queue.submit(
+            chat_id=job.chat_id,
+            message_id=job.message_id,
+            file_path=download_path,
+            provider=job.provider,
+            priority=0,
+            processor=processor,
+        )
+    except BaseException:
+        if admission:
+            admission.finish(job.job_id)
+        raise
+
+
+async def resume_journaled_jobs(
+    bot: Bot,
+    task_queue: TaskQueue,
+    job_journal: JobJournal,
+    processor_kwargs: dict,
+    worker_limiter: Optional[ResizableLimiter] = None,
+    outbound_sender: Optional[OutboundSender] = None,
+    delivery_preferences: Optional[DeliveryPreferences] = None,
+) -> int:
+    """Resubmit jobs a previous run left unfinished; returns how many."""
+    pruned = await job_journal.prune()
+    if pruned:
+        logger.info("🧹 %d entri journal lama dihapus", pruned)
+    resumed = 0
+    for state in await job_journal.unfinished():
+        job = state.job
+        target = ReplyTarget(
+            bot=bot,
+            chat_id=job.chat_id,
+            message_id=job.message_id,
+            source_name=job.source_name,
+            sender=outbound_sender,
+            delivery=(
+                delivery_preferences.options(job.delivery)
+                if delivery_preferences
+                else DeliveryOptions()
+            ),
+        )
+        download_path = Path(
+            state.data.get("download_path") or _build_download_path(meta_from_job(job))
+        )
+        try:
+            await _submit_job(
+                task_queue,
+                job,
+                target,
+                download_path,
+                processor_kwargs,
+                worker_limiter,
+            )
+        except RuntimeError as err:
+            logger.warning("Job %s tidak bisa dilanjutkan: %s", job.job_id[:8], err)
+            await job_journal.record(job.job_id, FAILED, error=str(err))
+            continue
+        resumed += 1
+        # Its last event may already be older than the expiry window.
+        job_journal.active.add(job.job_id)
+        logger.info("♻️ Melanjutkan job %s dari stage %s", job.job_id[:8], state.stage)
+        try:
+            await target.status(
+                "♻️ Bot sempat dimulai ulang. Transkripsi file Anda dilanjutkan "
+                "dari tahap terakhir yang tersimpan."
+            )
+        except Exception:  # noqa: BLE001
+            logger.warning("Gagal memberi tahu chat %s", job.chat_id, exc_info=True)
+    return resumed
+
+
+def meta_from_job(job: Job) -> MediaMeta:
+    return MediaMeta(
+        display_name=job.display_name,
+        suffix=job.suffix,
+        file_size=job.file_size,
+        duration=job.duration,
+        file_unique_id=job.file_unique_id,
+    )
+
+
+# Injected dependencies ``process_transcription`` takes; worker mode passes
+# these from its own container instead of the dispatcher middleware.
+PROCESSOR_DEPENDENCIES = (
+    "telethon_downloader",
+    "transcriber_registry",
+    "provider_preferences",
+    "deepgram_model_preferences",
+    "audio_optimizer",
+    "transcript_cache",
+    "stage_executors",
+    "provider_gateway",
+    "compression_threshold_mb",
+    "progress_interval",
+    "segmented_transcoder",
+    "voice_activity_detector",
+    "voice_batcher",
+    "provider_hedger",
+    "provider_router",
+    "deepgram_callbacks",
+    "job_journal",
+    "admission_controller",
+    "storage_manager",
+    "pipeline_metrics",
+    "task_tracer",
+)
+
+
+async def process_transcription(
+    target: ReplyTarget,
+    meta: MediaMeta,
+    requested_provider: str,
     telethon_downloader: TelethonDownloadService,
     transcriber_registry: TranscriberRegistry,
     provider_preferences: ProviderPreferences,
     deepgram_model_preferences: DeepgramModelPreferences,
     audio_optimizer: AudioOptimizer,
     transcript_cache: Optional[TranscriptCache],
+    stage_executors: StageExecutors,
+    provider_gateway: ProviderGateway,
     compression_threshold_mb: int,
-    meta: MediaMeta,
+    progress_interval: float = 5.0,
+    requested_model: Optional[str] = None,
+    download_path: Optional[Path] = None,
+    segmented_transcoder: Optional[SegmentedTranscoder] = None,
+    voice_activity_detector: Optional[VoiceActivityDetector] = None,
+    voice_batcher: Optional[VoiceNoteBatcher] = None,
+    provider_hedger: Optional[ProviderHedger] = None,
+    provider_router: Optional[ProviderRouter] = None,
+    deepgram_callbacks: Optional[DeepgramCallbackServer] = None,
+    job_journal: Optional[JobJournal] = None,
+    job_id: Optional[str] = None,
+    admission_controller: Optional[AdmissionController] = None,
+    storage_manager: Optional[StorageManager] = None,
+    pipeline_metrics: Optional[PipelineMetrics] = None,
+    task_tracer: Optional[TaskTracer] = None,
+    queued_at: Optional[float] = None,
 ) -> None:
-    """Process transcription task with caching and optimization."""
-    download_path = task.file_path
+    """Download, prepare, transcribe and deliver one media file to ``target``.
+
+    With a journal, each stage is checkpointed under ``job_id`` and a rerun
+    of the same job picks up from the last stage whose output still exists.
+    With a tracer, every stage becomes a span of the trace for ``job_id``;
+    ``queued_at`` (wall clock) adds the time spent waiting for a worker.
+    """
+    download_path = download_path or _build_download_path(meta)
     cleanup_paths = {download_path}
+    provider_display = requested_provider
+    recorder = JobRecorder(job_journal, job_id)
+    reservation: Optional[Reservation] = None
+    resume = await recorder.state()
+    if resume and resume.stage == DONE:
+        logger.info("Job %s sudah selesai; dilewati", job_id[:8])
+        return
+    if resume and resume.stage == FAILED:
+        # Redelivered by the broker after a failure: retry from scratch.
+        logger.info("Job %s pernah gagal; diulang dari awal", job_id[:8])
+        resume = None
+    if _draining.is_set() and recorder.enabled:
+        # Left queued in the journal; the next start picks it up.
+        return
 
-    async with ChatActionSender.typing(bot=message.bot, chat_id=message.chat.id):
+    async with trace_task(
+        task_tracer,
+        job_id,
+        queued_at=queued_at,
+        chat_id=target.chat_id,
+        media=meta.display_name,
+        file_size=meta.file_size,
+        duration=meta.duration,
+    ), _tracked(_processing_tasks), recorder.running(), ChatActionSender.typing(
+        bot=target.bot, chat_id=target.chat_id
+    ), ProgressReporter(
+        target, meta.display_name, interval=progress_interval
+    ) as progress:
         try:
-            # Download media
-            logger.info(
-                "Starting download for %s (%s bytes) in chat %s",
-                meta.display_name,
-                meta.file_size,
-                message.chat.id,
-            )
-            await _download_media(telethon_downloader, message, download_path, meta)
-            logger.info(
-                "Download complete: %s (%s bytes)",
-                download_path,
-                download_path.stat().st_size if download_path.exists() else "unknown",
+            if resume and "text" in resume.data:
+                # Crashed while delivering: the transcript is already paid for.
+                logger.info("♻️ Job %s: mengirim ulang transkrip tersimpan", job_id[:8])
+                result = TranscriptionResult(
+                    text=resume.data["text"], segments=resume.data.get("segments")
+                )
+                cleanup_paths.update(_journaled_paths(resume))
+                await _deliver_transcription(target, result, stage_executors)
+                await recorder.record(DONE)
+                return
+
+            downloaded = (
+                resume.existing_path("download_path")
+                if resume and resume.reached(TRANSCODING)
+                else None
             )
+            if downloaded:
+                download_path = downloaded
+                cleanup_paths = {download_path}
+                logger.info("♻️ Job %s: memakai unduhan %s", job_id[:8], download_path)
+            else:
+                # Hold disk budget for the download and its transcoded copies
+                if storage_manager:
+                    reservation = await _reserve_storage(
+                        storage_manager, target, meta, audio_optimizer
+                    )
+                    reservation.track(download_path)
+                # Download media
+                await recorder.record(DOWNLOADING, download_path=str(download_path))
+                logger.info(
+                    "Starting download for %s (%s bytes) in chat %s",
+                    meta.display_name,
+                    meta.file_size,
+                    target.chat_id,
+                )
+                download_started = time.monotonic()
+                progress.stage("download", total=meta.file_size)
+                with span("download", file_size=meta.file_size):
+                    await telethon_downloader.download_media(
+                        chat_id=target.chat_id,
+                        message_id=target.message_id,
+                        file_path=str(download_path),
+                        progress_callback=progress.update,
+                    )
+                downloaded_bytes = (
+                    download_path.stat().st_size if download_path.exists() else 0
+                )
+                download_seconds = time.monotonic() - download_started
+                if admission_controller:
+                    admission_controller.observe(
+                        DOWNLOAD, downloaded_bytes, download_seconds
+                    )
+                if pipeline_metrics:
+                    pipeline_metrics.bytes_downloaded.inc(downloaded_bytes)
+                    pipeline_metrics.observe_stage(
+                        "download", download_seconds, size=downloaded_bytes
+                    )
+                logger.info(
+                    "Download complete: %s (%s bytes)",
+                    download_path,
+                    (
+                        download_path.stat().st_size
+                        if download_path.exists()
+                        else "unknown"
+                    ),
+                )
 
             # Check cache first
             file_hash = None
             if transcript_cache:
-                file_hash = await audio_optimizer._compute_file_hash(download_path)
-                cached_result = await transcript_cache.get(file_hash)
+                hash_started = time.monotonic()
+                with span("hash") as hash_span:
+                    file_hash = await stage_executors.disk.run(
+                        _compute_file_hash, download_path
+                    )
+                    cached_result = await transcript_cache.get(file_hash)
+                    if hash_span:
+                        hash_span.attributes["cache_hit"] = bool(cached_result)
+                if pipeline_metrics:
+                    pipeline_metrics.observe_stage(
+                        "hash",
+                        time.monotonic() - hash_started,
+                        size=meta.file_size,
+                    )
+                    pipeline_metrics.cache_lookup(hit=bool(cached_result))
                 if cached_result:
                     logger.info("✨ Cache hit for file hash %s", file_hash[:8])
                     text, segments = cached_result
                     result = TranscriptionResult(text=text, segments=segments)
-                    await message.answer(
+                    await target.status(
                         f"✨ Hasil dari cache (file sudah pernah diproses)!\n\n"
-                        f"Provider: {task.provider}"
+                        f"Provider: {requested_provider}"
                     )
-                    await _deliver_transcription(message, result)
+                    await _deliver_transcription(target, result, stage_executors)
+                    await recorder.record(DONE, cache_hit=True)
+                    if pipeline_metrics:
+                        pipeline_metrics.tasks.inc(outcome="cache_hit")
                     return
-
-            # Optimize audio
-            compression_threshold_bytes = compression_threshold_mb * 1024 * 1024
-            prepared_path = await asyncio.to_thread(
-                _prepare_audio_for_transcription_optimized,
-                download_path,
-                meta.file_size,
-                audio_optimizer,
-                compression_threshold_bytes,
+            await recorder.record(
+                TRANSCODING, download_path=str(download_path), file_hash=file_hash
             )
-            cleanup_paths.add(prepared_path)
-
-            try:
-                payload_size = prepared_path.stat().st_size
-            except OSError:
-                payload_size = None
 
-            # Get transcriber again for this task
-            requested_provider = task.provider
-            transcriber = transcriber_registry.get(requested_provider)
-            if not transcriber:
-                fallback = transcriber_registry.default_provider
-                transcriber = transcriber_registry.get(fallback)
-                requested_provider = fallback
-
-            provider_key = getattr(transcriber, "provider_name", requested_provider)
-            provider_display = provider_key
+            download_size = download_path.stat().st_size
+            media_duration: Optional[float] = meta.duration
+
+            # Resolve the provider first so the planner knows its payload limit;
+            # VAD also needs the duration to honour its minimum.
+            if media_duration is None and (
+                (requested_provider == AUTO_PROVIDER and provider_router)
+                or transcriber_registry.has_duration_limits()
+                or voice_activity_detector
+            ):
+                probe = await stage_executors.cpu.run(probe_media, download_path)
+                media_duration = probe.duration if probe else None
+            if requested_provider == AUTO_PROVIDER and provider_router:
+                route = provider_router.choose(download_size, media_duration)
+                if route:
+                    requested_provider, requested_model = route.provider, route.model
+                    logger.info(
+                        "Auto routing %s → %s", meta.display_name, route.display
+                    )
 
-            if provider_key == "deepgram":
-                model = deepgram_model_preferences.get(message.chat.id)
-                if hasattr(transcriber, "with_model"):
-                    transcriber = transcriber.with_model(model)
-                provider_display = f"deepgram ({model})"
+            resolved = _resolve_transcriber(
+                transcriber_registry,
+                requested_provider,
+                target.chat_id,
+                deepgram_model_preferences,
+                model=requested_model,
+                duration=media_duration,
+            )
+            if resolved is None:
+                await target.answer(
+                    "Semua provider transkripsi sedang gangguan atau tidak bisa "
+                    "memproses durasi file ini. Silakan coba lagi beberapa saat lagi."
+                )
+                await recorder.record(FAILED, error="no provider available")
+                return
+            provider_key, provider_display, transcriber = resolved
 
             payload_limit = getattr(
                 transcriber, "max_payload_bytes", DEFAULT_PAYLOAD_LIMIT
             )
 
+            timeline: Optional[TimelineMap] = None
+            prepared = (
+                resume.existing_path("prepared_path")
+                if resume and resume.reached(TRANSCRIBING)
+                else None
+            )
+            if prepared:
+                prepared_path = prepared
+                cleanup_paths.update(_journaled_paths(resume))
+                timeline = _timeline_from_journal(resume.data.get("timeline"))
+                logger.info(
+                    "♻️ Job %s: memakai audio siap %s", job_id[:8], prepared_path
+                )
+            else:
+                prepare_started = time.monotonic()
+                # Cut long silences before upload
+                source_path = download_path
+                source_size = meta.file_size
+                if (
+                    voice_activity_detector
+                    and media_duration is not None
+                    and media_duration >= voice_activity_detector.min_duration
+                ):
+                    progress.stage("vad")
+                    try:
+                        with span("vad"):
+                            trimmed = await stage_executors.cpu.run(
+                                voice_activity_detector.trim_silence,
+                                download_path,
+                                bitrate=audio_optimizer.target_bitrate,
+                                channels=audio_optimizer.target_channels,
+                            )
+                    except (subprocess.SubprocessError, OSError, ValueError) as err:
+                        # Trimming is optional: any failure keeps the original.
+                        logger.warning(
+                            "VAD gagal untuk %s, memakai audio asli: %s",
+                            download_path,
+                            err,
+                        )
+                        trimmed = None
+                    if trimmed:
+                        source_path, timeline = trimmed
+                        source_size = None
+                        cleanup_paths.add(source_path)
+
+                # Optimize audio
+                compression_threshold_bytes = compression_threshold_mb * 1024 * 1024
+                progress.stage(
+                    "transcode",
+                    expected_seconds=(
+                        admission_controller.stage_seconds(PREPARE, media_duration)
+                        if admission_controller
+                        else None
+                    ),
+                )
+                with span("transcode", file_size=source_size):
+                    prepared_path = await stage_executors.cpu.run(
+                        _prepare_audio_for_transcription_optimized,
+                        source_path,
+                        source_size,
+                        audio_optimizer,
+                        compression_threshold_bytes,
+                        payload_limit,
+                        segmented_transcoder,
+                    )
+                cleanup_paths.add(prepared_path)
+                if reservation:
+                    reservation.track(source_path, prepared_path)
+                prepare_seconds = time.monotonic() - prepare_started
+                if admission_controller and media_duration:
+                    admission_controller.observe(
+                        PREPARE, media_duration, prepare_seconds
+                    )
+                if pipeline_metrics:
+                    pipeline_metrics.observe_stage(
+                        "transcode",
+                        prepare_seconds,
+                        provider=provider_key,
+                        model=requested_model,
+                        size=download_size,
+                    )
+
+                await recorder.record(
+                    TRANSCRIBING,
+                    prepared_path=str(prepared_path),
+                    trimmed_path=str(source_path),
+                    timeline=_timeline_to_journal(timeline),
+                )
+
+            try:
+                payload_size = prepared_path.stat().st_size
+            except OSError:
+                payload_size = None
+
             if payload_limit and payload_size and payload_size > payload_limit:
                 logger.warning(
                     "Prepared audio %s is %s bytes, exceeds payload limit for provider %s.",
@@ -236,59 +822,482 @@ async def _process_transcription_task(
                     provider_display,
                 )
                 limit_mb = payload_limit / (1024 * 1024)
-                await message.answer(
+                await target.answer(
                     "File sudah dikonversi, tetapi masih terlalu besar untuk "
                     f"provider {provider_display} (maks sekitar {limit_mb:.1f}MB). "
                     "Silakan kompres lagi atau kirim bagian yang lebih pendek."
                 )
+                await recorder.record(FAILED, error="payload too large")
                 return
 
             logger.info(
                 "Starting transcription via %s for %s", provider_display, prepared_path
             )
-            result = await asyncio.to_thread(transcriber.transcribe, prepared_path)
-
-            # Save to cache
-            if transcript_cache and file_hash:
-                await transcript_cache.set(file_hash, result.text, result.segments)
-                logger.info("💾 Cached transcript for hash %s", file_hash[:8])
-
-            await _deliver_transcription(message, result)
-        except ValueError as val_err:
-            logger.exception("%s gagal menghasilkan transkrip", provider_display)
-            await message.answer(
-                f"{provider_display.capitalize()} tidak mengembalikan teks: {val_err}. "
-                "Silakan periksa kualitas audio atau coba model/provider lain."
-            )
-        except HTTPError as http_err:
-            logger.exception(
-                "%s API error during transcription", provider_display.capitalize()
-            )
-            status_code = (
-                http_err.response.status_code if http_err.response is not None else None
+            audio_seconds = timeline.kept_duration if timeline else media_duration
+            if audio_seconds is None:
+                # Rate limits and callback mode both budget by duration.
+                probe = await stage_executors.cpu.run(probe_media, prepared_path)
+                audio_seconds = probe.duration if probe else None
+
+            if deepgram_callbacks and hasattr(transcriber, "submit_async"):
+                if deepgram_callbacks.accepts(audio_seconds):
+                    request_id = await provider_gateway.submit_async(
+                        transcriber,
+                        prepared_path,
+                        deepgram_callbacks.callback_url,
+                        audio_seconds,
+                    )
+                    await target.status(
+                        "⏳ File panjang sedang diproses Deepgram. "
+                        "Transkrip akan dikirim otomatis begitu selesai."
+                    )
+                    # Hand the files over; the worker goes back to the pool now.
+                    _spawn_deferred(
+                        _finish_deepgram_callback(
+                            target=target,
+                            request_id=request_id,
+                            deepgram_callbacks=deepgram_callbacks,
+                            provider_gateway=provider_gateway,
+                            transcriber=transcriber,
+                            provider_display=provider_display,
+                            prepared_path=prepared_path,
+                            audio_seconds=audio_seconds,
+                            timeline=timeline,
+                            transcript_cache=transcript_cache,
+                            file_hash=file_hash,
+                            cleanup_paths=set(cleanup_paths),
+                            stage_executors=stage_executors,
+                            recorder=recorder,
+                            reservation=reservation,
+                            pipeline_metrics=pipeline_metrics,
+                        )
+                    )
+                    cleanup_paths.clear()
+                    reservation = None
+                    return
+
+            transcribe_started = time.monotonic()
+            progress.stage(
+                "transcribe",
+                detail=f" via {provider_display}",
+                expected_seconds=(
+                    admission_controller.stage_seconds(TRANSCRIBE, audio_seconds)
+                    if admission_controller
+                    else None
+                ),
             )
-            if status_code == 413:
-                await message.answer(
-                    f"{provider_display.capitalize()} menolak file karena terlalu besar (HTTP 413). "
-                    "Silakan kompres ulang sebelum mencoba lagi."
+            if provider_router:
+                provider_router.begin(provider_key)
+            try:
+                use_batch = (
+                    voice_batcher is not None
+                    and timeline is None
+                    and voice_batcher.accepts(meta.duration)
                 )
-            else:
-                await message.answer(
-                    f"{provider_display.capitalize()} API mengembalikan kesalahan: "
-                    f"{status_code or http_err}"
+                secondary = None
+                if not use_batch:
+                    secondary = _resolve_secondary(
+                        transcriber_registry,
+                        provider_key,
+                        target.chat_id,
+                        deepgram_model_preferences,
+                        payload_size,
+                        media_duration,
+                    )
+
+                if use_batch:
+                    # Never mix chats: one request's transcript is split back.
+                    result = await voice_batcher.transcribe(
+                        f"{target.chat_id}:{provider_key}:"
+                        f"{getattr(transcriber, 'model', '')}",
+                        transcriber,
+                        prepared_path,
+                        float(meta.duration),
+                    )
+                elif (
+                    provider_hedger
+                    and secondary
+                    and provider_hedger.accepts(meta.duration)
+                ):
+                    provider_display, result = await provider_hedger.transcribe(
+                        (provider_display, transcriber),
+                        secondary,
+                        prepared_path,
+                        audio_seconds,
+                    )
+                else:
+                    try:
+                        result = await provider_gateway.transcribe(
+                            transcriber, prepared_path, audio_seconds
+                        )
+                    except Exception as exc:
+                        if not (secondary and is_provider_failure(exc)):
+                            raise
+                        logger.warning(
+                            "%s gagal (%s); failover ke %s",
+                            provider_display,
+                            exc,
+                            secondary[0],
+                        )
+                        provider_display, transcriber = secondary
+                        result = await provider_gateway.transcribe(
+                            transcriber, prepared_path, audio_seconds
+                        )
+            finally:
+                if provider_router:
+                    provider_router.end(provider_key)
+            if admission_controller and audio_seconds:
+                admission_controller.observe(
+                    TRANSCRIBE, audio_seconds, time.monotonic() - transcribe_started
+                )
+            if provider_router and not use_batch:
+                provider_router.record(
+                    provider_display,
+                    audio_seconds=audio_seconds,
+                    wall_seconds=time.monotonic() - transcribe_started,
+                    file_size=download_size,
                 )
+            progress.stage("deliver")
+            await _finalize_transcription(
+                target,
+                result,
+                timeline,
+                transcript_cache,
+                file_hash,
+                stage_executors,
+                recorder,
+                pipeline_metrics,
+            )
+        except asyncio.CancelledError:
+            if recorder.enabled:
+                # Shutdown mid-task: keep the files for the resumed run.
+                cleanup_paths.clear()
+            raise
         except Exception as exc:  # noqa: BLE001
-            logger.exception("Unhandled error while processing media")
-            await message.answer(f"Gagal memproses file: {exc}")
+            record_error(exc)
+            await recorder.record(FAILED, error=str(exc))
+            if pipeline_metrics:
+                pipeline_metrics.tasks.inc(outcome="failed")
+            await _report_transcription_error(target, provider_display, exc)
         finally:
-            for path in cleanup_paths:
-                try:
-                    if path.exists():
-                        path.unlink()
-                except OSError:
-                    logger.warning(
-                        "Gagal menghapus file sementara %s", path, exc_info=True
-                    )
+            _remove_paths(cleanup_paths)
+            if reservation:
+                reservation.release()
+
+
+async def _reserve_storage(
+    storage_manager: StorageManager,
+    target: ReplyTarget,
+    meta: MediaMeta,
+    audio_optimizer: AudioOptimizer,
+) -> Reservation:
+    expected = storage_manager.expected_bytes(
+        meta.file_size, meta.duration, audio_optimizer.target_bitrate
+    )
+    if not storage_manager.fits(expected):
+        logger.warning(
+            "Budget disk penuh; %s menunggu %d MB",
+            meta.display_name,
+            expected // (1024 * 1024),
+        )
+        await target.status(
+            "💾 Ruang penyimpanan server sedang penuh. File Anda akan diunduh "
+            "begitu ada ruang kosong."
+        )
+    return await storage_manager.reserve(expected)
+
+
+async def _finalize_transcription(
+    target: ReplyTarget,
+    result: TranscriptionResult,
+    timeline: Optional[TimelineMap],
+    transcript_cache: Optional[TranscriptCache],
+    file_hash: Optional[str],
+    stage_executors: StageExecutors,
+    recorder: JobRecorder = JobRecorder(),
+    pipeline_metrics: Optional[PipelineMetrics] = None,
+) -> None:
+    if timeline:
+        result = TranscriptionResult(
+            text=result.text,
+            segments=timeline.remap_segments(result.segments),
+        )
+
+    # Save to cache
+    if transcript_cache and file_hash:
+        await transcript_cache.set(file_hash, result.text, result.segments)
+        logger.info("💾 Cached transcript for hash %s", file_hash[:8])
+        if pipeline_metrics:
+            pipeline_metrics.cache_store()
+
+    await recorder.record(DELIVERING, text=result.text, segments=result.segments)
+    deliver_started = time.monotonic()
+    with span("deliver", characters=len(result.text)):
+        await _deliver_transcription(target, result, stage_executors)
+    await recorder.record(DONE)
+    if pipeline_metrics:
+        pipeline_metrics.observe_stage("deliver", time.monotonic() - deliver_started)
+        pipeline_metrics.tasks.inc(outcome="done")
+
+
+async def _report_transcription_error(
+    target: ReplyTarget, provider_display: str, error: Exception
+) -> None:
+    """Log ``error`` and tell the user what went wrong; call from ``except``."""
+    if isinstance(error, StorageFull):
+        logger.error("Budget disk habis: %s", error)
+        await target.answer(
+            "💾 Ruang penyimpanan server tidak cukup untuk file ini saat ini "
+            f"({error}). Silakan coba lagi nanti atau kirim file yang lebih kecil."
+        )
+    elif isinstance(error, ProviderUnavailable):
+        logger.warning("%s tidak tersedia: %s", provider_display, error)
+        await target.answer(
+            f"{provider_display.capitalize()} sedang gangguan. "
+            "Silakan coba lagi beberapa saat lagi."
+        )
+    elif isinstance(error, NoAudioTrack):
+        logger.info("Media tanpa track audio: %s", error)
+        await target.answer(
+            "🔇 File ini tidak memiliki track audio yang bisa ditranskripsi. "
+            "Silakan kirim file audio/video yang berisi suara."
+        )
+    elif isinstance(error, ValueError):
+        logger.exception("%s gagal menghasilkan transkrip", provider_display)
+        await target.answer(
+            f"{provider_display.capitalize()} tidak mengembalikan teks: {error}. "
+            "Silakan periksa kualitas audio atau coba model/provider lain."
+        )
+    elif isinstance(error, HTTPError):
+        logger.exception(
+            "%s API error during transcription", provider_display.capitalize()
+        )
+        status_code = error.response.status_code if error.response is not None else None
+        if status_code == 413:
+            await target.answer(
+                f"{provider_display.capitalize()} menolak file karena terlalu besar (HTTP 413). "
+                "Silakan kompres ulang sebelum mencoba lagi."
+            )
+        else:
+            await target.answer(
+                f"{provider_display.capitalize()} API mengembalikan kesalahan: "
+                f"{status_code or error}"
+            )
+    else:
+        logger.exception("Unhandled error while processing media")
+        await target.answer(f"Gagal memproses file: {error}")
+
+
+def _remove_paths(paths: set[Path]) -> None:
+    for path in paths:
+        try:
+            if path.exists():
+                path.unlink()
+        except OSError:
+            logger.warning("Gagal menghapus file sementara %s", path, exc_info=True)
+
+
+_deferred_tasks: set[asyncio.Task] = set()
+_processing_tasks: set[asyncio.Task] = set()
+_admission_waiters: set[asyncio.Task] = set()
+_draining = asyncio.Event()
+
+
+def _spawn_deferred(coro) -> None:
+    task = asyncio.ensure_future(coro)
+    _deferred_tasks.add(task)
+    task.add_done_callback(_deferred_tasks.discard)
+
+
+@asynccontextmanager
+async def _tracked(tasks: set[asyncio.Task]):
+    task = asyncio.current_task()
+    tasks.add(task)
+    try:
+        yield
+    finally:
+        tasks.discard(task)
+
+
+async def drain_processing(timeout: float) -> None:
+    """Give in-flight transcriptions ``timeout`` seconds, then cancel the rest.
+
+    Journaled jobs cancelled here keep their files and resume on next start.
+    """
+    _draining.set()
+    # Deferred admissions have not started; the journal re-queues them.
+    for task in list(_admission_waiters):
+        task.cancel()
+    pending = _processing_tasks | _deferred_tasks
+    if not pending:
+        return
+    logger.info(
+        "⏳ Menunggu %d transkripsi selesai (maks %.0fs)...", len(pending), timeout
+    )
+    _, still_running = await asyncio.wait(pending, timeout=timeout)
+    if still_running:
+        logger.warning(
+            "%d transkripsi dihentikan paksa saat shutdown", len(still_running)
+        )
+        for task in still_running:
+            task.cancel()
+        await asyncio.gather(*still_running, return_exceptions=True)
+
+
+async def _finish_deepgram_callback(
+    *,
+    target: ReplyTarget,
+    request_id: str,
+    deepgram_callbacks: DeepgramCallbackServer,
+    provider_gateway: ProviderGateway,
+    transcriber: object,
+    provider_display: str,
+    prepared_path: Path,
+    audio_seconds: Optional[float],
+    timeline: Optional[TimelineMap],
+    transcript_cache: Optional[TranscriptCache],
+    file_hash: Optional[str],
+    cleanup_paths: set[Path],
+    stage_executors: StageExecutors,
+    recorder: JobRecorder = JobRecorder(),
+    reservation: Optional[Reservation] = None,
+    pipeline_metrics: Optional[PipelineMetrics] = None,
+) -> None:
+    """Deliver a callback-mode transcription once Deepgram posts the result."""
+    try:
+        try:
+            payload = await deepgram_callbacks.wait(request_id)
+            result = transcriber.parse_callback(payload)
+        except asyncio.TimeoutError:
+            logger.warning(
+                "Callback Deepgram %s tidak datang dalam %.0fs; transkripsi ulang sinkron",
+                request_id[:8],
+                deepgram_callbacks.timeout,
+            )
+            result = await provider_gateway.transcribe(
+                transcriber, prepared_path, audio_seconds
+            )
+        await _finalize_transcription(
+            target,
+            result,
+            timeline,
+            transcript_cache,
+            file_hash,
+            stage_executors,
+            recorder,
+            pipeline_metrics,
+        )
+    except asyncio.CancelledError:
+        if recorder.enabled:
+            cleanup_paths.clear()
+        raise
+    except Exception as exc:  # noqa: BLE001
+        await recorder.record(FAILED, error=str(exc))
+        if pipeline_metrics:
+            pipeline_metrics.tasks.inc(outcome="failed")
+        await _report_transcription_error(target, provider_display, exc)
+    finally:
+        _remove_paths(cleanup_paths)
+        if reservation:
+            reservation.release()
+
+
+def _journaled_paths(state: JobState) -> set[Path]:
+    """Files a resumed job created earlier and must still clean up."""
+    keys = ("download_path", "trimmed_path", "prepared_path")
+    return {Path(state.data[key]) for key in keys if state.data.get(key)}
+
+
+def _timeline_to_journal(timeline: Optional[TimelineMap]) -> Optional[dict]:
+    if timeline is None:
+        return None
+    return {
+        "regions": [list(region) for region in timeline.regions],
+        "original_duration": timeline.original_duration,
+    }
+
+
+def _timeline_from_journal(data: Optional[dict]) -> Optional[TimelineMap]:
+    if not data:
+        return None
+    return TimelineMap(
+        regions=[tuple(region) for region in data["regions"]],
+        original_duration=data["original_duration"],
+    )
+
+
+def _build_transcriber(
+    transcriber_registry: TranscriberRegistry,
+    provider: str,
+    chat_id: int,
+    deepgram_model_preferences: DeepgramModelPreferences,
+    model: Optional[str] = None,
+) -> tuple[str, str, object]:
+    """Return ``(provider_key, display_name, transcriber)`` for a chat."""
+    transcriber = transcriber_registry.get(provider)
+    provider_key = getattr(transcriber, "provider_name", provider)
+    provider_display = provider_key
+
+    if provider_key == "deepgram":
+        model = model or deepgram_model_preferences.get(chat_id)
+        if hasattr(transcriber, "with_model"):
+            transcriber = transcriber.with_model(model)
+        provider_display = f"deepgram ({model})"
+
+    return provider_key, provider_display, transcriber
+
+
+def _resolve_transcriber(
+    transcriber_registry: TranscriberRegistry,
+    requested_provider: str,
+    chat_id: int,
+    deepgram_model_preferences: DeepgramModelPreferences,
+    model: Optional[str] = None,
+    duration: Optional[float] = None,
+) -> Optional[tuple[str, str, object]]:
+    """Pick the chat's provider, failing over when its circuit is open."""
+    provider = transcriber_registry.select(requested_provider, duration)
+    if provider is None:
+        return None
+    return _build_transcriber(
+        transcriber_registry,
+        provider,
+        chat_id,
+        deepgram_model_preferences,
+        model=model if provider == requested_provider else None,
+    )
+
+
+def _resolve_secondary(
+    transcriber_registry: TranscriberRegistry,
+    primary_key: str,
+    chat_id: int,
+    deepgram_model_preferences: DeepgramModelPreferences,
+    payload_size: Optional[int],
+    duration: Optional[float] = None,
+) -> Optional[tuple[str, object]]:
+    """Pick another healthy provider that accepts the prepared payload."""
+    for name in transcriber_registry.providers():
+        if name == primary_key or not transcriber_registry.is_available(name):
+            continue
+        if not transcriber_registry.accepts(name, duration):
+            continue
+        _, display, transcriber = _build_transcriber(
+            transcriber_registry, name, chat_id, deepgram_model_preferences
+        )
+        limit = getattr(transcriber, "max_payload_bytes", DEFAULT_PAYLOAD_LIMIT)
+        if payload_size and limit and payload_size > limit:
+            continue
+        return display, transcriber
+    return None
+
+
+def _compute_file_hash(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as file_obj:
+        for chunk in iter(lambda: file_obj.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
 
 
 def _pick_media(message: Message) -> Optional[MediaMeta]:
@@ -297,6 +1306,8 @@ def _pick_media(message: Message) -> Optional[MediaMeta]:
             display_name="voice_note.ogg",
             suffix=".ogg",
             file_size=message.voice.file_size,
+            file_unique_id=message.voice.file_unique_id,
+            duration=message.voice.duration,
         )
     if message.audio:
         suffix = Path(message.audio.file_name or "audio.mp3").suffix or ".mp3"
@@ -304,6 +1315,8 @@ def _pick_media(message: Message) -> Optional[MediaMeta]:
             display_name=message.audio.file_name or f"audio{suffix}",
             suffix=suffix,
             file_size=message.audio.file_size,
+            file_unique_id=message.audio.file_unique_id,
+            duration=message.audio.duration,
         )
     if message.video:
         suffix = Path(message.video.file_name or "video.mp4").suffix or ".mp4"
@@ -311,12 +1324,16 @@ def _pick_media(message: Message) -> Optional[MediaMeta]:
             display_name=message.video.file_name or f"video{suffix}",
             suffix=suffix,
             file_size=message.video.file_size,
+            file_unique_id=message.video.file_unique_id,
+            duration=message.video.duration,
         )
     if message.video_note:
         return MediaMeta(
             display_name="video_note.mp4",
             suffix=".mp4",
             file_size=message.video_note.file_size,
+            file_unique_id=message.video_note.file_unique_id,
+            duration=message.video_note.duration,
         )
     if message.document and message.document.mime_type:
         mime = message.document.mime_type
@@ -327,12 +1344,13 @@ def _pick_media(message: Message) -> Optional[MediaMeta]:
                 display_name=message.document.file_name or f"media{fallback_suffix}",
                 suffix=suffix or fallback_suffix,
                 file_size=message.document.file_size,
+                file_unique_id=message.document.file_unique_id,
             )
     return None
 
 
 def _build_download_path(meta: MediaMeta) -> Path:
-    downloads_dir = Path.home() / "Downloads" / "transhades"
+    downloads_dir = DEFAULT_DOWNLOAD_DIR
     downloads_dir.mkdir(parents=True, exist_ok=True)
     timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S_%f")
     sanitized = _sanitize_filename(meta.display_name)
@@ -346,51 +1364,6 @@ def _sanitize_filename(name: str) -> str:
     return cleaned.strip("_") or "media"
 
 
-async def _download_media(
-    downloader: TelethonDownloadService,
-    message: Message,
-    target_path: Path,
-    meta: MediaMeta,
-) -> None:
-    progress: Progress | None = None
-    task_id: int | None = None
-
-    def progress_callback(current: int, total: int) -> None:
-        if progress and task_id is not None:
-            progress.update(
-                task_id, completed=current, total=total or meta.file_size or 0
-            )
-
-    if (meta.file_size or 0) >= PROGRESS_BAR_THRESHOLD:
-        progress = Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            BarColumn(),
-            DownloadColumn(),
-            TransferSpeedColumn(),
-            TimeElapsedColumn(),
-            transient=True,
-        )
-        progress.start()
-        total_size = meta.file_size if (meta.file_size and meta.file_size > 0) else None
-        task_id = progress.add_task(
-            description=f"Mendownload {meta.display_name}",
-            total=total_size,
-        )
-        logger.info("Progress bar diaktifkan untuk unduhan besar.")
-
-    try:
-        await downloader.download_media(
-            chat_id=message.chat.id,
-            message_id=message.message_id,
-            file_path=str(target_path),
-            progress_callback=progress_callback if progress else None,
-        )
-    finally:
-        if progress:
-            progress.stop()
-
-
 def _prepare_audio_for_transcription(
     source_path: Path, file_size: Optional[int]
 ) -> Path:
@@ -472,70 +1445,74 @@ def _prepare_audio_for_transcription_optimized(
     file_size: Optional[int],
     audio_optimizer: AudioOptimizer,
     compression_threshold_bytes: int,
+    payload_limit: Optional[int] = DEFAULT_PAYLOAD_LIMIT,
+    segmented_transcoder: Optional[SegmentedTranscoder] = None,
 ) -> Path:
-    """Optimized audio preparation with intelligent compression."""
+    """Probe the download and only run ffmpeg when the provider needs it."""
     if not source_path.exists():
         logger.warning("Source path %s tidak ditemukan.", source_path)
         return source_path
 
     actual_size = file_size or source_path.stat().st_size
-    suffix = source_path.suffix.lower()
-
-    # Check if compression is needed
-    if actual_size < compression_threshold_bytes:
-        if suffix == ".mp3":
-            logger.info(
-                "✓ File %s already optimal (mp3, %s bytes < %s threshold)",
-                source_path.name,
-                actual_size,
-                compression_threshold_bytes,
-            )
-            return source_path
-        elif suffix in [".ogg", ".m4a"]:
-            logger.info(
-                "✓ File %s is small enough (%s bytes < %s threshold), minimal conversion",
-                source_path.name,
-                actual_size,
-                compression_threshold_bytes,
-            )
-
-    # Need compression - use ffmpeg
-    target_path = source_path.with_suffix(".mp3")
+    probe = probe_media(source_path)
+    plan = plan_transcode(
+        source_path,
+        probe,
+        file_size=actual_size,
+        payload_limit=payload_limit,
+        compression_threshold_bytes=compression_threshold_bytes,
+        target_bitrate=audio_optimizer.target_bitrate,
+    )
 
-    # Determine optimal bitrate based on file size
-    if actual_size > 100 * 1024 * 1024:  # >100MB
-        bitrate = "64k"
-        logger.info("Large file detected, using lower bitrate: %s", bitrate)
-    elif actual_size > 50 * 1024 * 1024:  # >50MB
-        bitrate = "80k"
-    else:
-        bitrate = audio_optimizer.target_bitrate
+    if plan.action == PASSTHROUGH:
+        logger.info(
+            "✓ Passthrough %s (%s bytes): %s",
+            source_path.name,
+            actual_size,
+            plan.reason,
+        )
+        return source_path
 
-    command = [
-        "ffmpeg",
-        "-y",
-        "-i",
-        str(source_path),
-        "-vn",
-        "-ac",
-        str(audio_optimizer.target_channels),
-        "-ar",
-        str(audio_optimizer.target_sample_rate),
-        "-codec:a",
-        "libmp3lame",
-        "-b:a",
-        bitrate,
-        str(target_path),
-    ]
+    target_path = _derive_prepared_path(source_path, plan.target_suffix)
+    command = plan.build_command(
+        source_path,
+        target_path,
+        sample_rate=audio_optimizer.target_sample_rate,
+        channels=audio_optimizer.target_channels,
+    )
 
     logger.info(
-        "🎵 Optimizing audio: %s (%s bytes) → %s (bitrate: %s)",
+        "🎵 %s audio: %s (%s bytes) → %s (%s)",
+        plan.action.capitalize(),
         source_path.name,
         actual_size,
         target_path.name,
-        bitrate,
+        plan.reason if plan.action == REMUX else f"bitrate: {plan.bitrate}",
     )
 
+    if segmented_transcoder and segmented_transcoder.should_split(plan, probe):
+        try:
+            segmented_transcoder.transcode(
+                source_path,
+                target_path,
+                plan,
+                probe,
+                sample_rate=audio_optimizer.target_sample_rate,
+                channels=audio_optimizer.target_channels,
+            )
+            logger.info(
+                "✓ Parallel optimization complete: %s → %s bytes",
+                target_path.name,
+                target_path.stat().st_size,
+            )
+            return target_path
+        except subprocess.CalledProcessError as err:
+            logger.warning(
+                "Parallel transcode failed for %s, retrying as single pass: %s",
+                source_path,
+                err.stderr.decode("utf-8", errors="ignore") if err.stderr else err,
+            )
+
     try:
         result = subprocess.run(
             command,
@@ -557,6 +1534,45 @@ def _prepare_audio_for_transcription_optimized(
             compression_ratio,
         )
         return target_path
+    except subprocess.CalledProcessError as err:
+        logger.error(
+            "ffmpeg %s failed for %s: %s",
+            plan.action,
+            source_path,
+            err.stderr.decode("utf-8", errors="ignore"),
+        )
+        if plan.action == REMUX:
+            # Stream-copy can fail on odd containers; retry with a real encode.
+            fallback = TranscodePlan(
+                TRANSCODE,
+                ".mp3",
+                "remux failed",
+                bitrate=audio_optimizer.target_bitrate,
+            )
+            return _run_fallback_transcode(source_path, fallback, audio_optimizer)
+        return source_path
+
+
+def _run_fallback_transcode(
+    source_path: Path,
+    plan: TranscodePlan,
+    audio_optimizer: AudioOptimizer,
+) -> Path:
+    target_path = _derive_prepared_path(source_path, plan.target_suffix)
+    command = plan.build_command(
+        source_path,
+        target_path,
+        sample_rate=audio_optimizer.target_sample_rate,
+        channels=audio_optimizer.target_channels,
+    )
+    try:
+        subprocess.run(
+            command,
+            check=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        return target_path
     except subprocess.CalledProcessError as err:
         logger.error(
             "ffmpeg conversion failed for %s: %s",
@@ -566,40 +1582,84 @@ def _prepare_audio_for_transcription_optimized(
         return source_path
 
 
-async def _deliver_transcription(message: Message, result: TranscriptionResult) -> None:
+def _derive_prepared_path(source_path: Path, suffix: str) -> Path:
+    target_path = source_path.with_suffix(suffix)
+    if target_path == source_path:
+        target_path = source_path.with_name(f"{source_path.stem}.prepared{suffix}")
+    return target_path
+
+
+async def _deliver_transcription(
+    target: ReplyTarget,
+    result: TranscriptionResult,
+    stage_executors: StageExecutors,
+) -> None:
     plain_text = result.to_plain_text()
     if not plain_text:
-        await message.answer("Transkrip kosong diterima dari Groq.")
+        await target.answer("Transkrip kosong diterima dari Groq.")
         return
 
-    if len(plain_text) <= TELEGRAM_MESSAGE_LIMIT:
-        await message.answer(plain_text)
-    else:
-        preview = plain_text[:TELEGRAM_MESSAGE_LIMIT]
-        await message.answer(
-            preview + "\n\n[Transkrip dipotong. Versi lengkap tersedia di lampiran.]"
-        )
+    options = target.delivery
+    base_name = _derive_base_name(target.source_name)
+    files = _transcript_files(base_name, result, plain_text)
+    chunks = split_message(plain_text, TELEGRAM_MESSAGE_LIMIT)
 
-    await _send_transcript_files(message, result, plain_text)
+    if options.mode == SEPARATE:
+        await _send_text_preview(target, chunks)
+        await _send_transcript_files(target, files)
+        return
 
+    # Short enough to ride along with the attachments: one API call.
+    caption = plain_text if len(plain_text) <= CAPTION_LIMIT else None
+    if (
+        options.mode == ARCHIVE
+        or sum(len(content) for content in files.values()) > options.archive_threshold
+    ):
+        if caption is None:
+            await _send_text_preview(target, chunks)
+        archive = await stage_executors.cpu.run(build_archive, files)
+        await target.answer_document(
+            document=BufferedInputFile(archive, filename=f"{base_name}.zip"),
+            caption=caption or "Transkrip lengkap dalam arsip zip.",
+        )
+        return
 
-async def _send_transcript_files(
-    message: Message,
-    result: TranscriptionResult,
-    plain_text: str,
-) -> None:
-    base_name = _derive_base_name(message)
+    if caption is None and len(chunks) <= options.max_text_messages:
+        for chunk in chunks:
+            await target.answer(chunk)
+    elif caption is None:
+        await _send_text_preview(target, chunks)
 
-    txt_buffer = io.BytesIO(plain_text.encode("utf-8"))
-    txt_file = BufferedInputFile(
-        txt_buffer.getvalue(),
-        filename=f"{base_name}.txt",
-    )
-    await message.answer_document(
-        document=txt_file,
-        caption="Transkrip teks tanpa timestamp.",
+    documents = [
+        BufferedInputFile(content, filename=name) for name, content in files.items()
+    ]
+    if len(documents) == 1:
+        await target.answer_document(document=documents[0], caption=caption)
+        return
+    await target.answer_media_group(
+        [
+            InputMediaDocument(
+                media=document, caption=caption if index == len(documents) - 1 else None
+            )
+            for index, document in enumerate(documents)
+        ]
     )
 
+
+async def _send_text_preview(target: ReplyTarget, chunks: list[str]) -> None:
+    if len(chunks) == 1:
+        await target.answer(chunks[0])
+    else:
+        await target.answer(
+            chunks[0] + "\n\n[Transkrip dipotong. Versi lengkap tersedia di lampiran.]"
+        )
+
+
+def _transcript_files(
+    base_name: str, result: TranscriptionResult, plain_text: str
+) -> dict[str, bytes]:
+    """``.txt`` and, when segments allow it, ``.srt`` contents by file name."""
+    files = {f"{base_name}.txt": plain_text.encode("utf-8")}
     if result.segments:
         try:
             srt_content = result.to_srt()
@@ -607,31 +1667,25 @@ async def _send_transcript_files(
             logger.info(
                 "SRT output tidak tersedia karena segment informasi tidak lengkap."
             )
-            return
-
+            srt_content = ""
         if srt_content:
-            srt_buffer = io.BytesIO(srt_content.encode("utf-8"))
-            srt_file = BufferedInputFile(
-                srt_buffer.getvalue(),
-                filename=f"{base_name}.srt",
-            )
-            await message.answer_document(
-                document=srt_file,
-                caption="Transkrip format SRT.",
-            )
-
+            files[f"{base_name}.srt"] = srt_content.encode("utf-8")
+    return files
+
+
+async def _send_transcript_files(target: ReplyTarget, files: dict[str, bytes]) -> None:
+    captions = {
+        ".txt": "Transkrip teks tanpa timestamp.",
+        ".srt": "Transkrip format SRT.",
+    }
+    for name, content in files.items():
+        await target.answer_document(
+            document=BufferedInputFile(content, filename=name),
+            caption=captions.get(Path(name).suffix),
+        )
 
-def _derive_base_name(message: Message) -> str:
-    candidate = "transcript"
-    if message.document and message.document.file_name:
-        candidate = message.document.file_name
-    elif message.audio and message.audio.file_name:
-        candidate = message.audio.file_name
-    elif message.video and message.video.file_name:
-        candidate = message.video.file_name
-    elif message.caption:
-        candidate = message.caption
 
+def _derive_base_name(candidate: str) -> str:
     sanitized = _sanitize_filename(Path(candidate).stem)
     timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
     return f"{sanitized}_{timestamp}"
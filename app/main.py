@@ -2,12 +2,19 @@ from __future__ import annotations
 
 import asyncio
 import logging
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Optional
 
 from aiogram import Bot, Dispatcher
 from rich.logging import RichHandler
 
 from .config import Settings, load_settings
 from .handlers import build_router
+from .handlers.media import (
+    PROCESSOR_DEPENDENCIES,
+    drain_processing,
+    resume_journaled_jobs,
+)
 from .middlewares import DependencyMiddleware
 from .services import (
     DeepgramModelPreferences,
@@ -17,28 +24,134 @@ from .services import (
     TranscriberRegistry,
     ProviderPreferences,
 )
+from .services.admission import AdmissionController
 from .services.audio_optimizer import AudioOptimizer, TranscriptCache
+from .services.autoscaler import ResizableLimiter, WorkerAutoscaler
+from .services.broker import build_broker
+from .services.deepgram_callback import DeepgramCallbackServer
+from .services.delivery import DeliveryPreferences
+from .services.executors import StageExecutors
+from .services.hedging import ProviderHedger
+from .services.job_journal import JobJournal
+from .services.local_whisper_service import LocalWhisperTranscriber
+from .services.memory_profiler import MemoryProfiler
+from .services.metrics import MetricsServer, PipelineMetrics
+from .services.outbound import OutboundSender
+from .services.provider_gateway import ProviderGateway
 from .services.queue_service import TaskQueue
+from .services.rate_limiter import ProviderRateLimiter
+from .services.routing import AUTO_PROVIDER, ProviderRouter
+from .services.segmented_transcode import SegmentedTranscoder
+from .services.storage import DEFAULT_DOWNLOAD_DIR, StorageManager
+from .services.tracing import TaskTracer
+from .services.vad import VoiceActivityDetector
+from .services.voice_batcher import VoiceNoteBatcher
+from .webhook import run_webhook
 
 LOG_FORMAT = "%(message)s"
 
+logger = logging.getLogger(__name__)
 
-async def run_bot() -> None:
+
+def configure_logging() -> None:
     logging.basicConfig(
         level=logging.INFO,
         format=LOG_FORMAT,
         datefmt="%H:%M:%S",
         handlers=[RichHandler(rich_tracebacks=True, markup=True)],
     )
+
+
+async def run_bot() -> None:
+    configure_logging()
     settings = load_settings()
+    if settings.app_mode == "worker":
+        from .worker import run_worker
+
+        await run_worker(settings)
+        return
 
     bot = Bot(settings.telegram_bot_token)
     dispatcher = Dispatcher()
     dispatcher.include_router(build_router())
 
-    registry = _build_registry(settings)
-    preferences = ProviderPreferences(default=registry.default_provider)
+    dependencies = await build_dependencies(
+        settings,
+        serve_callbacks=not settings.webhook_url,
+        serve_metrics=not settings.webhook_url,
+    )
+    deepgram_callbacks = dependencies["deepgram_callbacks"]
+    pipeline_metrics = dependencies["pipeline_metrics"]
+    dependency_middleware = DependencyMiddleware(**dependencies)
+    dispatcher.message.middleware.register(dependency_middleware)
+    dispatcher.callback_query.middleware.register(dependency_middleware)
+
+    try:
+        if dependencies["job_journal"]:
+            resumed = await resume_journaled_jobs(
+                bot,
+                dependencies["task_queue"],
+                dependencies["job_journal"],
+                {name: dependencies[name] for name in PROCESSOR_DEPENDENCIES},
+                dependencies["worker_limiter"],
+                dependencies["outbound_sender"],
+                dependencies["delivery_preferences"],
+            )
+            if resumed:
+                logger.info("♻️ %d job dari sesi sebelumnya dilanjutkan", resumed)
+        logger.info(
+            "🚀 Bot started with optimizations enabled! (mode: %s)", settings.app_mode
+        )
+        logger.info(
+            "📊 Features: Caching=%s, Queue=%d workers, Streaming=%s",
+            settings.cache_enabled,
+            settings.queue_max_workers,
+            settings.audio_use_streaming,
+        )
+        if settings.webhook_url:
+            extra_routes = [deepgram_callbacks.register] if deepgram_callbacks else []
+            if pipeline_metrics:
+                extra_routes.append(
+                    lambda app: pipeline_metrics.register(app, settings.metrics_path)
+                )
+            await run_webhook(bot, dispatcher, settings, extra_routes=extra_routes)
+        else:
+            await dispatcher.start_polling(bot)
+    finally:
+        await drain_processing(settings.shutdown_grace_seconds)
+        await close_dependencies(dependencies)
+
+
+async def build_dependencies(
+    settings: Settings,
+    *,
+    serve_callbacks: bool,
+    serve_metrics: bool = True,
+    queue_depth: Optional[Callable[[], Awaitable[int]]] = None,
+) -> dict[str, Any]:
+    """Construct the services shared by handlers and worker processes.
+
+    ``serve_callbacks`` and ``serve_metrics`` start the Deepgram callback and
+    ``/metrics`` listeners on their own ports; webhook mode mounts the routes
+    on the webhook server instead.
+    ``queue_depth`` feeds the autoscaler; it defaults to the task queue size.
+    """
+    rate_limiters = _build_rate_limiters(settings)
+    registry = _build_registry(settings, rate_limiters)
+    provider_router = ProviderRouter(registry)
+    preferences = ProviderPreferences(
+        default=(
+            AUTO_PROVIDER
+            if settings.transcription_provider == AUTO_PROVIDER
+            else registry.default_provider
+        )
+    )
     deepgram_models = DeepgramModelPreferences(settings.deepgram_default_model)
+    delivery_preferences = DeliveryPreferences(
+        settings.delivery_mode,
+        max_text_messages=settings.delivery_max_text_messages,
+        archive_threshold=settings.delivery_archive_threshold_kb * 1024,
+    )
     telethon_downloader = TelethonDownloadService(
         api_id=settings.telegram_api_id,
         api_hash=settings.telegram_api_hash,
@@ -46,8 +159,6 @@ async def run_bot() -> None:
     )
 
     # Initialize optimization components
-    logger = logging.getLogger(__name__)
-
     # Audio Optimizer
     audio_optimizer = AudioOptimizer(
         target_bitrate=settings.audio_target_bitrate,
@@ -62,6 +173,32 @@ async def run_bot() -> None:
         settings.audio_compression_threshold_mb,
     )
 
+    segmented_transcoder = None
+    if settings.audio_parallel_transcode:
+        segmented_transcoder = SegmentedTranscoder(
+            max_processes=settings.audio_parallel_max_processes,
+            min_duration=settings.audio_parallel_min_duration,
+            concurrent_jobs=settings.executor_cpu_workers,
+        )
+        logger.info(
+            "Parallel transcode enabled (processes: %d, min duration: %ds)",
+            segmented_transcoder.max_processes,
+            settings.audio_parallel_min_duration,
+        )
+
+    voice_activity_detector = None
+    if settings.audio_vad_enabled:
+        voice_activity_detector = VoiceActivityDetector(
+            sample_rate=settings.audio_target_sample_rate,
+            min_duration=settings.audio_vad_min_duration,
+            min_savings=settings.audio_vad_min_savings_percent / 100,
+        )
+        logger.info(
+            "VAD silence trimming enabled (min duration: %ds, min savings: %d%%)",
+            settings.audio_vad_min_duration,
+            settings.audio_vad_min_savings_percent,
+        )
+
     # Transcript Cache
     transcript_cache = None
     if settings.cache_enabled:
@@ -76,9 +213,114 @@ async def run_bot() -> None:
             settings.cache_max_size,
         )
 
-    # Task Queue
+    # Stage executors: CPU (ffmpeg), disk (hashing) and network (provider calls)
+    stage_executors = StageExecutors(
+        cpu_workers=settings.executor_cpu_workers,
+        disk_workers=settings.executor_disk_workers,
+        network_workers=settings.executor_network_workers,
+    )
+    logger.info(
+        "Stage executors ready (cpu: %d, disk: %d, network: %d)",
+        stage_executors.cpu.max_workers,
+        stage_executors.disk.max_workers,
+        stage_executors.network.max_workers,
+    )
+
+    pipeline_metrics = None
+    if settings.metrics_enabled:
+        pipeline_metrics = PipelineMetrics(
+            cache_max_size=settings.cache_max_size if transcript_cache else None
+        )
+
+    outbound_sender = OutboundSender(
+        global_per_second=settings.telegram_global_rate_per_second,
+        chat_per_second=settings.telegram_chat_rate_per_second,
+        group_per_minute=settings.telegram_group_rate_per_minute,
+        max_retries=settings.telegram_flood_max_retries,
+        metrics=pipeline_metrics,
+    )
+
+    provider_gateway = ProviderGateway(
+        registry,
+        stage_executors,
+        rate_limiters=rate_limiters,
+        max_rate_limit_retries=settings.rate_limit_max_retries,
+        metrics=pipeline_metrics,
+    )
+    for limiter in rate_limiters.values():
+        logger.info(
+            "Rate limit %s: %s req/menit, %s audio-detik/jam",
+            limiter.name,
+            int(limiter.requests.capacity) if limiter.requests else "∞",
+            int(limiter.audio_seconds.capacity) if limiter.audio_seconds else "∞",
+        )
+
+    voice_batcher = None
+    if settings.voice_batch_enabled:
+        voice_batcher = VoiceNoteBatcher(
+            stage_executors,
+            provider_gateway,
+            window_seconds=settings.voice_batch_window_seconds,
+            max_clip_duration=settings.voice_batch_max_clip_seconds,
+            max_batch_clips=settings.voice_batch_max_clips,
+            sample_rate=settings.audio_target_sample_rate,
+            bitrate=settings.audio_target_bitrate,
+        )
+        logger.info(
+            "Voice note batching enabled (window: %.1fs, clips <= %ds, max %d per batch)",
+            settings.voice_batch_window_seconds,
+            settings.voice_batch_max_clip_seconds,
+            settings.voice_batch_max_clips,
+        )
+
+    provider_hedger = None
+    if settings.hedging_enabled and len(list(registry.providers())) > 1:
+        provider_hedger = ProviderHedger(
+            provider_gateway,
+            percentile=settings.hedging_percentile / 100,
+            default_delay=settings.hedging_default_delay,
+            max_duration=settings.hedging_max_duration,
+        )
+        logger.info(
+            "Provider hedging enabled (media <= %ds, p%d latency)",
+            settings.hedging_max_duration,
+            settings.hedging_percentile,
+        )
+
+    # Workers share one public callback URL but only one of them could bind
+    # the port and receive the result, so callback mode stays in-process.
+    deepgram_callbacks = None
+    if (
+        settings.deepgram_callback_url
+        and settings.app_mode == "all"
+        and "deepgram" in registry.providers()
+    ):
+        deepgram_callbacks = DeepgramCallbackServer(
+            settings.deepgram_callback_url,
+            path=settings.deepgram_callback_path,
+            host=settings.deepgram_callback_host,
+            port=settings.deepgram_callback_port,
+            secret=settings.deepgram_callback_secret,
+            timeout=settings.deepgram_callback_timeout,
+            min_duration=settings.deepgram_callback_min_duration,
+        )
+        if serve_callbacks:
+            await deepgram_callbacks.start()
+        logger.info(
+            "Deepgram callback mode enabled (media >= %ds, timeout %ds)",
+            settings.deepgram_callback_min_duration,
+            settings.deepgram_callback_timeout,
+        )
+
+    # Task Queue: with autoscaling its pool is only the ceiling, the
+    # limiter decides how many tasks actually run.
+    ceiling = (
+        max(settings.queue_autoscale_ceiling, settings.queue_max_workers)
+        if settings.queue_autoscale_enabled
+        else settings.queue_max_workers
+    )
     task_queue = TaskQueue(
-        max_workers=settings.queue_max_workers,
+        max_workers=ceiling,
         max_retries=settings.queue_max_retries,
         retry_delay=settings.queue_retry_delay,
         rate_limit_per_user=settings.queue_rate_limit_per_user,
@@ -90,49 +332,304 @@ async def run_bot() -> None:
         settings.queue_rate_limit_per_user,
     )
 
-    dependency_middleware = DependencyMiddleware(
-        transcriber_registry=registry,
-        provider_preferences=preferences,
-        telethon_downloader=telethon_downloader,
-        deepgram_model_preferences=deepgram_models,
-        audio_optimizer=audio_optimizer,
-        transcript_cache=transcript_cache,
-        task_queue=task_queue,
-        compression_threshold_mb=settings.audio_compression_threshold_mb,
-    )
-    dispatcher.message.middleware.register(dependency_middleware)
-    dispatcher.callback_query.middleware.register(dependency_middleware)
+    job_journal = None
+    if settings.job_journal_enabled and settings.app_mode != "frontend":
+        job_journal = JobJournal(
+            settings.job_journal_path,
+            retention_days=settings.job_journal_retention_days,
+            stale_after=settings.broker_visibility_timeout,
+        )
+        await job_journal.start()
+        logger.info("Job journal enabled (%s)", job_journal.path)
 
-    # Check webhook mode
-    if settings.webhook_url:
-        logger.info("Webhook mode detected but not yet fully implemented")
-        logger.info("Falling back to polling mode")
-        logger.info("To use webhook, see app/webhook.py for implementation")
+    storage_manager = None
+    if settings.storage_budget_gb > 0 and settings.app_mode != "frontend":
+        gigabyte = 1024 * 1024 * 1024
+        storage_manager = StorageManager(
+            budget_bytes=int(settings.storage_budget_gb * gigabyte),
+            min_free_bytes=int(settings.storage_min_free_gb * gigabyte),
+            stale_after=settings.storage_stale_hours * 3600,
+            janitor_interval=settings.storage_janitor_interval,
+            wait_timeout=settings.storage_wait_timeout,
+            protected_paths=job_journal.referenced_paths if job_journal else None,
+        )
+        await storage_manager.start()
+        logger.info(
+            "Disk budget %.1f GB di %s (janitor: file > %.0f jam)",
+            settings.storage_budget_gb,
+            storage_manager.directory,
+            settings.storage_stale_hours,
+        )
 
-    try:
-        logger.info("🚀 Bot started with optimizations enabled!")
+    async def task_queue_depth() -> int:
+        return (await task_queue.get_stats())["queue_size"]
+
+    worker_limiter = ResizableLimiter(settings.queue_max_workers)
+    worker_autoscaler = None
+    if settings.queue_autoscale_enabled and settings.app_mode != "frontend":
+        worker_autoscaler = WorkerAutoscaler(
+            worker_limiter,
+            queue_depth=queue_depth or task_queue_depth,
+            stage_executors=stage_executors,
+            min_workers=settings.queue_min_workers,
+            max_workers=settings.queue_max_workers,
+            ceiling=ceiling,
+            interval=settings.queue_autoscale_interval,
+            max_load_per_cpu=settings.autoscale_max_load_per_cpu,
+            min_free_memory_ratio=settings.autoscale_min_free_memory_percent / 100,
+            min_free_disk_bytes=settings.autoscale_min_free_disk_mb * 1024 * 1024,
+            disk_path=DEFAULT_DOWNLOAD_DIR,
+        )
+        await worker_autoscaler.start()
         logger.info(
-            "📊 Features: Caching=%s, Queue=%d workers, Streaming=%s",
-            settings.cache_enabled,
-            settings.queue_max_workers,
-            settings.audio_use_streaming,
+            "Worker autoscaling enabled (%d-%d workers, ceiling %d, every %.0fs)",
+            worker_autoscaler.min_workers,
+            worker_autoscaler.max_workers,
+            ceiling,
+            settings.queue_autoscale_interval,
         )
-        await dispatcher.start_polling(bot)
-    finally:
-        logger.info("Shutting down...")
-        await task_queue.stop()
-        logger.info("Task queue stopped")
 
+    job_broker = None
+    if settings.app_mode == "frontend":
+        job_broker = build_broker(
+            settings.broker_url, visibility_timeout=settings.broker_visibility_timeout
+        )
+        logger.info("Front-end mode: jobs go to broker %s", settings.broker_url)
+
+    admission_controller = None
+    if settings.admission_enabled and settings.app_mode != "frontend":
+        admission_controller = AdmissionController(
+            defer_after=settings.admission_defer_after_seconds,
+            reject_after=settings.admission_reject_after_seconds,
+            max_deferred=settings.admission_max_deferred,
+        )
+        logger.info(
+            "Admission control enabled (defer > %ds, reject > %ds)",
+            settings.admission_defer_after_seconds,
+            settings.admission_reject_after_seconds,
+        )
+
+    task_tracer = None
+    if settings.tracing_enabled and settings.app_mode != "frontend":
+        task_tracer = TaskTracer(
+            capacity=settings.trace_capacity,
+            export_path=(
+                Path(settings.trace_export_path).expanduser()
+                if settings.trace_export_path
+                else None
+            ),
+            export_url=settings.trace_otlp_endpoint,
+            report_interval=settings.trace_slow_report_interval,
+            report_count=settings.trace_slow_report_count,
+        )
+        await task_tracer.start()
+        logger.info(
+            "Task tracing enabled (%d trace terakhir, ekspor: %s)",
+            settings.trace_capacity,
+            settings.trace_export_path or settings.trace_otlp_endpoint or "-",
+        )
+
+    memory_profiler = None
+    if settings.memory_profiling_enabled:
+        memory_profiler = MemoryProfiler(
+            tracemalloc_frames=settings.memory_tracemalloc_frames,
+            stage_snapshots=settings.memory_stage_snapshots,
+            sample_interval=settings.memory_sample_interval,
+            top_n=settings.memory_top_n,
+            transcript_cache=transcript_cache,
+            metrics=pipeline_metrics,
+        )
+        if task_tracer:
+            task_tracer.add_hook(memory_profiler)
+        else:
+            logger.warning(
+                "Memory profiling tanpa TRACING_ENABLED: hanya RSS dan cache"
+            )
+        if pipeline_metrics:
+            memory_profiler.register_metrics(pipeline_metrics)
+        await memory_profiler.start()
+        logger.info(
+            "Memory profiling enabled (tracemalloc: %s, snapshot per stage: %s)",
+            settings.memory_tracemalloc_frames or "off",
+            memory_profiler.stage_snapshots,
+        )
+
+    metrics_server = None
+    if pipeline_metrics:
+        _register_gauges(
+            pipeline_metrics,
+            queue_depth=queue_depth or task_queue_depth,
+            worker_limiter=worker_limiter,
+            admission_controller=admission_controller,
+            storage_manager=storage_manager,
+            job_broker=job_broker,
+        )
+        if serve_metrics:
+            metrics_server = MetricsServer(
+                pipeline_metrics,
+                host=settings.metrics_host,
+                port=settings.metrics_port,
+                path=settings.metrics_path,
+            )
+            await metrics_server.start()
+
+    return {
+        "transcriber_registry": registry,
+        "provider_preferences": preferences,
+        "telethon_downloader": telethon_downloader,
+        "deepgram_model_preferences": deepgram_models,
+        "delivery_preferences": delivery_preferences,
+        "audio_optimizer": audio_optimizer,
+        "transcript_cache": transcript_cache,
+        "task_queue": task_queue,
+        "stage_executors": stage_executors,
+        "provider_gateway": provider_gateway,
+        "compression_threshold_mb": settings.audio_compression_threshold_mb,
+        "progress_interval": settings.progress_update_interval,
+        "segmented_transcoder": segmented_transcoder,
+        "voice_activity_detector": voice_activity_detector,
+        "voice_batcher": voice_batcher,
+        "provider_hedger": provider_hedger,
+        "provider_router": provider_router,
+        "deepgram_callbacks": deepgram_callbacks,
+        "job_broker": job_broker,
+        "job_journal": job_journal,
+        "worker_limiter": worker_limiter,
+        "worker_autoscaler": worker_autoscaler,
+        "admin_user_ids": settings.admin_user_ids,
+        "admission_controller": admission_controller,
+        "storage_manager": storage_manager,
+        "pipeline_metrics": pipeline_metrics,
+        "metrics_server": metrics_server,
+        "task_tracer": task_tracer,
+        "memory_profiler": memory_profiler,
+        "outbound_sender": outbound_sender,
+    }
+
+
+async def close_dependencies(dependencies: dict[str, Any]) -> None:
+    logger.info("Shutting down...")
+    if dependencies["metrics_server"]:
+        await dependencies["metrics_server"].stop()
+    if dependencies["task_tracer"]:
+        await dependencies["task_tracer"].stop()
+    if dependencies["memory_profiler"]:
+        await dependencies["memory_profiler"].stop()
+    await dependencies["outbound_sender"].stop()
+    if dependencies["worker_autoscaler"]:
+        await dependencies["worker_autoscaler"].stop()
+    if dependencies["storage_manager"]:
+        await dependencies["storage_manager"].stop()
+    await dependencies["task_queue"].stop()
+    logger.info("Task queue stopped")
+    if dependencies["deepgram_callbacks"]:
+        await dependencies["deepgram_callbacks"].stop()
+    if dependencies["job_broker"]:
+        await dependencies["job_broker"].close()
+    if dependencies["job_journal"]:
+        await dependencies["job_journal"].stop()
+        dependencies["job_journal"].close()
+    registry = dependencies["transcriber_registry"]
+    for provider in registry.providers():
+        transcriber = registry.get(provider)
+        if hasattr(transcriber, "shutdown"):
+            transcriber.shutdown()
+    dependencies["stage_executors"].shutdown()
+
+
+def _register_gauges(
+    metrics: PipelineMetrics,
+    *,
+    queue_depth: Callable[[], Awaitable[int]],
+    worker_limiter: ResizableLimiter,
+    admission_controller: Optional[AdmissionController],
+    storage_manager: Optional[StorageManager],
+    job_broker: Any,
+) -> None:
+    metrics.gauge("transhades_queue_depth", "Tasks waiting for a worker.")
+    metrics.gauge("transhades_workers_limit", "Current worker concurrency limit.")
+    metrics.gauge("transhades_workers_active", "Tasks currently running.")
+    metrics.gauge("transhades_workers_waiting", "Tasks waiting for a worker slot.")
+    metrics.gauge("transhades_admission_deferred", "Tasks deferred by admission.")
+    metrics.gauge("transhades_storage_reserved_bytes", "Disk bytes reserved.")
+
+    async def collect() -> list[tuple[str, dict[str, str], float]]:
+        if job_broker:
+            depth = await job_broker.size()
+        else:
+            depth = await queue_depth()
+        samples = [
+            ("transhades_queue_depth", {}, depth),
+            ("transhades_workers_limit", {}, worker_limiter.limit),
+            ("transhades_workers_active", {}, worker_limiter.active),
+            ("transhades_workers_waiting", {}, worker_limiter.waiting),
+        ]
+        if admission_controller:
+            samples.append(
+                ("transhades_admission_deferred", {}, admission_controller.deferred)
+            )
+        if storage_manager:
+            samples.append(
+                (
+                    "transhades_storage_reserved_bytes",
+                    {},
+                    storage_manager.reserved_bytes,
+                )
+            )
+        return samples
+
+    metrics.add_collector(collect)
+
+
+def _build_rate_limiters(settings: Settings) -> dict[str, ProviderRateLimiter]:
+    limits = {
+        "groq": (
+            settings.groq_rate_limit_rpm,
+            settings.groq_rate_limit_audio_seconds_per_hour,
+        ),
+        "deepgram": (
+            settings.deepgram_rate_limit_rpm,
+            settings.deepgram_rate_limit_audio_seconds_per_hour,
+        ),
+    }
+    return {
+        name: ProviderRateLimiter(
+            name, requests_per_minute=rpm, audio_seconds_per_hour=audio_seconds
+        )
+        for name, (rpm, audio_seconds) in limits.items()
+        if rpm > 0 or audio_seconds > 0
+    }
+
+
+def _build_registry(
+    settings: Settings, rate_limiters: dict[str, ProviderRateLimiter]
+) -> TranscriberRegistry:
+    def hook(name: str):
+        limiter = rate_limiters.get(name)
+        return limiter.on_response if limiter else None
 
-def _build_registry(settings: Settings) -> TranscriberRegistry:
     transcribers: dict[str, object] = {}
     if settings.groq_api_key:
-        transcribers["groq"] = GroqTranscriber(settings.groq_api_key)
+        transcribers["groq"] = GroqTranscriber(
+            settings.groq_api_key,
+            response_hook=hook("groq"),
+            base_url=settings.groq_base_url,
+        )
     if settings.deepgram_api_key:
         transcribers["deepgram"] = DeepgramTranscriber(
             settings.deepgram_api_key,
             model=settings.deepgram_default_model,
             detect_language=settings.deepgram_detect_language,
+            response_hook=hook("deepgram"),
+            base_url=settings.deepgram_base_url,
+        )
+    if settings.local_whisper_enabled:
+        transcribers["local"] = LocalWhisperTranscriber(
+            model=settings.local_whisper_model,
+            processes=settings.local_whisper_processes,
+            compute_type=settings.local_whisper_compute_type,
+            language=settings.local_whisper_language,
+            max_duration=settings.local_whisper_max_duration,
         )
 
     if not transcribers:
@@ -145,7 +642,15 @@ def _build_registry(settings: Settings) -> TranscriberRegistry:
         if settings.transcription_provider in transcribers
         else next(iter(transcribers))
     )
-    return TranscriberRegistry(default, transcribers)
+    return TranscriberRegistry(
+        default,
+        transcribers,
+        health_options={
+            "failure_rate": settings.circuit_failure_rate_percent / 100,
+            "consecutive_failures": settings.circuit_consecutive_failures,
+            "open_seconds": settings.circuit_open_seconds,
+        },
+    )
 
 
 def main() -> None:
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import logging
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+ACCEPT = "accept"
+DEFER = "defer"
+REJECT = "reject"
+
+DOWNLOAD = "download"
+PREPARE = "prepare"
+TRANSCRIBE = "transcribe"
+
+# Starting guesses until real tasks have been observed: download bytes per
+# second, and wall seconds per audio second for the other stages.
+DEFAULT_RATES = {DOWNLOAD: 5 * 1024 * 1024, PREPARE: 0.02, TRANSCRIBE: 0.1}
+# Used to guess the duration of documents Telegram sends without one.
+ASSUMED_BYTES_PER_AUDIO_SECOND = 16_000  # ~128 kbps
+
+
+@dataclass(frozen=True)
+class Admission:
+    action: str
+    eta_seconds: float
+    cost_seconds: float
+
+
+@dataclass
+class _Ticket:
+    cost: float
+    started_at: Optional[float] = None
+
+
+class AdmissionController:
+    """Estimate completion times and shed load beyond a backlog budget.
+
+    Per-stage throughput is learned from finished tasks (EWMA). A new task's
+    ETA is when the first of the current workers frees up, given the
+    remaining work of everything admitted or deferred before it, plus its own
+    cost. Past ``defer_after`` it waits outside the queue until the ETA fits
+    again; past ``reject_after`` (or with too many deferred tasks) it is
+    refused. Deferred tasks are admitted first come, first served, and while
+    any are waiting new arrivals are deferred behind them. A deferred task is
+    admitted anyway once it has waited ``reject_after`` seconds.
+    """
+
+    def __init__(
+        self,
+        *,
+        defer_after: float = 1800.0,
+        reject_after: float = 7200.0,
+        max_deferred: int = 20,
+        smoothing: float = 0.2,
+        poll_interval: float = 15.0,
+    ) -> None:
+        self.defer_after = defer_after
+        self.reject_after = max(reject_after, defer_after)
+        self.max_deferred = max_deferred
+        self.smoothing = smoothing
+        self.poll_interval = poll_interval
+        self._rates: Dict[str, float] = dict(DEFAULT_RATES)
+        self._tickets: Dict[str, _Ticket] = {}
+        # Deferred job id → estimated cost, in arrival order.
+        self._waiting: Dict[str, float] = {}
+        self.rejected = 0
+
+    @property
+    def admitted(self) -> int:
+        return len(self._tickets)
+
+    @property
+    def deferred(self) -> int:
+        return len(self._waiting)
+
+    def observe(self, stage: str, amount: float, seconds: float) -> None:
+        """Fold one finished stage into the throughput estimate.
+
+        ``amount`` is bytes for :data:`DOWNLOAD` and audio seconds otherwise.
+        """
+        if amount <= 0 or seconds <= 0:
+            return
+        sample = amount / seconds if stage == DOWNLOAD else seconds / amount
+        current = self._rates.get(stage, sample)
+        self._rates[stage] = current + self.smoothing * (sample - current)
+
+    def estimate_cost(
+        self, file_size: Optional[int], duration: Optional[float]
+    ) -> float:
+        """Expected wall seconds for one task on an idle worker."""
+        size = file_size or 0
+        if duration is None:
+            duration = size / ASSUMED_BYTES_PER_AUDIO_SECOND
+        download = size / self._rates[DOWNLOAD] if size else 0.0
+        return download + duration * (self._rates[PREPARE] + self._rates[TRANSCRIBE])
+
+    def stage_seconds(
+        self, stage: str, audio_seconds: Optional[float]
+    ) -> Optional[float]:
+        """Expected wall seconds of a non-download stage for this much audio."""
+        if not audio_seconds or stage == DOWNLOAD:
+            return None
+        return audio_seconds * self._rates[stage]
+
+    def wait_seconds(self, workers: int, *, deferred: Optional[int] = None) -> float:
+        """When the earliest of ``workers`` frees up, replaying the backlog in
+        admission order onto whichever worker is free first.
+
+        Deferred tasks queue after the admitted ones; ``deferred`` counts only
+        the first N of them (those ahead of a waiting task).
+        """
+        waiting = list(self._waiting.values())
+        if deferred is not None:
+            waiting = waiting[:deferred]
+        loads = [0.0] * max(1, workers)
+        for remaining in self._remaining() + waiting:
+            heapq.heapreplace(loads, loads[0] + remaining)
+        return loads[0]
+
+    def assess(
+        self, file_size: Optional[int], duration: Optional[float], workers: int
+    ) -> Admission:
+        cost = self.estimate_cost(file_size, duration)
+        wait = self.wait_seconds(workers)
+        eta = wait + cost
+        if not self._waiting and (
+            eta <= self.defer_after or (wait == 0 and cost <= self.reject_after)
+        ):
+            # An idle system takes even a long file rather than parking it.
+            action = ACCEPT
+        elif eta <= self.reject_after and len(self._waiting) < self.max_deferred:
+            action = DEFER
+        else:
+            action = REJECT
+        return Admission(action, eta, cost)
+
+    def admit(
+        self, job_id: str, file_size: Optional[int], duration: Optional[float]
+    ) -> None:
+        self._tickets[job_id] = _Ticket(self.estimate_cost(file_size, duration))
+
+    def start(self, job_id: str) -> None:
+        ticket = self._tickets.get(job_id)
+        if ticket:
+            ticket.started_at = time.monotonic()
+
+    def finish(self, job_id: str) -> None:
+        self._tickets.pop(job_id, None)
+
+    def reject(self) -> None:
+        self.rejected += 1
+
+    def _remaining(self) -> list[float]:
+        now = time.monotonic()
+        return [
+            max(
+                ticket.cost - (now - ticket.started_at if ticket.started_at else 0.0),
+                0.0,
+            )
+            for ticket in self._tickets.values()
+        ]
+
+    async def wait_for_capacity(
+        self,
+        job_id: str,
+        file_size: Optional[int],
+        duration: Optional[float],
+        workers: Callable[[], int],
+    ) -> Admission:
+        """Block a deferred task until it is first in line and its ETA fits.
+
+        Gives up waiting after ``reject_after`` seconds so a task whose ETA
+        keeps slipping is still served.
+        """
+        cost = self.estimate_cost(file_size, duration)
+        self._waiting[job_id] = cost
+        deadline = time.monotonic() + self.reject_after
+        try:
+            while True:
+                await asyncio.sleep(self.poll_interval)
+                if next(iter(self._waiting)) != job_id:
+                    continue
+                wait = self.wait_seconds(workers(), deferred=0)
+                eta = wait + cost
+                if eta <= self.defer_after or wait == 0 or time.monotonic() >= deadline:
+                    return Admission(ACCEPT, eta, cost)
+        finally:
+            self._waiting.pop(job_id, None)
+
+
+def format_eta(seconds: float) -> str:
+    if seconds < 90:
+        return "< 2 menit"
+    minutes = round(seconds / 60)
+    if minutes < 90:
+        return f"~{minutes} menit"
+    return f"~{minutes / 60:.1f} jam"
@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import shutil
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+from .executors import StageExecutors
+
+logger = logging.getLogger(__name__)
+
+
+class ResizableLimiter:
+    """Concurrency limit that can be raised or lowered while tasks run.
+
+    Lowering the limit never interrupts running tasks; new ones simply wait
+    until enough slots have been released. Only use from the event loop.
+    """
+
+    def __init__(self, limit: int) -> None:
+        self._limit = max(1, limit)
+        self._active = 0
+        self._waiters: list[asyncio.Future] = []
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> None:
+        while self._active >= self._limit:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                # Pass on a wake-up this task will no longer use.
+                self._waiters.remove(waiter)
+                self._wake()
+                raise
+            self._waiters.remove(waiter)
+        self._active += 1
+
+    def release(self) -> None:
+        self._active -= 1
+        self._wake()
+
+    def resize(self, limit: int) -> None:
+        self._limit = max(1, limit)
+        self._wake()
+
+    @asynccontextmanager
+    async def slot(self):
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def _wake(self) -> None:
+        free = self._limit - self._active
+        for waiter in self._waiters:
+            if free <= 0:
+                break
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+
+@dataclass(frozen=True)
+class ResourceSnapshot:
+    load_per_cpu: Optional[float]
+    free_memory_ratio: Optional[float]
+    free_disk_bytes: Optional[int]
+
+
+def read_resources(disk_path: Path) -> ResourceSnapshot:
+    """Best-effort host readings; ``None`` where the platform has no data."""
+    try:
+        load_per_cpu = os.getloadavg()[0] / (os.cpu_count() or 1)
+    except (AttributeError, OSError):
+        load_per_cpu = None
+
+    free_memory_ratio = None
+    try:
+        meminfo = {}
+        with open("/proc/meminfo", encoding="ascii") as file_obj:
+            for line in file_obj:
+                key, _, value = line.partition(":")
+                meminfo[key] = int(value.split()[0])
+        free_memory_ratio = meminfo["MemAvailable"] / meminfo["MemTotal"]
+    except (OSError, KeyError, ValueError, ZeroDivisionError):
+        pass
+
+    try:
+        free_disk_bytes = shutil.disk_usage(disk_path).free
+    except OSError:
+        free_disk_bytes = None
+
+    return ResourceSnapshot(load_per_cpu, free_memory_ratio, free_disk_bytes)
+
+
+class WorkerAutoscaler:
+    """Move a :class:`ResizableLimiter` between ``min``/``max`` on demand.
+
+    Every ``interval`` seconds: shrink by one when the host is short on CPU,
+    memory or disk; grow towards the backlog when there is headroom and no
+    stage pool is saturated (more tasks would only queue there); shrink by
+    one after a few idle ticks.
+    """
+
+    def __init__(
+        self,
+        limiter: ResizableLimiter,
+        *,
+        queue_depth: Callable[[], Awaitable[int]],
+        stage_executors: StageExecutors,
+        min_workers: int,
+        max_workers: int,
+        ceiling: int,
+        interval: float = 10.0,
+        max_load_per_cpu: float = 1.5,
+        min_free_memory_ratio: float = 0.15,
+        min_free_disk_bytes: int = 2 * 1024 * 1024 * 1024,
+        disk_path: Optional[Path] = None,
+        idle_ticks_before_shrink: int = 3,
+    ) -> None:
+        self.limiter = limiter
+        self.queue_depth = queue_depth
+        self.stage_executors = stage_executors
+        self.ceiling = max(1, ceiling)
+        self.min_workers = 1
+        self.max_workers = 1
+        self.set_bounds(min_workers, max_workers)
+        self.interval = interval
+        self.max_load_per_cpu = max_load_per_cpu
+        self.min_free_memory_ratio = min_free_memory_ratio
+        self.min_free_disk_bytes = min_free_disk_bytes
+        self.disk_path = disk_path or Path.home()
+        self.idle_ticks_before_shrink = idle_ticks_before_shrink
+        self.last_reason = "belum dievaluasi"
+        self.last_resources: Optional[ResourceSnapshot] = None
+        self._idle_ticks = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def set_bounds(self, min_workers: int, max_workers: int) -> None:
+        """Clamp to ``1 <= min <= max <= ceiling``; applied on the next tick."""
+        self.max_workers = max(1, min(max_workers, self.ceiling))
+        self.min_workers = max(1, min(min_workers, self.max_workers))
+
+    async def start(self) -> None:
+        self.limiter.resize(
+            min(max(self.limiter.limit, self.min_workers), self.max_workers)
+        )
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def evaluate(self) -> int:
+        """Run one scaling decision and return the new limit."""
+        backlog = await self.queue_depth() + self.limiter.waiting
+        resources = await asyncio.to_thread(read_resources, self.disk_path)
+        self.last_resources = resources
+        current = self.limiter.limit
+        target, reason = self._decide(current, backlog, resources)
+        target = min(max(target, self.min_workers), self.max_workers)
+        if target != current:
+            logger.info(
+                "⚖️ Worker %d → %d (%s; antrian %d)", current, target, reason, backlog
+            )
+            self.limiter.resize(target)
+        self.last_reason = reason
+        return target
+
+    def _decide(
+        self, current: int, backlog: int, resources: ResourceSnapshot
+    ) -> tuple[int, str]:
+        if (
+            resources.free_memory_ratio is not None
+            and resources.free_memory_ratio < self.min_free_memory_ratio
+        ):
+            return current - 1, f"memori bebas {resources.free_memory_ratio:.0%}"
+        if (
+            resources.free_disk_bytes is not None
+            and resources.free_disk_bytes < self.min_free_disk_bytes
+        ):
+            free_mb = resources.free_disk_bytes // (1024 * 1024)
+            return current - 1, f"disk bebas {free_mb}MB"
+        if (
+            resources.load_per_cpu is not None
+            and resources.load_per_cpu > self.max_load_per_cpu
+        ):
+            return current - 1, f"load/CPU {resources.load_per_cpu:.2f}"
+
+        if backlog > 0:
+            self._idle_ticks = 0
+            for name, stats in self.stage_executors.stats().items():
+                # Threads still finishing abandoned calls (hedging losers)
+                # are capacity this stage does not have.
+                if stats["queued"] >= stats["max_workers"] - stats["abandoned"]:
+                    # More tasks would only queue behind this stage.
+                    return current, f"stage {name} jenuh"
+            return current + max(1, backlog // 2), "antrian menumpuk"
+
+        if self.limiter.active < current:
+            self._idle_ticks += 1
+            if self._idle_ticks >= self.idle_ticks_before_shrink:
+                self._idle_ticks = 0
+                return current - 1, "menganggur"
+        return current, "stabil"
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.evaluate()
+            except Exception:  # noqa: BLE001
+                logger.exception("Autoscaler gagal mengevaluasi")
@@ -0,0 +1,322 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Optional, Protocol
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_VISIBILITY_TIMEOUT = 3600.0
+
+# Pop, move to processing, record the claim and read the payload as one step
+# so a worker dying in between cannot strand a job without a claim.
+_REDIS_CLAIM = """
+local job_id = redis.call('LPOP', KEYS[1])
+if not job_id then return false end
+local payload = redis.call('HGET', KEYS[4], job_id)
+if not payload then return false end
+redis.call('RPUSH', KEYS[2], job_id)
+redis.call('HSET', KEYS[3], job_id, ARGV[1])
+return payload
+"""
+
+# Requeue only if the claim is still stale, so a heartbeat racing the sweep wins.
+_REDIS_REQUEUE = """
+local claimed = redis.call('HGET', KEYS[3], ARGV[1])
+if claimed and tonumber(claimed) >= tonumber(ARGV[2]) then return 0 end
+redis.call('HDEL', KEYS[3], ARGV[1])
+if redis.call('LREM', KEYS[2], 1, ARGV[1]) > 0 then
+  redis.call('LPUSH', KEYS[1], ARGV[1])
+  return 1
+end
+return 0
+"""
+
+_REDIS_TOUCH = """
+if redis.call('HEXISTS', KEYS[1], ARGV[1]) == 0 then return 0 end
+redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+return 1
+"""
+
+
+@dataclass
+class Job:
+    """A transcription request handed from the front-end to a worker."""
+
+    chat_id: int
+    message_id: int
+    provider: str
+    display_name: str
+    suffix: str
+    model: Optional[str] = None
+    file_unique_id: Optional[str] = None
+    file_size: Optional[int] = None
+    duration: Optional[int] = None
+    source_name: str = "transcript"
+    delivery: Optional[str] = None
+    job_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    attempts: int = 0
+    created_at: float = field(default_factory=time.time)
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self))
+
+    @classmethod
+    def from_json(cls, raw: str) -> "Job":
+        return cls(**json.loads(raw))
+
+
+class JobBroker(Protocol):
+    async def put(self, job: Job) -> None: ...
+
+    async def get(self, timeout: float) -> Optional[Job]: ...
+
+    async def ack(self, job: Job) -> None: ...
+
+    async def nack(self, job: Job) -> None: ...
+
+    async def touch(self, job: Job) -> None: ...
+
+    async def size(self) -> int: ...
+
+    async def close(self) -> None: ...
+
+
+def worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class SQLiteBroker:
+    """Single-host broker: a WAL-mode SQLite table shared by all processes.
+
+    Claims run inside ``BEGIN IMMEDIATE`` so two workers never take the same
+    job; claims older than ``visibility_timeout`` (crashed worker) are handed
+    out again. Running jobs keep their claim fresh with ``touch``.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        visibility_timeout: float = DEFAULT_VISIBILITY_TIMEOUT,
+        poll_interval: float = 0.5,
+    ) -> None:
+        self.path = Path(path).expanduser()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.visibility_timeout = visibility_timeout
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.path), check_same_thread=False, isolation_level=None, timeout=30
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " seq INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " job_id TEXT UNIQUE NOT NULL,"
+            " payload TEXT NOT NULL,"
+            " claimed_by TEXT,"
+            " claimed_at REAL)"
+        )
+
+    async def put(self, job: Job) -> None:
+        await asyncio.to_thread(self._execute, self._put, job)
+
+    async def get(self, timeout: float) -> Optional[Job]:
+        deadline = time.monotonic() + timeout
+        while True:
+            job = await asyncio.to_thread(self._execute, self._claim)
+            if job or time.monotonic() >= deadline:
+                return job
+            await asyncio.sleep(self.poll_interval)
+
+    async def ack(self, job: Job) -> None:
+        await asyncio.to_thread(
+            self._execute,
+            lambda conn: conn.execute(
+                "DELETE FROM jobs WHERE job_id = ?", (job.job_id,)
+            ),
+        )
+
+    async def nack(self, job: Job) -> None:
+        job.attempts += 1
+        await asyncio.to_thread(
+            self._execute,
+            lambda conn: conn.execute(
+                "UPDATE jobs SET payload = ?, claimed_by = NULL, claimed_at = NULL"
+                " WHERE job_id = ?",
+                (job.to_json(), job.job_id),
+            ),
+        )
+
+    async def touch(self, job: Job) -> None:
+        await asyncio.to_thread(
+            self._execute,
+            lambda conn: conn.execute(
+                "UPDATE jobs SET claimed_at = ? WHERE job_id = ? AND claimed_by = ?",
+                (time.time(), job.job_id, worker_id()),
+            ),
+        )
+
+    async def size(self) -> int:
+        row = await asyncio.to_thread(
+            self._execute,
+            lambda conn: conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE claimed_at IS NULL"
+            ).fetchone(),
+        )
+        return int(row[0])
+
+    async def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _execute(self, func, *args):
+        with self._lock:
+            return func(self._conn, *args)
+
+    @staticmethod
+    def _put(conn: sqlite3.Connection, job: Job) -> None:
+        conn.execute(
+            "INSERT INTO jobs (job_id, payload) VALUES (?, ?)",
+            (job.job_id, job.to_json()),
+        )
+
+    def _claim(self, conn: sqlite3.Connection) -> Optional[Job]:
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT seq, payload FROM jobs"
+                " WHERE claimed_at IS NULL OR claimed_at < ?"
+                " ORDER BY seq LIMIT 1",
+                (now - self.visibility_timeout,),
+            ).fetchone()
+            if row:
+                conn.execute(
+                    "UPDATE jobs SET claimed_by = ?, claimed_at = ? WHERE seq = ?",
+                    (worker_id(), now, row[0]),
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return Job.from_json(row[1]) if row else None
+
+
+class RedisBroker:
+    """Multi-host broker on Redis lists (requires the ``redis`` package).
+
+    Claims are Lua scripts, hence atomic, and polled every ``poll_interval``
+    because a blocking pop cannot run inside a script.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        *,
+        prefix: str = "transhades",
+        visibility_timeout: float = DEFAULT_VISIBILITY_TIMEOUT,
+        poll_interval: float = 0.5,
+    ) -> None:
+        try:
+            from redis import asyncio as redis_asyncio
+        except ImportError as exc:
+            raise RuntimeError(
+                "BROKER_URL redis:// membutuhkan paket redis (pip install redis)."
+            ) from exc
+
+        self._redis = redis_asyncio.from_url(url, decode_responses=True)
+        self.visibility_timeout = visibility_timeout
+        self.poll_interval = poll_interval
+        self._claim = self._redis.register_script(_REDIS_CLAIM)
+        self._requeue = self._redis.register_script(_REDIS_REQUEUE)
+        self._touch = self._redis.register_script(_REDIS_TOUCH)
+        self._queue = f"{prefix}:queue"
+        self._processing = f"{prefix}:processing"
+        self._payloads = f"{prefix}:jobs"
+        self._claims = f"{prefix}:claims"
+        self._last_sweep = 0.0
+
+    async def put(self, job: Job) -> None:
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.hset(self._payloads, job.job_id, job.to_json())
+            pipe.rpush(self._queue, job.job_id)
+            await pipe.execute()
+
+    async def get(self, timeout: float) -> Optional[Job]:
+        await self._requeue_stale()
+        deadline = time.monotonic() + timeout
+        while True:
+            raw = await self._claim(
+                keys=[self._queue, self._processing, self._claims, self._payloads],
+                args=[time.time()],
+            )
+            if raw or time.monotonic() >= deadline:
+                return Job.from_json(raw) if raw else None
+            await asyncio.sleep(self.poll_interval)
+
+    async def ack(self, job: Job) -> None:
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.lrem(self._processing, 1, job.job_id)
+            pipe.hdel(self._claims, job.job_id)
+            pipe.hdel(self._payloads, job.job_id)
+            await pipe.execute()
+
+    async def nack(self, job: Job) -> None:
+        job.attempts += 1
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.hset(self._payloads, job.job_id, job.to_json())
+            pipe.lrem(self._processing, 1, job.job_id)
+            pipe.hdel(self._claims, job.job_id)
+            pipe.lpush(self._queue, job.job_id)
+            await pipe.execute()
+
+    async def touch(self, job: Job) -> None:
+        await self._touch(keys=[self._claims], args=[job.job_id, time.time()])
+
+    async def size(self) -> int:
+        return int(await self._redis.llen(self._queue))
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+    async def _requeue_stale(self) -> None:
+        now = time.time()
+        if now - self._last_sweep < 60:
+            return
+        self._last_sweep = now
+        cutoff = now - self.visibility_timeout
+        claims = await self._redis.hgetall(self._claims)
+        for job_id, claimed_at in claims.items():
+            if float(claimed_at) >= cutoff:
+                continue
+            if await self._requeue(
+                keys=[self._queue, self._processing, self._claims],
+                args=[job_id, cutoff],
+            ):
+                logger.warning(
+                    "Job %s melewati visibility timeout; diantrikan ulang", job_id[:8]
+                )
+
+
+def build_broker(
+    url: str, *, visibility_timeout: float = DEFAULT_VISIBILITY_TIMEOUT
+) -> JobBroker:
+    """``sqlite:///path/to/jobs.db`` or ``redis://host:port/db``."""
+    if url.startswith(("redis://", "rediss://")):
+        return RedisBroker(url, visibility_timeout=visibility_timeout)
+    if url.startswith("sqlite:///"):
+        return SQLiteBroker(
+            Path(url[len("sqlite:///") :]), visibility_timeout=visibility_timeout
+        )
+    raise ValueError(f"BROKER_URL tidak dikenali: {url}")
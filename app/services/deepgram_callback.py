@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import asyncio
+import hmac
+import logging
+import secrets
+import time
+from typing import Dict, Optional, Tuple
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CALLBACK_PATH = "/deepgram/callback"
+
+
+class DeepgramCallbackServer:
+    """Receive Deepgram callback results over HTTP and hand them to waiting tasks."""
+
+    def __init__(
+        self,
+        public_url: str,
+        *,
+        path: str = DEFAULT_CALLBACK_PATH,
+        host: str = "0.0.0.0",
+        port: int = 8081,
+        secret: Optional[str] = None,
+        timeout: float = 1800.0,
+        min_duration: float = 600.0,
+    ) -> None:
+        self.public_url = public_url.rstrip("/")
+        self.path = path if path.startswith("/") else f"/{path}"
+        self.host = host
+        self.port = port
+        self.secret = secret or secrets.token_urlsafe(24)
+        self.timeout = timeout
+        self.min_duration = min_duration
+        self._pending: Dict[str, asyncio.Future] = {}
+        # Callbacks that beat ``expect`` (fast results on short uploads).
+        self._early: Dict[str, Tuple[float, dict]] = {}
+        self._runner: Optional[web.AppRunner] = None
+        self.received = 0
+
+    @property
+    def callback_url(self) -> str:
+        return f"{self.public_url}{self.path}?token={self.secret}"
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def accepts(self, duration: Optional[float]) -> bool:
+        return duration is not None and duration >= self.min_duration
+
+    def register(self, app: web.Application) -> None:
+        """Mount the callback route on an existing aiohttp application."""
+        app.router.add_post(self.path, self._handle)
+
+    async def start(self) -> None:
+        app = web.Application()
+        self.register(app)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        logger.info(
+            "Deepgram callback server listening on %s:%d%s",
+            self.host,
+            self.port,
+            self.path,
+        )
+
+    async def stop(self) -> None:
+        for future in self._pending.values():
+            if not future.done():
+                future.cancel()
+        self._pending.clear()
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def expect(self, request_id: str) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        early = self._early.pop(request_id, None)
+        if early:
+            future.set_result(early[1])
+        else:
+            self._pending[request_id] = future
+        return future
+
+    async def wait(self, request_id: str) -> dict:
+        """Wait for the callback; raises ``asyncio.TimeoutError`` after ``timeout``."""
+        future = self.expect(request_id)
+        try:
+            return await asyncio.wait_for(future, timeout=self.timeout)
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        token = request.query.get("token", "")
+        if not hmac.compare_digest(token, self.secret):
+            logger.warning("Callback Deepgram ditolak: token tidak valid")
+            return web.Response(status=403, text="forbidden")
+        try:
+            payload = await request.json()
+        except ValueError:
+            return web.Response(status=400, text="invalid json")
+
+        request_id = payload.get("request_id") or payload.get("metadata", {}).get(
+            "request_id"
+        )
+        if not request_id:
+            return web.Response(status=400, text="missing request_id")
+
+        self.received += 1
+        future = self._pending.pop(request_id, None)
+        if future and not future.done():
+            future.set_result(payload)
+        else:
+            self._prune_early()
+            self._early[request_id] = (time.monotonic(), payload)
+        logger.info("📨 Callback Deepgram diterima untuk request %s", request_id[:8])
+        return web.Response(text="ok")
+
+    def _prune_early(self) -> None:
+        cutoff = time.monotonic() - self.timeout
+        for request_id, (received_at, _) in list(self._early.items()):
+            if received_at < cutoff:
+                del self._early[request_id]
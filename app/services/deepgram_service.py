@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import logging
 from pathlib import Path
-from typing import List, Optional
+from typing import Callable, List, Optional
 
 import requests
 
@@ -29,6 +29,8 @@ class DeepgramTranscriber:
         smart_format: bool = True,
         detect_language: bool = True,
         timeout: int = 300,
+        response_hook: Optional[Callable[[requests.Response], None]] = None,
+        base_url: str = DEEPGRAM_URL,
     ) -> None:
         self.api_key = api_key
         self.model = model
@@ -36,9 +38,53 @@ class DeepgramTranscriber:
         self.smart_format = smart_format
         self.detect_language = detect_language
         self.timeout = timeout
+        self.response_hook = response_hook
+        self.base_url = base_url
 
     def transcribe(self, file_path: Path) -> TranscriptionResult:
         logger.info("Submitting %s to Deepgram model %s", file_path.name, self.model)
+        payload = self._post(file_path, self._build_params())
+        return self.parse_callback(payload)
+
+    def submit_async(self, file_path: Path, callback_url: str) -> str:
+        """Upload ``file_path`` in callback mode and return Deepgram's request id.
+
+        Deepgram answers immediately and POSTs the full result to
+        ``callback_url`` once inference is done.
+        """
+        logger.info(
+            "Submitting %s to Deepgram model %s (callback mode)", file_path.name, self.model
+        )
+        params = self._build_params()
+        params["callback"] = callback_url
+        payload = self._post(file_path, params)
+        request_id = payload.get("request_id") or payload.get("metadata", {}).get("request_id")
+        if not request_id:
+            raise ValueError("Deepgram API response missing request_id for callback.")
+        return request_id
+
+    def parse_callback(self, payload: dict) -> TranscriptionResult:
+        if payload.get("err_msg"):
+            raise ValueError(f"Deepgram error: {payload['err_msg']}")
+        text, segments = self._parse_response(payload)
+        if not text:
+            raise ValueError("Deepgram API response missing transcription text.")
+        return TranscriptionResult(text=text, segments=segments)
+
+    def with_model(self, model: str) -> "DeepgramTranscriber":
+        selected = model if model in self.available_models else self.model
+        return DeepgramTranscriber(
+            api_key=self.api_key,
+            model=selected,
+            language=self.language,
+            smart_format=self.smart_format,
+            detect_language=self.detect_language,
+            timeout=self.timeout,
+            response_hook=self.response_hook,
+            base_url=self.base_url,
+        )
+
+    def _build_params(self) -> dict:
         params = {
             "model": self.model,
             "language": self.language,
@@ -50,10 +96,12 @@ class DeepgramTranscriber:
             params["detect_language"] = "true"
         elif self.language:
             params["language"] = self.language
+        return params
 
+    def _post(self, file_path: Path, params: dict) -> dict:
         with file_path.open("rb") as audio_fp:
             response = requests.post(
-                DEEPGRAM_URL,
+                self.base_url,
                 headers={
                     "Authorization": f"Token {self.api_key}",
                     "Content-Type": "application/octet-stream",
@@ -63,23 +111,10 @@ class DeepgramTranscriber:
                 timeout=self.timeout,
             )
 
+        if self.response_hook:
+            self.response_hook(response)
         response.raise_for_status()
-        payload = response.json()
-        text, segments = self._parse_response(payload)
-        if not text:
-            raise ValueError("Deepgram API response missing transcription text.")
-        return TranscriptionResult(text=text, segments=segments)
-
-    def with_model(self, model: str) -> "DeepgramTranscriber":
-        selected = model if model in self.available_models else self.model
-        return DeepgramTranscriber(
-            api_key=self.api_key,
-            model=selected,
-            language=self.language,
-            smart_format=self.smart_format,
-            detect_language=self.detect_language,
-            timeout=self.timeout,
-        )
+        return response.json()
 
     def _parse_response(self, payload: dict) -> tuple[str, Optional[List[dict]]]:
         results = payload.get("results", {})
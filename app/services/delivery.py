@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import io
+import re
+import zipfile
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+GROUP = "group"
+ARCHIVE = "zip"
+SEPARATE = "separate"
+DELIVERY_MODES = {
+    GROUP: "Teks + .txt/.srt dalam satu album",
+    ARCHIVE: "Teks ringkas + satu arsip .zip",
+    SEPARATE: "Teks + tiap lampiran dikirim terpisah",
+}
+
+# Telegram caption limit; shorter transcripts ride along as the album caption.
+CAPTION_LIMIT = 1024
+
+# Sentence end (optionally followed by closing quotes/brackets) before a space.
+_SENTENCE_END = re.compile(r"[.!?…][\"'”’)\]]*\s+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@dataclass(frozen=True)
+class DeliveryOptions:
+    """How one task's transcript is sent back."""
+
+    mode: str = GROUP
+    # Long text is split over at most this many messages before falling back
+    # to a preview plus attachments.
+    max_text_messages: int = 2
+    # Attachments larger than this (bytes) are zipped into one document.
+    archive_threshold: int = 1024 * 1024
+
+
+class DeliveryPreferences:
+    """Store per-chat delivery modes; limits are shared by all chats."""
+
+    def __init__(
+        self,
+        default_mode: str = GROUP,
+        *,
+        max_text_messages: int = 2,
+        archive_threshold: int = 1024 * 1024,
+    ) -> None:
+        self.default_mode = default_mode if default_mode in DELIVERY_MODES else GROUP
+        self.max_text_messages = max(1, max_text_messages)
+        self.archive_threshold = archive_threshold
+        self._modes: Dict[int, str] = {}
+
+    def set(self, chat_id: int, mode: str) -> None:
+        self._modes[chat_id] = mode
+
+    def get(self, chat_id: int) -> str:
+        return self._modes.get(chat_id, self.default_mode)
+
+    def clear(self, chat_id: int) -> None:
+        self._modes.pop(chat_id, None)
+
+    def options(self, mode: Optional[str] = None) -> DeliveryOptions:
+        return DeliveryOptions(
+            mode=mode if mode in DELIVERY_MODES else self.default_mode,
+            max_text_messages=self.max_text_messages,
+            archive_threshold=self.archive_threshold,
+        )
+
+    def for_chat(self, chat_id: int) -> DeliveryOptions:
+        return self.options(self.get(chat_id))
+
+
+def split_message(text: str, limit: int) -> List[str]:
+    """Split ``text`` into as few chunks of at most ``limit`` chars as possible.
+
+    Each chunk ends at the last sentence boundary that fits, else at the last
+    whitespace, else mid-word.
+    """
+    chunks = []
+    text = text.strip()
+    while len(text) > limit:
+        window = text[: limit + 1]
+        cut = _last_match_end(_SENTENCE_END, window) or _last_match_end(
+            _WHITESPACE, window
+        )
+        if not cut:
+            cut = limit
+        chunks.append(text[:cut].rstrip())
+        text = text[cut:].lstrip()
+    if text:
+        chunks.append(text)
+    return chunks
+
+
+def build_archive(files: Dict[str, bytes]) -> bytes:
+    """Deflate ``files`` (name → content) into one zip archive."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, content in files.items():
+            archive.writestr(name, content)
+    return buffer.getvalue()
+
+
+def _last_match_end(pattern: re.Pattern, window: str) -> int:
+    end = 0
+    for match in pattern.finditer(window):
+        end = match.end()
+    return end
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class StageExecutor:
+    """Separately sized thread pool for one pipeline stage, with depth counters.
+
+    A call whose awaiting task is cancelled is skipped if it has not started
+    yet; if it is already running, its thread stays busy until the blocking
+    call returns and is counted as ``abandoned`` meanwhile.
+    """
+
+    def __init__(self, name: str, max_workers: int) -> None:
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self._pool = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix=f"stage-{name}",
+        )
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+        self._completed = 0
+        self._failed = 0
+        self._abandoned = 0
+        self._wait_seconds = 0.0
+        self._busy_seconds = 0.0
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        loop = asyncio.get_running_loop()
+        submitted_at = time.monotonic()
+        state = "queued"
+        with self._lock:
+            self._queued += 1
+
+        def call() -> T:
+            nonlocal state
+            started_at = time.monotonic()
+            with self._lock:
+                if state == "dropped":
+                    return None
+                state = "running"
+                self._queued -= 1
+                self._active += 1
+                self._wait_seconds += started_at - submitted_at
+            failed = False
+            try:
+                return func(*args, **kwargs)
+            except BaseException:
+                failed = True
+                raise
+            finally:
+                with self._lock:
+                    if state == "abandoned":
+                        self._abandoned -= 1
+                    state = "done"
+                    self._active -= 1
+                    self._busy_seconds += time.monotonic() - started_at
+                    if failed:
+                        self._failed += 1
+                    else:
+                        self._completed += 1
+
+        try:
+            return await loop.run_in_executor(self._pool, functools.partial(call))
+        except asyncio.CancelledError:
+            with self._lock:
+                if state == "queued":
+                    state = "dropped"
+                    self._queued -= 1
+                elif state == "running":
+                    state = "abandoned"
+                    self._abandoned += 1
+            raise
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            finished = self._completed + self._failed
+            return {
+                "max_workers": self.max_workers,
+                "queued": self._queued,
+                "active": self._active,
+                "abandoned": self._abandoned,
+                "completed": self._completed,
+                "failed": self._failed,
+                "avg_wait_seconds": self._wait_seconds / finished if finished else 0.0,
+                "avg_run_seconds": self._busy_seconds / finished if finished else 0.0,
+            }
+
+    def shutdown(self, wait: bool = False) -> None:
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+
+class StageExecutors:
+    """Named executors so slow uploads cannot starve ffmpeg or hashing."""
+
+    def __init__(
+        self,
+        *,
+        cpu_workers: int | None = None,
+        disk_workers: int = 4,
+        network_workers: int = 10,
+    ) -> None:
+        self.cpu = StageExecutor("cpu", cpu_workers or os.cpu_count() or 1)
+        self.disk = StageExecutor("disk", disk_workers)
+        self.network = StageExecutor("network", network_workers)
+
+    def __iter__(self):
+        return iter((self.cpu, self.disk, self.network))
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return {executor.name: executor.stats() for executor in self}
+
+    def shutdown(self, wait: bool = False) -> None:
+        for executor in self:
+            executor.shutdown(wait=wait)
+        logger.info("Stage executors stopped")
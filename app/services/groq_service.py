@@ -4,7 +4,7 @@ import logging
 from dataclasses import dataclass
 from datetime import timedelta
 from pathlib import Path
-from typing import Iterable, List, Optional
+from typing import Callable, Iterable, List, Optional
 
 import requests
 
@@ -70,16 +70,20 @@ class GroqTranscriber:
         *,
         model: str = "whisper-large-v3",
         timeout: int = 300,
+        response_hook: Optional[Callable[[requests.Response], None]] = None,
+        base_url: str = GROQ_URL,
     ) -> None:
         self.api_key = api_key
         self.model = model
         self.timeout = timeout
+        self.response_hook = response_hook
+        self.base_url = base_url
 
     def transcribe(self, file_path: Path) -> TranscriptionResult:
         logger.info("Submitting %s to Groq Whisper model %s", file_path.name, self.model)
         with file_path.open("rb") as audio_fp:
             response = requests.post(
-                GROQ_URL,
+                self.base_url,
                 headers={"Authorization": f"Bearer {self.api_key}"},
                 data={
                     "model": self.model,
@@ -90,9 +94,14 @@ class GroqTranscriber:
                 timeout=self.timeout,
             )
 
+        if self.response_hook:
+            self.response_hook(response)
         response.raise_for_status()
-        payload = response.json()
+        return self.parse_payload(response.json())
 
+    @staticmethod
+    def parse_payload(payload: dict) -> TranscriptionResult:
+        """Normalize a ``verbose_json`` response into a :class:`TranscriptionResult`."""
         text = payload.get("text")
         segments = payload.get("segments")
 
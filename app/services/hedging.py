@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import deque
+from pathlib import Path
+from typing import Deque, Dict, Optional, Tuple
+
+from .groq_service import TranscriptionResult
+from .provider_gateway import ProviderGateway
+
+logger = logging.getLogger(__name__)
+
+NamedTranscriber = Tuple[str, object]
+
+
+class LatencyTracker:
+    """Rolling window of request latencies per provider.
+
+    Requests cancelled before answering (hedging losers) are kept as
+    censored samples: their elapsed time is only a lower bound. Dropping them
+    would keep just the requests fast enough to win and bias the tail low.
+    """
+
+    def __init__(self, window: int = 200, min_samples: int = 10) -> None:
+        self.window = window
+        self.min_samples = min_samples
+        self._samples: Dict[str, Deque[Tuple[float, bool]]] = {}
+
+    def record(self, provider: str, seconds: float, *, censored: bool = False) -> None:
+        samples = self._samples.setdefault(provider, deque(maxlen=self.window))
+        samples.append((seconds, censored))
+
+    def percentile(self, provider: str, quantile: float) -> Optional[float]:
+        """Kaplan-Meier quantile; censored samples stay at risk until they end."""
+        samples = self._samples.get(provider)
+        if not samples or len(samples) < self.min_samples:
+            return None
+        # Answers sort before censored samples of the same duration.
+        ordered = sorted(samples)
+        at_risk = len(ordered)
+        survival = 1.0
+        for seconds, censored in ordered:
+            if not censored:
+                survival *= 1 - 1 / at_risk
+                if 1 - survival >= quantile:
+                    return seconds
+            at_risk -= 1
+        # Too few answers to reach the quantile: the longest wait is a floor.
+        return ordered[-1][0]
+
+
+class ProviderHedger:
+    """Send short media to a second provider when the first is unusually slow."""
+
+    def __init__(
+        self,
+        provider_gateway: ProviderGateway,
+        *,
+        tracker: Optional[LatencyTracker] = None,
+        percentile: float = 0.95,
+        default_delay: float = 15.0,
+        min_delay: float = 1.0,
+        max_duration: float = 120.0,
+    ) -> None:
+        self.gateway = provider_gateway
+        self.tracker = tracker or LatencyTracker()
+        self.percentile = percentile
+        self.default_delay = default_delay
+        self.min_delay = min_delay
+        self.max_duration = max_duration
+        self.hedges_sent = 0
+        self.hedges_won = 0
+
+    def accepts(self, duration: Optional[float]) -> bool:
+        return duration is not None and 0 < duration <= self.max_duration
+
+    def hedge_delay(self, provider: str) -> float:
+        observed = self.tracker.percentile(provider, self.percentile)
+        if observed is None:
+            return self.default_delay
+        return max(self.min_delay, observed)
+
+    def record(self, provider: str, seconds: float, *, censored: bool = False) -> None:
+        self.tracker.record(provider, seconds, censored=censored)
+
+    async def transcribe(
+        self,
+        primary: NamedTranscriber,
+        secondary: NamedTranscriber,
+        file_path: Path,
+        audio_seconds: Optional[float] = None,
+    ) -> Tuple[str, TranscriptionResult]:
+        """Return ``(provider, result)`` from whichever provider succeeds first.
+
+        The losing request is cancelled from the caller's point of view; its
+        worker thread finishes the blocking HTTP call and the result is dropped.
+        Its elapsed time is still recorded, as a censored latency sample.
+        """
+        primary_name, _ = primary
+        delay = self.hedge_delay(primary_name)
+        primary_task = asyncio.ensure_future(
+            self._timed(primary, file_path, audio_seconds)
+        )
+        pending = {primary_task}
+        names = {primary_task: primary_name}
+
+        done, _ = await asyncio.wait(pending, timeout=delay)
+        if done and not primary_task.exception():
+            return primary_name, primary_task.result()
+
+        secondary_name, _ = secondary
+        logger.info(
+            "⏱️ %s belum menjawab dalam %.1fs (atau gagal); hedging ke %s",
+            primary_name,
+            delay,
+            secondary_name,
+        )
+        self.hedges_sent += 1
+        secondary_task = asyncio.ensure_future(
+            self._timed(secondary, file_path, audio_seconds)
+        )
+        names[secondary_task] = secondary_name
+        pending = {task for task in (primary_task, secondary_task) if not task.done()}
+
+        first_error: Optional[BaseException] = (
+            primary_task.exception() if primary_task.done() else None
+        )
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    error = task.exception()
+                    if error is None:
+                        if task is secondary_task:
+                            self.hedges_won += 1
+                        return names[task], task.result()
+                    first_error = first_error or error
+        finally:
+            for task in (primary_task, secondary_task):
+                if not task.done():
+                    task.cancel()
+
+        assert first_error is not None
+        raise first_error
+
+    async def _timed(
+        self,
+        named: NamedTranscriber,
+        file_path: Path,
+        audio_seconds: Optional[float],
+    ) -> TranscriptionResult:
+        name, transcriber = named
+        started = time.monotonic()
+        try:
+            result = await self.gateway.transcribe(
+                transcriber, file_path, audio_seconds
+            )
+        except asyncio.CancelledError:
+            self.record(name, time.monotonic() - started, censored=True)
+            raise
+        self.record(name, time.monotonic() - started)
+        return result
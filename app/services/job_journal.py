@@ -0,0 +1,292 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .broker import Job
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+DOWNLOADING = "downloading"
+TRANSCODING = "transcoding"
+TRANSCRIBING = "transcribing"
+DELIVERING = "delivering"
+DONE = "done"
+FAILED = "failed"
+STAGES = (QUEUED, DOWNLOADING, TRANSCODING, TRANSCRIBING, DELIVERING, DONE, FAILED)
+TERMINAL_STAGES = (DONE, FAILED)
+
+# (job_id, last stage, queued) per job; SQLite takes bare columns from the
+# MAX(seq) row.
+_LAST_STAGES = (
+    "SELECT job_id, stage, MAX(seq), MAX(at) AS last_at,"
+    " SUM(stage = 'queued') AS queued FROM events GROUP BY job_id"
+)
+
+
+@dataclass
+class JobState:
+    """Last durable stage of a job plus the data recorded along the way."""
+
+    job_id: str
+    stage: str
+    updated_at: float
+    job: Optional[Job] = None
+    data: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def finished(self) -> bool:
+        return self.stage in TERMINAL_STAGES
+
+    def reached(self, stage: str) -> bool:
+        return STAGES.index(self.stage) >= STAGES.index(stage)
+
+    def existing_path(self, key: str) -> Optional[Path]:
+        value = self.data.get(key)
+        if not value:
+            return None
+        path = Path(value)
+        return path if path.exists() and path.stat().st_size > 0 else None
+
+
+class JobJournal:
+    """Append-only SQLite (WAL) log of task stage transitions.
+
+    Every transition is a new row; a job's state is the fold of its rows, so
+    a crash mid-write can never corrupt an earlier stage. Once started, a
+    maintenance loop prunes old finished jobs every ``maintenance_interval``
+    seconds and marks unfinished jobs idle longer than ``stale_after`` as
+    failed, so their files stop being protected from the storage janitor.
+    Jobs running in this process are never expired.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        retention_days: float = 7.0,
+        stale_after: float = 0.0,
+        maintenance_interval: float = 3600.0,
+    ) -> None:
+        self.path = Path(path).expanduser()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.retention_seconds = retention_days * 86400
+        self.stale_after = stale_after
+        self.maintenance_interval = maintenance_interval
+        self.active: set[str] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.path), check_same_thread=False, isolation_level=None, timeout=30
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS events ("
+            " seq INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " job_id TEXT NOT NULL,"
+            " stage TEXT NOT NULL,"
+            " at REAL NOT NULL,"
+            " data TEXT NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS events_job ON events (job_id, seq)"
+        )
+
+    async def enqueue(self, job: Job, **data: Any) -> None:
+        await self.record(job.job_id, QUEUED, job=job.to_json(), **data)
+
+    async def record(self, job_id: str, stage: str, **data: Any) -> None:
+        payload = json.dumps(data, default=str)
+        await asyncio.to_thread(
+            self._execute,
+            "INSERT INTO events (job_id, stage, at, data) VALUES (?, ?, ?, ?)",
+            (job_id, stage, time.time(), payload),
+        )
+
+    async def state(self, job_id: str) -> Optional[JobState]:
+        rows = await asyncio.to_thread(
+            self._query,
+            "SELECT job_id, stage, at, data FROM events WHERE job_id = ? ORDER BY seq",
+            (job_id,),
+        )
+        return self._fold(rows)
+
+    async def unfinished(self, *, with_spec: bool = True) -> List[JobState]:
+        """Jobs whose last stage is not terminal.
+
+        ``with_spec`` keeps only jobs enqueued here (resumable); broker jobs
+        run by a worker have stage rows but no spec.
+        """
+        spec_filter = "queued > 0 AND " if with_spec else ""
+        rows = await asyncio.to_thread(
+            self._query,
+            "SELECT job_id, stage, at, data FROM events WHERE job_id IN ("
+            f"  SELECT job_id FROM ({_LAST_STAGES})"
+            f"  WHERE {spec_filter}stage NOT IN ('done', 'failed')"
+            ") ORDER BY job_id, seq",
+            (),
+        )
+        states: List[JobState] = []
+        current: List[tuple] = []
+        for row in rows:
+            if current and current[-1][0] != row[0]:
+                states.append(self._fold(current))
+                current = []
+            current.append(row)
+        if current:
+            states.append(self._fold(current))
+        return sorted(states, key=lambda state: state.updated_at)
+
+    async def referenced_paths(self) -> set[Path]:
+        """Files unfinished jobs still need to resume."""
+        keys = ("download_path", "trimmed_path", "prepared_path")
+        return {
+            Path(state.data[key])
+            for state in await self.unfinished(with_spec=False)
+            for key in keys
+            if state.data.get(key)
+        }
+
+    async def prune(self) -> int:
+        """Drop finished jobs older than the retention window."""
+        cutoff = time.time() - self.retention_seconds
+        cursor = await asyncio.to_thread(
+            self._execute,
+            "DELETE FROM events WHERE job_id IN ("
+            f"  SELECT job_id FROM ({_LAST_STAGES})"
+            "  WHERE last_at < ? AND stage IN ('done', 'failed'))",
+            (cutoff,),
+        )
+        return cursor.rowcount
+
+    async def expire(self) -> int:
+        """Fail unfinished jobs idle past ``stale_after``; returns how many."""
+        if self.stale_after <= 0:
+            return 0
+        cutoff = time.time() - self.stale_after
+        expired = 0
+        for state in await self.unfinished(with_spec=False):
+            if state.updated_at >= cutoff or state.job_id in self.active:
+                continue
+            await self.record(state.job_id, FAILED, error="expired")
+            expired += 1
+        return expired
+
+    async def maintain(self) -> None:
+        pruned = await self.prune()
+        expired = await self.expire()
+        if pruned or expired:
+            logger.info(
+                "🧹 Journal: %d entri lama dihapus, %d job kedaluwarsa",
+                pruned,
+                expired,
+            )
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def bind(self, job_id: str) -> "JobRecorder":
+        return JobRecorder(self, job_id)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.maintenance_interval)
+            try:
+                await self.maintain()
+            except sqlite3.Error:
+                logger.warning("Pemeliharaan journal gagal", exc_info=True)
+
+    def _execute(self, sql: str, params: tuple) -> sqlite3.Cursor:
+        with self._lock:
+            return self._conn.execute(sql, params)
+
+    def _query(self, sql: str, params: tuple) -> List[tuple]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    @staticmethod
+    def _fold(rows: List[tuple]) -> Optional[JobState]:
+        if not rows:
+            return None
+        state = JobState(job_id=rows[0][0], stage=rows[0][1], updated_at=rows[0][2])
+        for _, stage, at, raw in rows:
+            data = json.loads(raw)
+            spec = data.pop("job", None)
+            if spec:
+                state.job = Job.from_json(spec)
+            state.stage = stage
+            state.updated_at = at
+            state.data.update(data)
+        return state
+
+
+@dataclass(frozen=True)
+class JobRecorder:
+    """Journal handle for one job; a no-op when journaling is disabled.
+
+    Write failures are logged and swallowed: losing a checkpoint only costs
+    redoing a stage after a restart, never the transcription itself.
+    """
+
+    journal: Optional[JobJournal] = None
+    job_id: Optional[str] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.journal is not None and self.job_id is not None
+
+    async def state(self) -> Optional[JobState]:
+        if not self.enabled:
+            return None
+        try:
+            return await self.journal.state(self.job_id)
+        except sqlite3.Error:
+            logger.warning(
+                "Journal job %s tidak terbaca", self.job_id[:8], exc_info=True
+            )
+            return None
+
+    @asynccontextmanager
+    async def running(self):
+        """Shield this job from ``JobJournal.expire`` while it runs."""
+        if not self.enabled:
+            yield
+            return
+        self.journal.active.add(self.job_id)
+        try:
+            yield
+        finally:
+            self.journal.active.discard(self.job_id)
+
+    async def record(self, stage: str, **data: Any) -> None:
+        if not self.enabled:
+            return
+        try:
+            await self.journal.record(self.job_id, stage, **data)
+        except sqlite3.Error:
+            logger.warning(
+                "Gagal mencatat stage %s untuk job %s",
+                stage,
+                self.job_id[:8],
+                exc_info=True,
+            )
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import importlib.util
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from .groq_service import TranscriptionResult
+
+logger = logging.getLogger(__name__)
+
+# Loaded once per pool process by ``_init_worker``.
+_MODEL = None
+
+
+def _init_worker(model: str, compute_type: str, cpu_threads: int) -> None:
+    global _MODEL
+    from faster_whisper import WhisperModel
+
+    _MODEL = WhisperModel(
+        model, device="cpu", compute_type=compute_type, cpu_threads=cpu_threads
+    )
+
+
+def _transcribe_in_worker(
+    file_path: str, language: Optional[str], beam_size: int
+) -> Tuple[str, List[dict]]:
+    if _MODEL is None:
+        raise RuntimeError("Local Whisper model is not loaded in this worker.")
+    segments_iter, _ = _MODEL.transcribe(
+        file_path, language=language, beam_size=beam_size, vad_filter=False
+    )
+    segments = [
+        {"start": segment.start, "end": segment.end, "text": segment.text}
+        for segment in segments_iter
+    ]
+    text = " ".join(segment["text"].strip() for segment in segments).strip()
+    return text, segments
+
+
+class LocalWhisperTranscriber:
+    """In-process CPU Whisper (faster-whisper) for very short clips."""
+
+    provider_name = "local"
+    max_payload_bytes = 2 * 1024 * 1024 * 1024  # Read from disk; no upload limit.
+
+    def __init__(
+        self,
+        *,
+        model: str = "tiny",
+        processes: int = 1,
+        compute_type: str = "int8",
+        cpu_threads: Optional[int] = None,
+        language: Optional[str] = None,
+        beam_size: int = 1,
+        max_duration: float = 30.0,
+    ) -> None:
+        if importlib.util.find_spec("faster_whisper") is None:
+            raise RuntimeError(
+                "LOCAL_WHISPER_ENABLED membutuhkan paket faster-whisper "
+                "(pip install faster-whisper)."
+            )
+
+        self.model = model
+        self.language = language
+        self.beam_size = beam_size
+        self.max_duration = max_duration
+        self.processes = max(1, processes)
+        threads = cpu_threads or max(1, (os.cpu_count() or 1) // self.processes)
+        self._initargs = (model, compute_type, threads)
+        self._pool_lock = threading.Lock()
+        self._pool = self._new_pool()
+
+    def accepts(self, duration: Optional[float]) -> bool:
+        return duration is not None and 0 < duration <= self.max_duration
+
+    def transcribe(self, file_path: Path) -> TranscriptionResult:
+        logger.info(
+            "Transcribing %s locally with Whisper %s", file_path.name, self.model
+        )
+        pool = self._pool
+        try:
+            text, segments = pool.submit(
+                _transcribe_in_worker, str(file_path), self.language, self.beam_size
+            ).result()
+        except BrokenProcessPool:
+            # A worker died (OOM, segfault): later calls get a fresh pool.
+            self._replace_pool(pool)
+            raise
+        if not text:
+            raise ValueError("Local Whisper returned no transcription text.")
+        return TranscriptionResult(text=text, segments=segments)
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        # Spawn, not fork: the bot process runs threads and an event loop
+        # whose locks a forked child would inherit mid-state.
+        return ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=self._initargs,
+        )
+
+    def _replace_pool(self, broken: ProcessPoolExecutor) -> None:
+        with self._pool_lock:
+            if self._pool is not broken:
+                return
+            logger.warning("Local Whisper pool rusak; membuat pool baru")
+            self._pool = self._new_pool()
+        broken.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,318 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import resource
+import sys
+import time
+import tracemalloc
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from .metrics import PipelineMetrics
+from .tracing import Span, TaskTrace
+
+logger = logging.getLogger(__name__)
+
+MEGABYTE = 1024 * 1024
+MEMORY_BUCKETS = tuple(
+    size * MEGABYTE for size in (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2000)
+)
+# Deep-size walks of the transcript cache are cached this long.
+CACHE_SIZE_TTL = 60.0
+
+
+def read_rss() -> Optional[int]:
+    """Current resident set size of this process in bytes."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as file_obj:
+            return int(file_obj.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def read_peak_rss() -> int:
+    """Highest RSS this process has reached, in bytes."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def read_available_memory() -> Optional[int]:
+    try:
+        with open("/proc/meminfo", encoding="ascii") as file_obj:
+            for line in file_obj:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def deep_size(obj: Any, limit: int = 1_000_000) -> int:
+    """Approximate bytes held by ``obj`` and the containers/objects it holds."""
+    seen: set[int] = set()
+    stack = [obj]
+    total = 0
+    while stack and len(seen) < limit:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        total += sys.getsizeof(item, 0)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset, deque)):
+            stack.extend(item)
+        elif hasattr(item, "__dict__") and not isinstance(item, type):
+            stack.append(vars(item))
+        elif hasattr(item, "__slots__"):
+            stack.extend(
+                getattr(item, slot)
+                for slot in item.__slots__
+                if isinstance(slot, str) and hasattr(item, slot)
+            )
+    return total
+
+
+@dataclass
+class StageMemory:
+    """RSS / traced-heap growth seen across runs of one stage."""
+
+    count: int = 0
+    total_rss_delta: int = 0
+    max_rss_delta: int = 0
+    max_traced_delta: int = 0
+    top_sites: List[str] = field(default_factory=list)
+
+    @property
+    def mean_rss_delta(self) -> float:
+        return self.total_rss_delta / self.count if self.count else 0.0
+
+
+@dataclass
+class _Watch:
+    """RSS at the start of a task or stage and the highest sample since."""
+
+    start_rss: int
+    peak_rss: int
+    traced: int = 0
+    snapshot: Optional[tracemalloc.Snapshot] = None
+
+
+class MemoryProfiler:
+    """Opt-in memory accounting hooked onto the task tracer.
+
+    Each stage span records how far RSS peaked above its starting point (and,
+    with tracemalloc, how much the traced Python heap grew) while it ran; with ``stage_snapshots`` one stage at a
+    time is bracketed by tracemalloc snapshots and its top allocation sites
+    are kept. A sampler tracks the peak RSS of running tasks and stages, so
+    buffers freed before a stage ends still count. All readings
+    are process-wide, so concurrent tasks blur into each other: the numbers
+    are an upper bound per task, which is what sizing the worker pool needs.
+    """
+
+    def __init__(
+        self,
+        *,
+        tracemalloc_frames: int = 0,
+        stage_snapshots: bool = False,
+        sample_interval: float = 1.0,
+        top_n: int = 10,
+        history: int = 200,
+        transcript_cache: Any = None,
+        metrics: Optional[PipelineMetrics] = None,
+    ) -> None:
+        self.tracemalloc_frames = tracemalloc_frames
+        self.stage_snapshots = stage_snapshots and tracemalloc_frames > 0
+        self.sample_interval = sample_interval
+        self.top_n = top_n
+        self.transcript_cache = transcript_cache
+        self.stages: Dict[str, StageMemory] = {}
+        self.task_growth: Deque[Tuple[str, int]] = deque(maxlen=history)
+        self._open: Dict[str, _Watch] = {}
+        self._active: Dict[str, _Watch] = {}
+        self._snapshotting: Optional[str] = None
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+        self._cache_size: Tuple[float, Optional[int]] = (0.0, None)
+        self._task: Optional[asyncio.Task] = None
+        self.task_growth_histogram = (
+            metrics.histogram(
+                "transhades_task_memory_growth_bytes",
+                "Peak process RSS growth while a task ran.",
+                buckets=MEMORY_BUCKETS,
+            )
+            if metrics
+            else None
+        )
+
+    def traced_memory(self) -> Optional[Tuple[int, int]]:
+        """``(current, peak)`` traced heap bytes, or ``None`` without tracemalloc."""
+        return tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else None
+
+    async def start(self) -> None:
+        if self.tracemalloc_frames > 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(self.tracemalloc_frames)
+            self._baseline = tracemalloc.take_snapshot()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self.tracemalloc_frames > 0 and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    # SpanHook
+    def span_started(self, trace: TaskTrace, span_: Span) -> None:
+        rss = read_rss() or 0
+        if span_ is trace.root:
+            self._active[trace.key] = _Watch(rss, rss)
+            return
+        opened = _Watch(rss, rss, self._traced())
+        if self.stage_snapshots and self._snapshotting is None:
+            self._snapshotting = span_.span_id
+            opened.snapshot = tracemalloc.take_snapshot()
+        self._open[span_.span_id] = opened
+
+    def span_finished(self, trace: TaskTrace, span_: Span) -> None:
+        rss = read_rss() or 0
+        if span_ is trace.root:
+            task = self._active.pop(trace.key, None)
+            if task:
+                growth = max(task.peak_rss, rss) - task.start_rss
+                self.task_growth.append((trace.key, growth))
+                span_.attributes["memory.peak_rss_mb"] = round(
+                    max(task.peak_rss, rss) / MEGABYTE, 1
+                )
+                span_.attributes["memory.growth_mb"] = round(growth / MEGABYTE, 1)
+                if self.task_growth_histogram:
+                    self.task_growth_histogram.observe(max(growth, 0))
+            return
+        opened = self._open.pop(span_.span_id, None)
+        if opened is None:
+            return
+        rss_delta = max(opened.peak_rss, rss) - opened.start_rss
+        traced_delta = self._traced() - opened.traced
+        span_.attributes["memory.rss_delta_mb"] = round(rss_delta / MEGABYTE, 1)
+        stage = self.stages.setdefault(span_.name, StageMemory())
+        stage.count += 1
+        stage.total_rss_delta += rss_delta
+        stage.max_rss_delta = max(stage.max_rss_delta, rss_delta)
+        stage.max_traced_delta = max(stage.max_traced_delta, traced_delta)
+        if opened.snapshot is not None:
+            self._snapshotting = None
+            if traced_delta >= stage.max_traced_delta:
+                stage.top_sites = self._top_sites(
+                    tracemalloc.take_snapshot().compare_to(opened.snapshot, "lineno")
+                )
+
+    def top_allocations(self) -> List[str]:
+        """Allocation sites that grew most since profiling started."""
+        if not tracemalloc.is_tracing():
+            return []
+        snapshot = tracemalloc.take_snapshot()
+        if self._baseline is None:
+            return self._top_sites(snapshot.statistics("lineno"))
+        return self._top_sites(snapshot.compare_to(self._baseline, "lineno"))
+
+    async def cache_bytes(self) -> Optional[int]:
+        """Approximate memory held by the transcript cache (cached briefly)."""
+        if self.transcript_cache is None:
+            return None
+        measured_at, size = self._cache_size
+        if size is None or time.monotonic() - measured_at > CACHE_SIZE_TTL:
+            size = await asyncio.to_thread(deep_size, self.transcript_cache)
+            self._cache_size = (time.monotonic(), size)
+        return size
+
+    def growth_percentiles(self) -> Optional[Dict[str, int]]:
+        growth = sorted(max(value, 0) for _, value in self.task_growth)
+        if not growth:
+            return None
+
+        def pick(ratio: float) -> int:
+            return growth[min(len(growth) - 1, int(ratio * len(growth)))]
+
+        return {"p50": pick(0.5), "p95": pick(0.95), "max": growth[-1]}
+
+    def suggest_workers(self) -> Optional[int]:
+        """Concurrent tasks the free memory could hold at p95 growth each."""
+        percentiles = self.growth_percentiles()
+        available = read_available_memory()
+        if not percentiles or not available or percentiles["p95"] <= 0:
+            return None
+        # Keep a fifth of the available memory as headroom.
+        return max(1, int(available * 0.8 // percentiles["p95"]) + len(self._active))
+
+    async def collect(self) -> List[Tuple[str, Dict[str, str], float]]:
+        samples: List[Tuple[str, Dict[str, str], float]] = [
+            ("transhades_process_peak_rss_bytes", {}, read_peak_rss())
+        ]
+        rss = read_rss()
+        if rss is not None:
+            samples.append(("transhades_process_rss_bytes", {}, rss))
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            samples.append(("transhades_tracemalloc_current_bytes", {}, current))
+            samples.append(("transhades_tracemalloc_peak_bytes", {}, peak))
+        cache = await self.cache_bytes()
+        if cache is not None:
+            samples.append(("transhades_transcript_cache_bytes", {}, cache))
+        for name, stage in self.stages.items():
+            samples.append(
+                (
+                    "transhades_stage_max_rss_delta_bytes",
+                    {"stage": name},
+                    stage.max_rss_delta,
+                )
+            )
+        return samples
+
+    def register_metrics(self, metrics: PipelineMetrics) -> None:
+        metrics.gauge("transhades_process_rss_bytes", "Resident set size.")
+        metrics.gauge("transhades_process_peak_rss_bytes", "Highest RSS so far.")
+        metrics.gauge("transhades_tracemalloc_current_bytes", "Python heap traced now.")
+        metrics.gauge("transhades_tracemalloc_peak_bytes", "Peak traced heap.")
+        metrics.gauge(
+            "transhades_transcript_cache_bytes", "Approximate transcript cache size."
+        )
+        metrics.gauge(
+            "transhades_stage_max_rss_delta_bytes",
+            "Largest RSS growth seen during one run of a stage.",
+        )
+        metrics.add_collector(self.collect)
+
+    def _traced(self) -> int:
+        return tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+
+    def _top_sites(self, statistics: List[Any]) -> List[str]:
+        lines = []
+        for stat in statistics[: self.top_n]:
+            frame = stat.traceback[0]
+            size = getattr(stat, "size_diff", stat.size)
+            lines.append(
+                f"{size / MEGABYTE:+.1f}MB {_short_path(frame.filename)}:{frame.lineno}"
+            )
+        return lines
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.sample_interval)
+            rss = read_rss()
+            if rss is None:
+                continue
+            for watch in (*self._active.values(), *self._open.values()):
+                watch.peak_rss = max(watch.peak_rss, rss)
+
+
+def _short_path(filename: str) -> str:
+    for marker in ("/site-packages/", "/app/"):
+        index = filename.rfind(marker)
+        if index >= 0:
+            return filename[index + 1 :]
+    return filename
@@ -0,0 +1,352 @@
+from __future__ import annotations
+
+import bisect
+import errno
+import logging
+import math
+import threading
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_METRICS_PATH = "/metrics"
+
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+SIZE_BUCKETS = (
+    (1024 * 1024, "lt_1mb"),
+    (10 * 1024 * 1024, "1_10mb"),
+    (100 * 1024 * 1024, "10_100mb"),
+    (1024 * 1024 * 1024, "100mb_1gb"),
+)
+
+LabelValues = Tuple[str, ...]
+Collector = Callable[[], Awaitable[Iterable[Tuple[str, Dict[str, str], float]]]]
+
+
+def size_bucket(size: Optional[int]) -> str:
+    if size is None:
+        return "unknown"
+    for limit, name in SIZE_BUCKETS:
+        if size < limit:
+            return name
+    return "gt_1gb"
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(label, "")) for label in self.labels)
+
+    def _format_labels(self, values: LabelValues, extra: str = "") -> str:
+        pairs = [
+            f'{label}="{_escape(value)}"' for label, value in zip(self.labels, values)
+        ]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{self._format_labels(key)} {_number(value)}"
+            for key, value in items
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self, *args, buckets: Sequence[float] = LATENCY_BUCKETS, **kwargs
+    ) -> None:
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: bucket counts (non-cumulative, +Inf last), sum, count.
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, totals = self._series.setdefault(
+                key, ([0] * (len(self.buckets) + 1), [0.0, 0.0])
+            )
+            counts[index] += 1
+            totals[0] += value
+            totals[1] += 1
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            series = sorted(
+                (key, list(counts), list(totals))
+                for key, (counts, totals) in self._series.items()
+            )
+        lines = []
+        for key, counts, (total, count) in series:
+            cumulative = 0
+            for bound, bucket_count in zip(
+                (*self.buckets, math.inf), counts, strict=True
+            ):
+                cumulative += bucket_count
+                le = "+Inf" if bound == math.inf else _number(bound)
+                label_text = self._format_labels(key, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{label_text} {cumulative}")
+            lines.append(f"{self.name}_sum{self._format_labels(key)} {_number(total)}")
+            lines.append(
+                f"{self.name}_count{self._format_labels(key)} {_number(count)}"
+            )
+        return lines
+
+
+class PipelineMetrics:
+    """Process-wide metrics for the transcription pipeline.
+
+    Stage latencies and traffic counters are recorded as tasks run; queue and
+    worker gauges come from collectors evaluated at scrape time.
+    """
+
+    def __init__(self, *, cache_max_size: Optional[int] = None) -> None:
+        self.cache_max_size = cache_max_size
+        self.stage_seconds = Histogram(
+            "transhades_stage_duration_seconds",
+            "Latency per pipeline stage.",
+            ("stage", "provider", "model", "size_bucket"),
+        )
+        self.cache_requests = Counter(
+            "transhades_cache_requests_total",
+            "Transcript cache lookups by result.",
+            ("result",),
+        )
+        self.cache_evictions = Counter(
+            "transhades_cache_evictions_total",
+            "Transcript cache entries pushed out by new ones (inferred from max size).",
+        )
+        self.bytes_downloaded = Counter(
+            "transhades_downloaded_bytes_total", "Bytes downloaded from Telegram."
+        )
+        self.bytes_uploaded = Counter(
+            "transhades_uploaded_bytes_total",
+            "Bytes uploaded to transcription providers, retries included.",
+            ("provider",),
+        )
+        self.provider_errors = Counter(
+            "transhades_provider_errors_total",
+            "Failed provider calls by HTTP status or exception type.",
+            ("provider", "code"),
+        )
+        self.tasks = Counter(
+            "transhades_tasks_total", "Finished tasks by outcome.", ("outcome",)
+        )
+        self._metrics: List[_Metric] = [
+            self.stage_seconds,
+            self.cache_requests,
+            self.cache_evictions,
+            self.bytes_downloaded,
+            self.bytes_uploaded,
+            self.provider_errors,
+            self.tasks,
+        ]
+        self._gauges: Dict[str, str] = {}
+        self._collectors: List[Collector] = []
+        self._cache_stores = 0
+
+    def observe_stage(
+        self,
+        stage: str,
+        seconds: float,
+        *,
+        provider: str = "",
+        model: Optional[str] = "",
+        size: Optional[int] = None,
+    ) -> None:
+        self.stage_seconds.observe(
+            seconds,
+            stage=stage,
+            provider=provider,
+            model=model or "",
+            size_bucket=size_bucket(size),
+        )
+
+    def cache_lookup(self, hit: bool) -> None:
+        self.cache_requests.inc(result="hit" if hit else "miss")
+
+    def cache_store(self) -> None:
+        # Each store follows a miss, so once ``cache_max_size`` entries exist
+        # every further store evicts one.
+        self._cache_stores += 1
+        if self.cache_max_size and self._cache_stores > self.cache_max_size:
+            self.cache_evictions.inc()
+
+    def provider_error(self, provider: str, error: BaseException) -> None:
+        response = getattr(error, "response", None)
+        status = getattr(response, "status_code", None)
+        self.provider_errors.inc(
+            provider=provider, code=str(status) if status else type(error).__name__
+        )
+
+    def counter(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Counter:
+        """Create and register an extra counter."""
+        counter = Counter(name, help_text, labels)
+        self._metrics.append(counter)
+        return counter
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        """Create and register an extra histogram."""
+        histogram = Histogram(name, help_text, labels, buckets=buckets)
+        self._metrics.append(histogram)
+        return histogram
+
+    def gauge(self, name: str, help_text: str) -> None:
+        """Declare a gauge whose values a collector reports."""
+        self._gauges[name] = help_text
+
+    def add_collector(self, collector: Collector) -> None:
+        self._collectors.append(collector)
+
+    async def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        samples: Dict[str, List[str]] = {name: [] for name in self._gauges}
+        for collector in self._collectors:
+            try:
+                for name, labels, value in await collector():
+                    label_text = ",".join(
+                        f'{key}="{_escape(str(val))}"' for key, val in labels.items()
+                    )
+                    samples.setdefault(name, []).append(
+                        f"{name}{{{label_text}}} {_number(value)}"
+                        if label_text
+                        else f"{name} {_number(value)}"
+                    )
+            except Exception:  # noqa: BLE001
+                logger.warning("Collector metrics gagal", exc_info=True)
+        for name, series in samples.items():
+            lines.append(f"# HELP {name} {self._gauges.get(name, name)}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.extend(series)
+        return "\n".join(lines) + "\n"
+
+    def register(self, app: web.Application, path: str = DEFAULT_METRICS_PATH) -> None:
+        """Mount ``GET path`` on an existing aiohttp application."""
+
+        async def handle(_: web.Request) -> web.Response:
+            return web.Response(
+                body=(await self.render()).encode("utf-8"),
+                headers={"Content-Type": CONTENT_TYPE},
+            )
+
+        app.router.add_get(path, handle)
+
+
+class MetricsServer:
+    """Standalone ``/metrics`` listener for polling and worker processes.
+
+    Several processes on one host share the configured port: a process that
+    finds it taken tries the next ``port_attempts - 1`` ports, and if all are
+    taken it runs without a listener instead of failing to start.
+    """
+
+    def __init__(
+        self,
+        metrics: PipelineMetrics,
+        *,
+        host: str = "127.0.0.1",
+        port: int = 9108,
+        path: str = DEFAULT_METRICS_PATH,
+        port_attempts: int = 10,
+    ) -> None:
+        self.metrics = metrics
+        self.host = host
+        self.port = port
+        self.path = path
+        self.port_attempts = max(1, port_attempts)
+        self._runner: Optional[web.AppRunner] = None
+
+    async def start(self) -> None:
+        app = web.Application()
+        self.metrics.register(app, self.path)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        first_port = self.port
+        # Port 0 lets the OS pick; there is nothing to retry.
+        attempts = self.port_attempts if first_port else 1
+        for offset in range(attempts):
+            port = first_port + offset if first_port else 0
+            try:
+                site = web.TCPSite(self._runner, self.host, port)
+                await site.start()
+            except OSError as err:
+                if err.errno != errno.EADDRINUSE:
+                    raise
+                continue
+            self.port = self._runner.addresses[0][1]
+            logger.info(
+                "📈 Metrics tersedia di %s:%d%s", self.host, self.port, self.path
+            )
+            return
+        logger.warning(
+            "Port metrics %d-%d terpakai; /metrics tidak dibuka di proses ini",
+            first_port,
+            first_port + attempts - 1,
+        )
+        await self.stop()
+
+    async def stop(self) -> None:
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
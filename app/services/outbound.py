@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from aiogram.exceptions import TelegramRetryAfter
+
+from .metrics import PipelineMetrics
+from .rate_limiter import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# Lower sorts first: transcripts and errors go out before queue/progress chatter.
+RESULT = 0
+STATUS = 1
+PRIORITY_NAMES = {RESULT: "result", STATUS: "status"}
+
+# Chats idle this long lose their bucket; a fresh one starts full again.
+LANE_IDLE_SECONDS = 300.0
+
+Call = Callable[[], Awaitable[Any]]
+
+
+@dataclass(order=True)
+class _Outgoing:
+    priority: int
+    seq: int
+    call: Call = field(compare=False)
+    futures: List[asyncio.Future] = field(compare=False, default_factory=list)
+    coalesce_key: Optional[Hashable] = field(compare=False, default=None)
+    queued_at: float = field(compare=False, default_factory=time.monotonic)
+
+    @property
+    def abandoned(self) -> bool:
+        return all(future.done() for future in self.futures)
+
+
+@dataclass
+class _ChatLane:
+    bucket: Optional[TokenBucket]
+    pending: List[_Outgoing] = field(default_factory=list)
+    coalescing: Dict[Hashable, _Outgoing] = field(default_factory=dict)
+    task: Optional[asyncio.Task] = None
+    paused_until: float = 0.0
+    last_used: float = field(default_factory=time.monotonic)
+
+    @property
+    def idle(self) -> bool:
+        return not self.pending and (self.task is None or self.task.done())
+
+
+class OutboundSender:
+    """Single exit for Bot API calls that post into chats.
+
+    Every send waits for its chat's token bucket (Telegram allows about one
+    message per second in a private chat and 20 per minute in a group) and
+    then for the global bucket (about 30 per second per bot). Each chat is
+    drained by its own task, so a throttled chat never holds up the others,
+    and within a chat and at the global gate results go before status
+    messages. A status sent with a ``coalesce_key`` that is still queued
+    replaces the queued one instead of adding another message. Flood waits
+    (``TelegramRetryAfter``) pause only that chat and the call is retried
+    up to ``max_retries`` times instead of failing the task.
+    """
+
+    def __init__(
+        self,
+        *,
+        global_per_second: float = 30.0,
+        chat_per_second: float = 1.0,
+        group_per_minute: float = 20.0,
+        max_retries: int = 5,
+        metrics: Optional[PipelineMetrics] = None,
+    ) -> None:
+        self.chat_per_second = chat_per_second
+        self.group_per_minute = group_per_minute
+        self.max_retries = max_retries
+        self.global_bucket = (
+            TokenBucket(global_per_second, 1.0) if global_per_second > 0 else None
+        )
+        self._lanes: Dict[int, _ChatLane] = {}
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._granter: Optional[asyncio.Task] = None
+        self._seq = itertools.count()
+        self.flood_waits = 0
+        self.coalesced = 0
+        self.messages = (
+            metrics.counter(
+                "transhades_outbound_messages_total",
+                "Bot API sends by priority and outcome.",
+                ("priority", "outcome"),
+            )
+            if metrics
+            else None
+        )
+        self.wait_seconds = (
+            metrics.histogram(
+                "transhades_outbound_wait_seconds",
+                "Time a send waited for Telegram rate limits.",
+                ("priority",),
+            )
+            if metrics
+            else None
+        )
+        self.flood_wait_counter = (
+            metrics.counter(
+                "transhades_outbound_flood_waits_total",
+                "TelegramRetryAfter responses received.",
+            )
+            if metrics
+            else None
+        )
+
+    async def send(
+        self,
+        chat_id: int,
+        call: Call,
+        *,
+        priority: int = RESULT,
+        coalesce_key: Optional[Hashable] = None,
+    ) -> Any:
+        """Run ``call`` once the chat and the bot may send again; return its result."""
+        future = asyncio.get_running_loop().create_future()
+        lane = self._lane(chat_id)
+        queued = lane.coalescing.get(coalesce_key) if coalesce_key is not None else None
+        if queued is not None:
+            # Not sent yet: only the latest text matters.
+            queued.call = call
+            queued.futures.append(future)
+            self.coalesced += 1
+            self._count(priority, "coalesced")
+        else:
+            item = _Outgoing(
+                priority, next(self._seq), call, [future], coalesce_key=coalesce_key
+            )
+            heapq.heappush(lane.pending, item)
+            if coalesce_key is not None:
+                lane.coalescing[coalesce_key] = item
+            if lane.task is None or lane.task.done():
+                lane.task = asyncio.create_task(self._drain(chat_id, lane))
+        return await future
+
+    def pending(self) -> int:
+        return sum(len(lane.pending) for lane in self._lanes.values())
+
+    async def stop(self) -> None:
+        tasks = [lane.task for lane in self._lanes.values() if lane.task]
+        if self._granter:
+            tasks.append(self._granter)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for lane in self._lanes.values():
+            for item in lane.pending:
+                for future in item.futures:
+                    future.cancel()
+        self._lanes.clear()
+
+    def _lane(self, chat_id: int) -> _ChatLane:
+        lane = self._lanes.get(chat_id)
+        if lane is None:
+            self._prune()
+            lane = self._lanes[chat_id] = _ChatLane(self._chat_bucket(chat_id))
+        lane.last_used = time.monotonic()
+        return lane
+
+    def _chat_bucket(self, chat_id: int) -> Optional[TokenBucket]:
+        # Group and channel ids are negative.
+        if chat_id < 0:
+            if self.group_per_minute <= 0:
+                return None
+            return TokenBucket(self.group_per_minute, 60.0)
+        if self.chat_per_second <= 0:
+            return None
+        return TokenBucket(1, 1.0 / self.chat_per_second)
+
+    def _prune(self) -> None:
+        cutoff = time.monotonic() - LANE_IDLE_SECONDS
+        for chat_id in [
+            chat_id
+            for chat_id, lane in self._lanes.items()
+            if lane.idle and lane.last_used < cutoff
+        ]:
+            del self._lanes[chat_id]
+
+    async def _drain(self, chat_id: int, lane: _ChatLane) -> None:
+        while lane.pending:
+            item = heapq.heappop(lane.pending)
+            if item.coalesce_key is not None:
+                lane.coalescing.pop(item.coalesce_key, None)
+            if item.abandoned:
+                continue
+            try:
+                result = await self._deliver(chat_id, lane, item)
+            except asyncio.CancelledError:
+                for future in item.futures:
+                    future.cancel()
+                raise
+            except Exception as exc:  # noqa: BLE001
+                self._count(item.priority, "failed")
+                for future in item.futures:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            self._count(item.priority, "sent")
+            for future in item.futures:
+                if not future.done():
+                    future.set_result(result)
+
+    async def _deliver(self, chat_id: int, lane: _ChatLane, item: _Outgoing) -> Any:
+        for attempt in itertools.count():
+            pause = lane.paused_until - time.monotonic()
+            if pause > 0:
+                await asyncio.sleep(pause)
+            if lane.bucket:
+                await lane.bucket.acquire()
+            await self._global_turn(item.priority)
+            if attempt == 0 and self.wait_seconds:
+                self.wait_seconds.observe(
+                    time.monotonic() - item.queued_at,
+                    priority=PRIORITY_NAMES.get(item.priority, str(item.priority)),
+                )
+            try:
+                return await item.call()
+            except TelegramRetryAfter as err:
+                self.flood_waits += 1
+                if self.flood_wait_counter:
+                    self.flood_wait_counter.inc()
+                if attempt >= self.max_retries:
+                    raise
+                logger.warning(
+                    "⏳ Flood wait Telegram %ds untuk chat %s (percobaan %d/%d)",
+                    err.retry_after,
+                    chat_id,
+                    attempt + 1,
+                    self.max_retries,
+                )
+                lane.paused_until = max(
+                    lane.paused_until, time.monotonic() + err.retry_after
+                )
+
+    async def _global_turn(self, priority: int) -> None:
+        """Wait for a global token; waiting results are served before status."""
+        if self.global_bucket is None:
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        if self._granter is None or self._granter.done():
+            self._granter = asyncio.create_task(self._grant())
+        await future
+
+    async def _grant(self) -> None:
+        while self._waiters:
+            await self.global_bucket.acquire()
+            while self._waiters:
+                _, _, future = heapq.heappop(self._waiters)
+                if not future.done():
+                    future.set_result(None)
+                    break
+
+    def _count(self, priority: int, outcome: str) -> None:
+        if self.messages:
+            self.messages.inc(
+                priority=PRIORITY_NAMES.get(priority, str(priority)), outcome=outcome
+            )
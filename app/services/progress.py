@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from aiogram.exceptions import TelegramAPIError, TelegramBadRequest
+
+from .reply_target import ReplyTarget
+
+logger = logging.getLogger(__name__)
+
+STAGE_LABELS = {
+    "download": "⏬ Mengunduh",
+    "vad": "🔇 Memotong bagian hening",
+    "transcode": "🎛️ Mengonversi audio",
+    "transcribe": "📝 Mentranskripsi",
+    "deliver": "📤 Mengirim hasil",
+}
+BAR_WIDTH = 10
+MEGABYTE = 1024 * 1024
+
+
+class ProgressReporter:
+    """Show one task's progress by editing a single message in its chat.
+
+    Callbacks only store numbers, so they are cheap at any rate. A loop per
+    task renders every ``interval`` seconds, skips unchanged text and sends
+    the edit as a coalesced status through the outbound sender: a throttled
+    chat gets fewer edits, never a backlog. Tasks shorter than ``interval``
+    post nothing, and the message is deleted when the task ends. Download
+    speed is an EWMA of measured throughput and drives the ETA; other stages
+    use ``expected_seconds`` when the caller has an estimate. An
+    ``interval`` of 0 disables reporting.
+    """
+
+    def __init__(
+        self,
+        target: ReplyTarget,
+        title: str,
+        *,
+        interval: float = 5.0,
+        smoothing: float = 0.3,
+    ) -> None:
+        self.target = target
+        self.title = title
+        self.interval = interval
+        self.smoothing = smoothing
+        self.started = time.monotonic()
+        self.stage_name: Optional[str] = None
+        self.detail = ""
+        self.stage_started = self.started
+        self.expected_seconds: Optional[float] = None
+        self.current = 0
+        self.total: Optional[int] = None
+        self.rate: Optional[float] = None
+        self.message_id: Optional[int] = None
+        self._sample = (self.started, 0)
+        self._rendered = ""
+        self._task: Optional[asyncio.Task] = None
+        self._flushing: Optional[asyncio.Future] = None
+
+    async def __aenter__(self) -> "ProgressReporter":
+        if self.interval > 0:
+            self._task = asyncio.create_task(self._run())
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    def stage(
+        self,
+        name: str,
+        *,
+        total: Optional[int] = None,
+        expected_seconds: Optional[float] = None,
+        detail: str = "",
+    ) -> None:
+        now = time.monotonic()
+        self.stage_name = name
+        self.detail = detail
+        self.stage_started = now
+        self.expected_seconds = expected_seconds
+        self.current = 0
+        self.total = total or None
+        self.rate = None
+        self._sample = (now, 0)
+
+    def update(self, current: int, total: Optional[int] = None) -> None:
+        """Byte-count callback with Telethon's ``(current, total)`` signature."""
+        self.current = current
+        if total:
+            self.total = total
+
+    def render(self) -> str:
+        now = time.monotonic()
+        self._measure(now)
+        label = STAGE_LABELS.get(self.stage_name or "", "⏳ Memproses")
+        lines = [f"⏳ {self.title}", f"{label}{self.detail}"]
+        remaining = None
+        if self.total:
+            fraction = min(1.0, self.current / self.total)
+            filled = int(fraction * BAR_WIDTH)
+            lines.append(
+                f"{'▰' * filled}{'▱' * (BAR_WIDTH - filled)} {fraction:.0%} · "
+                f"{self.current / MEGABYTE:.1f}/{self.total / MEGABYTE:.1f} MB"
+            )
+            if self.rate:
+                remaining = (self.total - self.current) / self.rate
+                lines.append(f"⚡ {self.rate / MEGABYTE:.1f} MB/s")
+        elif self.expected_seconds:
+            remaining = max(0.0, self.expected_seconds - (now - self.stage_started))
+        if remaining is not None:
+            lines.append(f"⏱️ Sisa sekitar {_format_seconds(remaining)}")
+        lines.append(f"🕐 Berjalan {_format_seconds(now - self.started)}")
+        return "\n".join(lines)
+
+    async def flush(self) -> None:
+        text = self.render()
+        if text == self._rendered:
+            return
+        if self.message_id is None:
+            message = await self.target.status(text)
+            self.message_id = message.message_id
+        else:
+            await self.target.edit_status(self.message_id, text)
+        self._rendered = text
+
+    async def close(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._flushing:
+            # Let a first post in flight land so its message can be deleted.
+            await asyncio.gather(self._flushing, return_exceptions=True)
+            self._flushing = None
+        if self.message_id is not None:
+            message_id, self.message_id = self.message_id, None
+            try:
+                await self.target.delete_status(message_id)
+            except TelegramAPIError:
+                logger.debug("Pesan progress %s tidak bisa dihapus", message_id)
+
+    def _measure(self, now: float) -> None:
+        then, done = self._sample
+        if now - then < 1.0 or self.current < done:
+            return
+        sample = (self.current - done) / (now - then)
+        if self.rate is None:
+            self.rate = sample
+        else:
+            self.rate += self.smoothing * (sample - self.rate)
+        self._sample = (now, self.current)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            # Shielded: cancelling the loop must not abandon a send midway.
+            self._flushing = asyncio.ensure_future(self.flush())
+            try:
+                await asyncio.shield(self._flushing)
+            except TelegramBadRequest as err:
+                # Message deleted by the user or chat gone: stop reporting.
+                logger.debug(
+                    "Progress chat %s dihentikan: %s", self.target.chat_id, err
+                )
+                self.message_id = None
+                return
+            except TelegramAPIError:
+                logger.warning("Gagal memperbarui progress", exc_info=True)
+
+
+def _format_seconds(seconds: float) -> str:
+    seconds = int(seconds)
+    if seconds < 60:
+        return f"{seconds} dtk"
+    minutes, seconds = divmod(seconds, 60)
+    if minutes < 60:
+        return f"{minutes}m {seconds:02d}d"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}j {minutes:02d}m"
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import logging
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from requests import HTTPError
+
+from .executors import StageExecutors
+from .groq_service import TranscriptionResult
+from .metrics import PipelineMetrics
+from .rate_limiter import ProviderRateLimiter, parse_reset_seconds
+from .tracing import span
+from .transcription import TranscriberRegistry
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class ProviderGateway:
+    """Single path for blocking provider calls: rate limits, health and 429 retries."""
+
+    def __init__(
+        self,
+        transcriber_registry: TranscriberRegistry,
+        stage_executors: StageExecutors,
+        *,
+        rate_limiters: Optional[Dict[str, ProviderRateLimiter]] = None,
+        max_rate_limit_retries: int = 3,
+        default_retry_after: float = 10.0,
+        metrics: Optional[PipelineMetrics] = None,
+    ) -> None:
+        self.registry = transcriber_registry
+        self.stage_executors = stage_executors
+        self.rate_limiters = rate_limiters or {}
+        self.max_rate_limit_retries = max_rate_limit_retries
+        self.default_retry_after = default_retry_after
+        self.metrics = metrics
+
+    def limiter_for(self, transcriber: object) -> Optional[ProviderRateLimiter]:
+        return self.rate_limiters.get(getattr(transcriber, "provider_name", ""))
+
+    async def transcribe(
+        self,
+        transcriber: object,
+        file_path: Path,
+        audio_seconds: Optional[float] = None,
+    ) -> TranscriptionResult:
+        return await self._call(
+            transcriber, audio_seconds, transcriber.transcribe, file_path
+        )
+
+    async def submit_async(
+        self,
+        transcriber: object,
+        file_path: Path,
+        callback_url: str,
+        audio_seconds: Optional[float] = None,
+    ) -> str:
+        """Upload in callback mode; returns the provider's request id."""
+        return await self._call(
+            transcriber,
+            audio_seconds,
+            transcriber.submit_async,
+            file_path,
+            callback_url,
+        )
+
+    async def _call(
+        self,
+        transcriber: object,
+        audio_seconds: Optional[float],
+        func: Callable[..., T],
+        *args: Any,
+    ) -> T:
+        limiter = self.limiter_for(transcriber)
+        provider = getattr(transcriber, "provider_name", "")
+        payload_size = _file_size(args[0]) if args else None
+        attempt = 0
+        while True:
+            if limiter:
+                with span("rate_limit_wait", provider=provider):
+                    await limiter.acquire(audio_seconds, payload_size)
+            # Claimed only now, when the request is really sent; a half-open
+            # probe is released however the call ends.
+            with self.registry.request(transcriber):
+                started = time.monotonic()
+                if self.metrics and payload_size:
+                    self.metrics.bytes_uploaded.inc(payload_size, provider=provider)
+                try:
+                    # Upload and inference share one blocking HTTP request.
+                    with span(
+                        "provider",
+                        provider=provider,
+                        model=getattr(transcriber, "model", None),
+                        bytes=payload_size,
+                        attempt=attempt + 1,
+                    ):
+                        result = await self.stage_executors.network.run(func, *args)
+                except HTTPError as exc:
+                    self._record_error(provider, exc)
+                    retry_after = self._rate_limited(exc)
+                    if (
+                        limiter
+                        and retry_after is not None
+                        and attempt < self.max_rate_limit_retries
+                    ):
+                        attempt += 1
+                        limiter.pause(retry_after)
+                        logger.warning(
+                            "%s HTTP 429; menahan task %.1fs (percobaan %d/%d)",
+                            limiter.name,
+                            retry_after,
+                            attempt,
+                            self.max_rate_limit_retries,
+                        )
+                        continue
+                    self.registry.record_outcome(transcriber, error=exc)
+                    raise
+                except Exception as exc:
+                    self._record_error(provider, exc)
+                    self.registry.record_outcome(transcriber, error=exc)
+                    raise
+                elapsed = time.monotonic() - started
+                self.registry.record_outcome(transcriber, elapsed)
+            if self.metrics:
+                self.metrics.observe_stage(
+                    "provider",
+                    elapsed,
+                    provider=provider,
+                    model=getattr(transcriber, "model", ""),
+                    size=payload_size,
+                )
+            return result
+
+    def _record_error(self, provider: str, error: Exception) -> None:
+        if self.metrics:
+            self.metrics.provider_error(provider, error)
+
+    def _rate_limited(self, error: HTTPError) -> Optional[float]:
+        response = error.response
+        if response is None or response.status_code != 429:
+            return None
+        return (
+            parse_reset_seconds(response.headers.get("retry-after"))
+            or self.default_retry_after
+        )
+
+
+def _file_size(path: Any) -> Optional[int]:
+    try:
+        return Path(path).stat().st_size
+    except (OSError, TypeError):
+        return None
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import re
+import threading
+import time
+from typing import Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+
+# Bitrate assumed for a payload of unknown duration; prepared audio is
+# encoded at or above this, so the estimate errs on charging too much.
+ESTIMATE_BITS_PER_SECOND = 64_000
+
+
+def estimate_audio_seconds(payload_bytes: int) -> float:
+    return payload_bytes * 8 / ESTIMATE_BITS_PER_SECOND
+
+
+def parse_reset_seconds(value: Optional[str]) -> Optional[float]:
+    """Parse ``Retry-After``/reset values such as ``12``, ``7.66s`` or ``2m59.5s``."""
+    if not value:
+        return None
+    value = value.strip().lower()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    scale = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+    return sum(float(amount) * scale[unit] for amount, unit in parts)
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously over ``period`` seconds."""
+
+    def __init__(self, capacity: float, period: float) -> None:
+        self.capacity = float(capacity)
+        self.rate = self.capacity / period
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def tokens(self) -> float:
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+    async def acquire(self, amount: float = 1.0) -> float:
+        """Wait until ``amount`` tokens are available; return seconds waited.
+
+        Requests larger than the bucket wait for a full bucket and go into debt,
+        so one long file cannot block forever.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                needed = min(amount, self.capacity)
+                if self._tokens >= needed:
+                    self._tokens -= amount
+                    return waited
+                delay = (needed - self._tokens) / self.rate
+            await asyncio.sleep(delay)
+            waited += delay
+
+    def limit_remaining(self, remaining: float) -> None:
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._tokens, remaining)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+
+class ProviderRateLimiter:
+    """Request-count and audio-seconds budgets for one provider account."""
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        requests_per_minute: int = 0,
+        audio_seconds_per_hour: int = 0,
+    ) -> None:
+        self.name = name
+        self.requests = (
+            TokenBucket(requests_per_minute, 60.0) if requests_per_minute > 0 else None
+        )
+        self.audio_seconds = (
+            TokenBucket(audio_seconds_per_hour, 3600.0)
+            if audio_seconds_per_hour > 0
+            else None
+        )
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+        self.throttled_seconds = 0.0
+
+    async def acquire(
+        self,
+        audio_seconds: Optional[float] = None,
+        payload_bytes: Optional[int] = None,
+    ) -> None:
+        """Wait for a request slot and for ``audio_seconds`` of audio budget.
+
+        Without a duration the audio budget is charged an estimate from
+        ``payload_bytes`` instead of being skipped.
+        """
+        if not audio_seconds and payload_bytes:
+            audio_seconds = estimate_audio_seconds(payload_bytes)
+        while True:
+            with self._lock:
+                pause = self._paused_until - time.monotonic()
+            if pause <= 0:
+                break
+            self.throttled_seconds += pause
+            await asyncio.sleep(pause)
+
+        waited = 0.0
+        if self.requests:
+            waited += await self.requests.acquire(1)
+        if self.audio_seconds and audio_seconds:
+            waited += await self.audio_seconds.acquire(audio_seconds)
+        if waited:
+            self.throttled_seconds += waited
+            logger.info("⏳ %s rate limit: task ditahan %.1fs", self.name, waited)
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def update_from_headers(self, headers: Mapping[str, str]) -> None:
+        """Align local budgets with what the provider reports."""
+        retry_after = parse_reset_seconds(headers.get("retry-after"))
+        if retry_after:
+            self.pause(retry_after)
+
+        remaining = headers.get("x-ratelimit-remaining-requests")
+        if remaining is not None:
+            try:
+                remaining_requests = float(remaining)
+            except ValueError:
+                remaining_requests = None
+            if remaining_requests is not None:
+                if self.requests:
+                    self.requests.limit_remaining(remaining_requests)
+                if remaining_requests <= 0:
+                    reset = parse_reset_seconds(
+                        headers.get("x-ratelimit-reset-requests")
+                    )
+                    if reset:
+                        self.pause(reset)
+
+    def on_response(self, response) -> None:
+        """``response_hook`` for transcribers; runs in the network worker thread."""
+        self.update_from_headers(response.headers)
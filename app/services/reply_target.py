@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, List, Optional
+
+from aiogram import Bot
+from aiogram.types import Message
+
+from .delivery import DeliveryOptions
+from .outbound import RESULT, STATUS, Call, OutboundSender
+
+
+@dataclass(frozen=True)
+class ReplyTarget:
+    """Where a task sends its replies, without holding the original Message.
+
+    Worker processes only receive a job from the broker, so everything the
+    pipeline needs to answer the user is kept here as plain ids. With a
+    ``sender`` every reply goes through its rate limits and flood-wait
+    retries; ``delivery`` is how the chat wants its transcript sent.
+    """
+
+    bot: Bot
+    chat_id: int
+    message_id: int
+    source_name: str = "transcript"
+    sender: Optional[OutboundSender] = None
+    delivery: DeliveryOptions = DeliveryOptions()
+
+    @classmethod
+    def from_message(
+        cls,
+        message: Message,
+        sender: Optional[OutboundSender] = None,
+        delivery: Optional[DeliveryOptions] = None,
+    ) -> "ReplyTarget":
+        return cls(
+            bot=message.bot,
+            chat_id=message.chat.id,
+            message_id=message.message_id,
+            source_name=source_name_of(message),
+            sender=sender,
+            delivery=delivery or DeliveryOptions(),
+        )
+
+    async def answer(self, text: str, **kwargs: Any) -> Message:
+        return await self._send(
+            lambda: self.bot.send_message(self.chat_id, text, **kwargs)
+        )
+
+    async def answer_document(self, document: Any, **kwargs: Any) -> Message:
+        return await self._send(
+            lambda: self.bot.send_document(self.chat_id, document, **kwargs)
+        )
+
+    async def answer_media_group(
+        self, media: List[Any], **kwargs: Any
+    ) -> List[Message]:
+        return await self._send(
+            lambda: self.bot.send_media_group(self.chat_id, media, **kwargs)
+        )
+
+    async def status(self, text: str, **kwargs: Any) -> Message:
+        """Send a queue/progress notice that yields to results.
+
+        A newer notice for the same source message replaces one still queued.
+        """
+        return await self._send(
+            lambda: self.bot.send_message(self.chat_id, text, **kwargs),
+            priority=STATUS,
+            coalesce_key=("status", self.message_id),
+        )
+
+    async def edit_status(self, message_id: int, text: str, **kwargs: Any) -> Any:
+        """Replace the text of a status message; pending edits are coalesced."""
+        return await self._send(
+            lambda: self.bot.edit_message_text(
+                text, chat_id=self.chat_id, message_id=message_id, **kwargs
+            ),
+            priority=STATUS,
+            coalesce_key=("edit", message_id),
+        )
+
+    async def delete_status(self, message_id: int) -> bool:
+        return await self._send(
+            lambda: self.bot.delete_message(self.chat_id, message_id),
+            priority=STATUS,
+        )
+
+    async def _send(self, call: Call, **options: Any) -> Any:
+        if self.sender is None:
+            return await call()
+        options.setdefault("priority", RESULT)
+        return await self.sender.send(self.chat_id, call, **options)
+
+
+def source_name_of(message: Message) -> str:
+    """Best human-readable name for the media, used to name transcript files."""
+    if message.document and message.document.file_name:
+        return message.document.file_name
+    if message.audio and message.audio.file_name:
+        return message.audio.file_name
+    if message.video and message.video.file_name:
+        return message.video.file_name
+    if message.caption:
+        return message.caption
+    return "transcript"
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from .transcription import TranscriberRegistry
+
+logger = logging.getLogger(__name__)
+
+AUTO_PROVIDER = "auto"
+
+# Upper bounds (bytes) of the file-size buckets throughput is tracked in.
+SIZE_BUCKETS: Tuple[Tuple[Optional[int], str], ...] = (
+    (5 * 1024 * 1024, "small"),
+    (25 * 1024 * 1024, "medium"),
+    (None, "large"),
+)
+DEFAULT_THROUGHPUT = 50.0  # audio-seconds per wall-second before any sample
+DEFAULT_PAYLOAD_LIMIT = 25 * 1024 * 1024
+
+
+@dataclass(frozen=True)
+class RouteChoice:
+    provider: str
+    model: Optional[str]
+    display: str
+    expected_seconds: float
+
+
+def size_bucket(file_size: Optional[int]) -> str:
+    for limit, name in SIZE_BUCKETS:
+        if limit is None or (file_size or 0) <= limit:
+            return name
+    return SIZE_BUCKETS[-1][1]
+
+
+def display_name(provider: str, model: Optional[str]) -> str:
+    return f"{provider} ({model})" if model else provider
+
+
+class ProviderRouter:
+    """Choose provider/model per task from live EWMA throughput and load."""
+
+    def __init__(
+        self,
+        transcriber_registry: TranscriberRegistry,
+        *,
+        alpha: float = 0.3,
+        queue_weight: float = 0.25,
+    ) -> None:
+        self.registry = transcriber_registry
+        self.alpha = alpha
+        self.queue_weight = queue_weight
+        self._throughput: Dict[Tuple[str, str], float] = {}
+        self._in_flight: Dict[str, int] = {}
+
+    def candidates(self) -> List[Tuple[str, Optional[str]]]:
+        options: List[Tuple[str, Optional[str]]] = []
+        for provider in self.registry.providers():
+            transcriber = self.registry.get(provider)
+            models = getattr(transcriber, "available_models", None)
+            if models:
+                options.extend((provider, model) for model in models)
+            else:
+                options.append((provider, None))
+        return options
+
+    def throughput(self, display: str, bucket: str) -> Optional[float]:
+        return self._throughput.get((display, bucket))
+
+    def choose(
+        self, file_size: Optional[int], duration: Optional[float]
+    ) -> Optional[RouteChoice]:
+        bucket = size_bucket(file_size)
+        healthy = [
+            (provider, model)
+            for provider, model in self.candidates()
+            if self.registry.is_available(provider)
+            and self.registry.accepts(provider, duration)
+        ]
+        if not healthy:
+            return None
+
+        # Prefer backends that take the file as-is so no transcode is forced.
+        fitting = [
+            (provider, model)
+            for provider, model in healthy
+            if not file_size or file_size <= self._payload_limit(provider)
+        ]
+        options = fitting or healthy
+
+        known = [
+            value
+            for (display, key_bucket), value in self._throughput.items()
+            if key_bucket == bucket
+        ]
+        # Unmeasured options look slightly better than the best known one so
+        # every backend gets sampled at least once per bucket.
+        prior = max(known) * 1.1 if known else DEFAULT_THROUGHPUT
+        audio_seconds = duration or 60.0
+
+        best: Optional[RouteChoice] = None
+        for provider, model in options:
+            display = display_name(provider, model)
+            rate = self._throughput.get((display, bucket), prior)
+            expected = audio_seconds / max(rate, 1e-6)
+            expected *= 1 + self.queue_weight * self._in_flight.get(provider, 0)
+            if best is None or expected < best.expected_seconds:
+                best = RouteChoice(provider, model, display, expected)
+
+        if best:
+            logger.debug(
+                "Auto route → %s (bucket %s, ~%.1fs expected)",
+                best.display,
+                bucket,
+                best.expected_seconds,
+            )
+        return best
+
+    def begin(self, provider: str) -> None:
+        self._in_flight[provider] = self._in_flight.get(provider, 0) + 1
+
+    def end(self, provider: str) -> None:
+        self._in_flight[provider] = max(0, self._in_flight.get(provider, 0) - 1)
+
+    def in_flight(self, provider: str) -> int:
+        return self._in_flight.get(provider, 0)
+
+    def record(
+        self,
+        display: str,
+        *,
+        audio_seconds: Optional[float],
+        wall_seconds: float,
+        file_size: Optional[int],
+    ) -> None:
+        if not audio_seconds or wall_seconds <= 0:
+            return
+        key = (display, size_bucket(file_size))
+        sample = audio_seconds / wall_seconds
+        previous = self._throughput.get(key)
+        self._throughput[key] = (
+            sample
+            if previous is None
+            else self.alpha * sample + (1 - self.alpha) * previous
+        )
+
+    def snapshot(self) -> Dict[str, float]:
+        return {
+            f"{display}/{bucket}": round(value, 2)
+            for (display, bucket), value in sorted(self._throughput.items())
+        }
+
+    def _payload_limit(self, provider: str) -> int:
+        transcriber = self.registry.get(provider)
+        return getattr(transcriber, "max_payload_bytes", DEFAULT_PAYLOAD_LIMIT)
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import logging
+import math
+import os
+import shutil
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+from .transcode_planner import TRANSCODE, MediaProbe, TranscodePlan
+
+logger = logging.getLogger(__name__)
+
+MIN_SEGMENT_SECONDS = 300
+
+
+class SegmentedTranscoder:
+    """Encode long inputs as parallel time ranges and stitch the results.
+
+    Transcodes run inside CPU executor slots, so up to ``concurrent_jobs``
+    of them fan out at once; ``max_processes`` is capped so all their ffmpeg
+    children together never exceed the CPU count.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_processes: Optional[int] = None,
+        min_duration: float = 1200,
+        min_segment_seconds: float = MIN_SEGMENT_SECONDS,
+        concurrent_jobs: int = 1,
+    ) -> None:
+        cpu_count = os.cpu_count() or 1
+        per_job = cpu_count // max(1, concurrent_jobs)
+        self.max_processes = max(1, min(max_processes or cpu_count, per_job))
+        self.min_duration = min_duration
+        self.min_segment_seconds = min_segment_seconds
+
+    def should_split(self, plan: TranscodePlan, probe: Optional[MediaProbe]) -> bool:
+        return (
+            self.max_processes > 1
+            and plan.action == TRANSCODE
+            and probe is not None
+            and bool(probe.duration)
+            and probe.duration >= self.min_duration
+        )
+
+    def segment_ranges(self, duration: float) -> list[tuple[float, Optional[float]]]:
+        """Start and length of each range; the last one reads to end of input.
+
+        The probed duration can be short of the real stream, so bounding the
+        last range with ``-t`` could silently drop the tail.
+        """
+        count = min(
+            self.max_processes,
+            max(1, math.ceil(duration / self.min_segment_seconds)),
+        )
+        length = duration / count
+        return [
+            (idx * length, length if idx < count - 1 else None) for idx in range(count)
+        ]
+
+    def transcode(
+        self,
+        source_path: Path,
+        target_path: Path,
+        plan: TranscodePlan,
+        probe: MediaProbe,
+        *,
+        sample_rate: int,
+        channels: int,
+    ) -> Path:
+        """Run one single-threaded ffmpeg per time range, then concat by stream copy.
+
+        Raises ``subprocess.CalledProcessError`` if any range or the concat fails.
+        """
+        ranges = self.segment_ranges(probe.duration or 0.0)
+        work_dir = target_path.with_name(f"{target_path.stem}.segments")
+        work_dir.mkdir(parents=True, exist_ok=True)
+        logger.info(
+            "⚡ Parallel transcode of %s: %d ranges on %d processes",
+            source_path.name,
+            len(ranges),
+            min(len(ranges), self.max_processes),
+        )
+
+        try:
+            segment_paths = [
+                work_dir / f"part_{idx:03d}{plan.target_suffix}"
+                for idx in range(len(ranges))
+            ]
+            commands = [
+                self._segment_command(
+                    source_path,
+                    segment_path,
+                    plan,
+                    start,
+                    length,
+                    sample_rate,
+                    channels,
+                )
+                for segment_path, (start, length) in zip(segment_paths, ranges)
+            ]
+            # Each worker only supervises an ffmpeg child process, so the
+            # child processes are the actual pool bounded by max_processes.
+            with ThreadPoolExecutor(
+                max_workers=min(len(commands), self.max_processes),
+                thread_name_prefix="ffmpeg-segment",
+            ) as pool:
+                for completed in pool.map(_run_ffmpeg, commands):
+                    if completed.stderr:
+                        logger.debug(
+                            "ffmpeg stderr: %s",
+                            completed.stderr.decode("utf-8", errors="ignore"),
+                        )
+
+            concat_list = work_dir / "concat.txt"
+            concat_list.write_text(
+                "".join(f"file '{path.resolve()}'\n" for path in segment_paths),
+                encoding="utf-8",
+            )
+            _run_ffmpeg(
+                [
+                    "ffmpeg",
+                    "-y",
+                    "-f",
+                    "concat",
+                    "-safe",
+                    "0",
+                    "-i",
+                    str(concat_list),
+                    "-c",
+                    "copy",
+                    str(target_path),
+                ]
+            )
+            return target_path
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    @staticmethod
+    def _segment_command(
+        source_path: Path,
+        segment_path: Path,
+        plan: TranscodePlan,
+        start: float,
+        length: Optional[float],
+        sample_rate: int,
+        channels: int,
+    ) -> list[str]:
+        limit = ["-t", f"{length:.3f}"] if length is not None else []
+        return [
+            "ffmpeg",
+            "-y",
+            "-threads",
+            "1",
+            "-ss",
+            f"{start:.3f}",
+            *limit,
+            "-i",
+            str(source_path),
+            "-map",
+            "0:a:0",
+            "-vn",
+            "-ac",
+            str(channels),
+            "-ar",
+            str(sample_rate),
+            "-codec:a",
+            "libmp3lame",
+            "-b:a",
+            plan.bitrate or "96k",
+            str(segment_path),
+        ]
+
+
+def _run_ffmpeg(command: list[str]) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        command,
+        check=True,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DOWNLOAD_DIR = Path.home() / "Downloads" / "transhades"
+# Bytes per audio second of a transcoded copy when the bitrate is unknown.
+FALLBACK_BYTES_PER_SECOND = 96_000 // 8
+
+
+class StorageFull(RuntimeError):
+    """Not enough disk budget for a task, even after waiting."""
+
+
+class Reservation:
+    """Bytes held against the budget for one task, plus the files it owns."""
+
+    def __init__(self, manager: "StorageManager", nbytes: int) -> None:
+        self._manager = manager
+        self.nbytes = nbytes
+        self.paths: set[Path] = set()
+        self._released = False
+
+    def track(self, *paths: Path) -> None:
+        """Protect ``paths`` from the janitor while the reservation lives."""
+        self.paths.update(paths)
+
+    def on_disk(self) -> int:
+        """Bytes its tracked files already occupy."""
+        return sum(_size(path) for path in self.paths)
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self._manager._release(self)
+
+
+class StorageManager:
+    """Disk budget for the download directory, with a janitor for orphans.
+
+    Tasks reserve their expected footprint before downloading and wait while
+    the budget (or the real free space minus ``min_free_bytes``) cannot hold
+    it. Usage is measured from the directory itself, so worker processes
+    sharing it on one host share one budget; each process adds only the part
+    of its own reservations not yet written. The janitor deletes files and
+    work directories older than ``stale_after`` that no live reservation or
+    unfinished journal entry still refers to.
+    """
+
+    def __init__(
+        self,
+        directory: Path = DEFAULT_DOWNLOAD_DIR,
+        *,
+        budget_bytes: int,
+        min_free_bytes: int = 0,
+        stale_after: float = 6 * 3600,
+        janitor_interval: float = 1800,
+        wait_timeout: float = 1800,
+        protected_paths: Optional[Callable[[], Awaitable[Iterable[Path]]]] = None,
+    ) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.budget_bytes = budget_bytes
+        self.min_free_bytes = min_free_bytes
+        self.stale_after = stale_after
+        self.janitor_interval = janitor_interval
+        self.wait_timeout = wait_timeout
+        self.protected_paths = protected_paths
+        self._reservations: set[Reservation] = set()
+        self._waiters: list[asyncio.Future] = []
+        self._task: Optional[asyncio.Task] = None
+        self.swept_files = 0
+        self.swept_bytes = 0
+
+    @property
+    def reserved_bytes(self) -> int:
+        return sum(reservation.nbytes for reservation in self._reservations)
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def used_bytes(self) -> int:
+        """Bytes under the directory, whichever process wrote them."""
+        total = 0
+        for root, _, files in os.walk(self.directory):
+            total += sum(_size(Path(root) / name) for name in files)
+        return total
+
+    def pending_bytes(self) -> int:
+        """Reserved bytes this process has not written yet."""
+        return sum(
+            max(0, reservation.nbytes - reservation.on_disk())
+            for reservation in self._reservations
+        )
+
+    def free_bytes(self) -> Optional[int]:
+        try:
+            return shutil.disk_usage(self.directory).free
+        except OSError:
+            return None
+
+    @staticmethod
+    def expected_bytes(
+        file_size: Optional[int],
+        duration: Optional[float],
+        bitrate: Optional[str] = None,
+        copies: int = 2,
+    ) -> int:
+        """Download plus ``copies`` transcoded outputs (VAD trim + prepared)."""
+        size = file_size or 0
+        bytes_per_second = _bitrate_bytes(bitrate) or FALLBACK_BYTES_PER_SECOND
+        if duration:
+            transcoded = int(duration * bytes_per_second)
+        else:
+            transcoded = size // 2
+        return size + copies * min(transcoded, size or transcoded)
+
+    def fits(self, nbytes: int) -> bool:
+        used = self.used_bytes()
+        # An empty directory takes even a task larger than the whole budget.
+        if (used or self._reservations) and (
+            used + self.pending_bytes() + nbytes > self.budget_bytes
+        ):
+            return False
+        free = self.free_bytes()
+        return free is None or free - self.min_free_bytes >= nbytes
+
+    async def reserve(self, nbytes: int) -> Reservation:
+        """Wait up to ``wait_timeout`` for room; raises :class:`StorageFull`.
+
+        A single task larger than the whole budget is let through once the
+        directory is empty, as long as the disk itself can hold it.
+        """
+        deadline = time.monotonic() + self.wait_timeout
+        while not self.fits(nbytes):
+            remaining = deadline - time.monotonic()
+            used = self.used_bytes()
+            if remaining <= 0 or not (used or self._reservations):
+                raise StorageFull(
+                    f"butuh {nbytes // (1024 * 1024)}MB, "
+                    f"terpakai {used // (1024 * 1024)}MB dari "
+                    f"{self.budget_bytes // (1024 * 1024)}MB"
+                )
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                # Re-check periodically too: other processes free disk as well.
+                await asyncio.wait_for(asyncio.shield(waiter), min(remaining, 30))
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                self._waiters.remove(waiter)
+        reservation = Reservation(self, nbytes)
+        self._reservations.add(reservation)
+        return reservation
+
+    async def start(self) -> None:
+        await self.sweep()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def sweep(self) -> int:
+        """Delete stale, unreferenced files and directories; returns how many."""
+        protected = {path.resolve() for r in self._reservations for path in r.paths}
+        if self.protected_paths:
+            protected.update(path.resolve() for path in await self.protected_paths())
+        removed, freed = await asyncio.to_thread(self._sweep, protected)
+        if removed:
+            self.swept_files += removed
+            self.swept_bytes += freed
+            logger.info(
+                "🧹 Janitor menghapus %d file lama (%.1f MB)",
+                removed,
+                freed / (1024 * 1024),
+            )
+            self._wake()
+        return removed
+
+    def _sweep(self, protected: set[Path]) -> tuple[int, int]:
+        cutoff = time.time() - self.stale_after
+        removed = freed = 0
+        for path in self.directory.iterdir():
+            try:
+                resolved = path.resolve()
+                if resolved in protected:
+                    continue
+                if path.is_dir():
+                    # Work directories (e.g. ``*.segments``) left by a crash.
+                    if any(resolved in item.parents for item in protected):
+                        continue
+                    files = [item for item in path.rglob("*") if item.is_file()]
+                    newest = max(
+                        [path.stat().st_mtime]
+                        + [item.stat().st_mtime for item in files]
+                    )
+                    if newest >= cutoff:
+                        continue
+                    size = sum(_size(item) for item in files)
+                    shutil.rmtree(path)
+                elif path.is_file():
+                    stat = path.stat()
+                    if stat.st_mtime >= cutoff:
+                        continue
+                    size = stat.st_size
+                    path.unlink()
+                else:
+                    continue
+            except OSError:
+                logger.warning("Janitor gagal memproses %s", path, exc_info=True)
+                continue
+            removed += 1
+            freed += size
+        return removed, freed
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.janitor_interval)
+            try:
+                await self.sweep()
+            except Exception:  # noqa: BLE001
+                logger.exception("Janitor gagal")
+
+    def _release(self, reservation: Reservation) -> None:
+        self._reservations.discard(reservation)
+        self._wake()
+
+    def _wake(self) -> None:
+        for waiter in self._waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+
+def _size(path: Path) -> int:
+    try:
+        return path.stat().st_size
+    except OSError:
+        return 0
+
+
+def _bitrate_bytes(bitrate: Optional[str]) -> Optional[int]:
+    """``"64k"`` → bytes per second."""
+    if not bitrate:
+        return None
+    value = bitrate.strip().lower()
+    scale = 1000 if value.endswith("k") else 1
+    try:
+        return int(float(value.rstrip("k")) * scale) // 8
+    except ValueError:
+        return None
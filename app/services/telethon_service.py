@@ -7,6 +7,8 @@ from telethon import TelegramClient
 from telethon.errors import RPCError, SessionPasswordNeededError
 from telethon.sessions import MemorySession
 
+from .tracing import span
+
 
 ProgressCallback = Optional[Callable[[int, int], None]]
 
@@ -27,16 +29,20 @@ class TelethonDownloadService:
         file_path: str,
         progress_callback: ProgressCallback = None,
     ) -> None:
-        async with self._lock:
+        with span("telethon.lock_wait"):
+            await self._lock.acquire()
+        try:
             client = TelegramClient(
                 session=MemorySession(),
                 api_id=self.api_id,
                 api_hash=self.api_hash,
             )
-            await client.connect()
+            with span("telethon.connect"):
+                await client.connect()
             try:
                 if not await client.is_user_authorized():
-                    await client.sign_in(bot_token=self.bot_token)
+                    with span("telethon.sign_in"):
+                        await client.sign_in(bot_token=self.bot_token)
             except SessionPasswordNeededError as exc:
                 await client.disconnect()
                 raise RuntimeError("Autentikasi bot membutuhkan password tambahan.") from exc
@@ -48,14 +54,17 @@ class TelethonDownloadService:
                 if not telegram_message:
                     raise RuntimeError("Tidak menemukan media pada pesan tersebut.")
 
-                result = await client.download_media(
-                    telegram_message,
-                    file=file_path,
-                    progress_callback=progress_callback,
-                )
+                with span("telethon.download"):
+                    result = await client.download_media(
+                        telegram_message,
+                        file=file_path,
+                        progress_callback=progress_callback,
+                    )
                 if not result:
                     raise RuntimeError("Download media melalui Telethon gagal.")
             except RPCError as exc:
                 raise RuntimeError(f"Gagal mengambil media melalui MTProto: {exc}") from exc
             finally:
                 await client.disconnect()
+        finally:
+            self._lock.release()
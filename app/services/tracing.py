@@ -0,0 +1,374 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import secrets
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Protocol, Sequence
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "transhades"
+_current_trace: ContextVar[Optional["TaskTrace"]] = ContextVar(
+    "current_trace", default=None
+)
+
+
+class SpanHook(Protocol):
+    """Observer notified when spans (the root included) open and close."""
+
+    def span_started(self, trace: "TaskTrace", span_: "Span") -> None: ...
+
+    def span_finished(self, trace: "TaskTrace", span_: "Span") -> None: ...
+
+
+@dataclass
+class Span:
+    name: str
+    start: float
+    end: Optional[float] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+    span_id: str = field(default_factory=lambda: secrets.token_hex(8))
+
+    @property
+    def duration(self) -> float:
+        return (self.end or time.time()) - self.start
+
+
+class TaskTrace:
+    """Stage spans of one task, children of a single root span."""
+
+    def __init__(
+        self, key: str, hooks: Sequence[SpanHook] = (), **attributes: Any
+    ) -> None:
+        self.key = key
+        self.trace_id = secrets.token_hex(16)
+        self.root = Span("task", time.time(), attributes=dict(attributes))
+        self.spans: List[Span] = []
+        self.hooks = tuple(hooks)
+        self._notify("span_started", self.root)
+
+    @property
+    def finished(self) -> bool:
+        return self.root.end is not None
+
+    @property
+    def duration(self) -> float:
+        return self.root.duration
+
+    def add(
+        self, name: str, start: float, end: Optional[float] = None, **attributes: Any
+    ) -> Span:
+        span_ = Span(name, start, end, attributes)
+        self.spans.append(span_)
+        return span_
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Span]:
+        span_ = self.add(name, time.time(), **attributes)
+        self._notify("span_started", span_)
+        try:
+            yield span_
+        except BaseException as exc:
+            span_.error = type(exc).__name__
+            raise
+        finally:
+            span_.end = time.time()
+            self._notify("span_finished", span_)
+
+    def finish(self, error: Optional[str] = None) -> None:
+        if not self.finished:
+            self.root.error = error or self.root.error
+            self.root.end = time.time()
+            self._notify("span_finished", self.root)
+
+    def _notify(self, event: str, span_: Span) -> None:
+        for hook in self.hooks:
+            try:
+                getattr(hook, event)(self, span_)
+            except Exception:  # noqa: BLE001
+                logger.warning("Hook trace %s gagal", event, exc_info=True)
+
+    def slowest(self) -> Optional[Span]:
+        return max(self.spans, key=lambda span_: span_.duration, default=None)
+
+    def summary(self) -> List[str]:
+        """One line per span: offset from task start, duration and name."""
+        lines = []
+        for span_ in sorted(self.spans, key=lambda span_: span_.start):
+            offset = span_.start - self.root.start
+            status = f" ⚠️ {span_.error}" if span_.error else ""
+            running = "" if span_.end else " (berjalan)"
+            details = " ".join(
+                f"{key}={value}"
+                for key, value in span_.attributes.items()
+                if value not in (None, "")
+            )
+            lines.append(
+                f"+{offset:7.2f}s {span_.duration:8.2f}s {span_.name}"
+                f"{running}{status}{' ' + details if details else ''}"
+            )
+        return lines
+
+    def to_otlp(self, service_name: str = SERVICE_NAME) -> Dict[str, Any]:
+        """An OTLP/HTTP JSON ``ExportTraceServiceRequest`` for this trace."""
+
+        def encode(span_: Span, parent: Optional[Span]) -> Dict[str, Any]:
+            attributes = {**span_.attributes, "task.key": self.key}
+            encoded = {
+                "traceId": self.trace_id,
+                "spanId": span_.span_id,
+                "name": span_.name,
+                "kind": 1,  # SPAN_KIND_INTERNAL
+                "startTimeUnixNano": str(int(span_.start * 1e9)),
+                "endTimeUnixNano": str(int((span_.end or time.time()) * 1e9)),
+                "attributes": [
+                    _otlp_attribute(key, value)
+                    for key, value in attributes.items()
+                    if value is not None
+                ],
+                "status": (
+                    {"code": 2, "message": span_.error}  # STATUS_CODE_ERROR
+                    if span_.error
+                    else {"code": 1}  # STATUS_CODE_OK
+                ),
+            }
+            if parent:
+                encoded["parentSpanId"] = parent.span_id
+            return encoded
+
+        spans = [encode(self.root, None)]
+        spans.extend(encode(span_, self.root) for span_ in self.spans)
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [_otlp_attribute("service.name", service_name)]
+                    },
+                    "scopeSpans": [
+                        {"scope": {"name": f"{service_name}.tracing"}, "spans": spans}
+                    ],
+                }
+            ]
+        }
+
+
+class TaskTracer:
+    """Keep recent task traces, export finished ones and report the slowest.
+
+    Traces are kept in memory (newest ``capacity``) for ``/trace``. Finished
+    traces are appended as OTLP JSON lines to ``export_path`` and/or posted
+    to an OTLP/HTTP collector at ``export_url``. Every ``report_interval``
+    seconds the ``report_count`` slowest tasks of that interval are logged
+    with the stage that took longest.
+    """
+
+    def __init__(
+        self,
+        *,
+        capacity: int = 500,
+        export_path: Optional[Path] = None,
+        export_url: Optional[str] = None,
+        report_interval: float = 300.0,
+        report_count: int = 5,
+        service_name: str = SERVICE_NAME,
+    ) -> None:
+        self.capacity = max(1, capacity)
+        self.export_path = Path(export_path) if export_path else None
+        self.export_url = export_url
+        self.report_interval = report_interval
+        self.report_count = report_count
+        self.service_name = service_name
+        self._traces: "OrderedDict[str, TaskTrace]" = OrderedDict()
+        self._aliases: "OrderedDict[str, str]" = OrderedDict()
+        self._finished: List[TaskTrace] = []
+        self._exports: set[asyncio.Task] = set()
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._task: Optional[asyncio.Task] = None
+        self._hooks: List[SpanHook] = []
+
+    def add_hook(self, hook: SpanHook) -> None:
+        self._hooks.append(hook)
+
+    def begin(self, key: str, **attributes: Any) -> TaskTrace:
+        trace = TaskTrace(key, self._hooks, **attributes)
+        self._traces[key] = trace
+        self._traces.move_to_end(key)
+        while len(self._traces) > self.capacity:
+            self._traces.popitem(last=False)
+        return trace
+
+    def alias(self, alias: str, key: str) -> None:
+        """Let ``/trace`` find ``key`` by another id shown to users."""
+        self._aliases[alias] = key
+        while len(self._aliases) > self.capacity:
+            self._aliases.popitem(last=False)
+
+    def find(self, prefix: str) -> Optional[TaskTrace]:
+        """Newest trace whose key or alias starts with ``prefix``."""
+        for alias, key in reversed(self._aliases.items()):
+            if alias.startswith(prefix) and key in self._traces:
+                return self._traces[key]
+        for key in reversed(self._traces):
+            if key.startswith(prefix):
+                return self._traces[key]
+        return None
+
+    def recent(self, limit: int = 10) -> List[TaskTrace]:
+        return list(reversed(self._traces.values()))[:limit]
+
+    @property
+    def reporting(self) -> bool:
+        return self.report_interval > 0 and self.report_count > 0
+
+    def finish(self, trace: TaskTrace, error: Optional[str] = None) -> None:
+        trace.finish(error)
+        if self.reporting:
+            # Only the report loop drains this list.
+            self._finished.append(trace)
+        if self.export_path or self.export_url:
+            task = asyncio.create_task(self._export(trace))
+            self._exports.add(task)
+            task.add_done_callback(self._exports.discard)
+
+    async def start(self) -> None:
+        if self.export_url:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=10)
+            )
+        if self.reporting:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._exports:
+            await asyncio.gather(*self._exports, return_exceptions=True)
+        if self._session:
+            await self._session.close()
+            self._session = None
+
+    def report_slowest(self) -> List[TaskTrace]:
+        """Log and return the slowest tasks finished since the last report."""
+        finished, self._finished = self._finished, []
+        slowest = sorted(finished, key=lambda trace: trace.duration, reverse=True)[
+            : self.report_count
+        ]
+        if slowest:
+            logger.info(
+                "🐢 %d task paling lambat dari %d (%.0fs terakhir):",
+                len(slowest),
+                len(finished),
+                self.report_interval,
+            )
+        for trace in slowest:
+            stage = trace.slowest()
+            logger.info(
+                "  %s %.1fs%s",
+                trace.key[:8],
+                trace.duration,
+                f" — terlama: {stage.name} {stage.duration:.1f}s" if stage else "",
+            )
+        return slowest
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.report_interval)
+            try:
+                self.report_slowest()
+            except Exception:  # noqa: BLE001
+                logger.exception("Laporan task lambat gagal")
+
+    async def _export(self, trace: TaskTrace) -> None:
+        payload = trace.to_otlp(self.service_name)
+        if self.export_path:
+            try:
+                await asyncio.to_thread(self._append, json.dumps(payload))
+            except OSError:
+                logger.warning("Gagal menulis trace ke %s", self.export_path)
+        if self.export_url and self._session:
+            try:
+                async with self._session.post(self.export_url, json=payload) as resp:
+                    if resp.status >= 400:
+                        logger.warning(
+                            "Collector trace menolak ekspor: HTTP %d", resp.status
+                        )
+            except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+                logger.warning("Gagal mengirim trace ke collector: %s", err)
+
+    def _append(self, line: str) -> None:
+        self.export_path.parent.mkdir(parents=True, exist_ok=True)
+        with self.export_path.open("a", encoding="utf-8") as file_obj:
+            file_obj.write(line + "\n")
+
+
+@asynccontextmanager
+async def trace_task(
+    tracer: Optional[TaskTracer],
+    key: Optional[str],
+    *,
+    queued_at: Optional[float] = None,
+    **attributes: Any,
+):
+    """Make a new trace current for the enclosed task; no-op without a tracer.
+
+    ``queued_at`` (wall clock) adds a ``queue_wait`` span up to now.
+    """
+    if tracer is None or key is None:
+        yield None
+        return
+    trace = tracer.begin(key, **attributes)
+    if queued_at is not None:
+        trace.root.start = min(trace.root.start, queued_at)
+        trace.add("queue_wait", queued_at, time.time())
+    token = _current_trace.set(trace)
+    error = None
+    try:
+        yield trace
+    except BaseException as exc:
+        error = type(exc).__name__
+        raise
+    finally:
+        _current_trace.reset(token)
+        tracer.finish(trace, error)
+
+
+def record_error(error: BaseException) -> None:
+    """Mark the current task's trace failed for an error handled inside it."""
+    trace = _current_trace.get()
+    if trace is not None and not trace.finished:
+        trace.root.error = type(error).__name__
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """Time a stage of the current task; does nothing outside a trace."""
+    trace = _current_trace.get()
+    if trace is None or trace.finished:
+        yield None
+        return
+    with trace.span(name, **attributes) as span_:
+        yield span_
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        encoded = {"boolValue": value}
+    elif isinstance(value, int):
+        encoded = {"intValue": str(value)}
+    elif isinstance(value, float):
+        encoded = {"doubleValue": value}
+    else:
+        encoded = {"stringValue": str(value)}
+    return {"key": key, "value": encoded}
@@ -0,0 +1,282 @@
+from __future__ import annotations
+
+import json
+import logging
+import subprocess
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+PASSTHROUGH = "passthrough"
+REMUX = "remux"
+TRANSCODE = "transcode"
+
+# Audio codecs both Groq and Deepgram accept as-is, mapped to the container
+# used when the track has to be stream-copied out of a video file.
+COPYABLE_AUDIO_CODECS = {
+    "opus": ".ogg",
+    "vorbis": ".ogg",
+    "mp3": ".mp3",
+    "aac": ".m4a",
+    "flac": ".flac",
+}
+PASSTHROUGH_SUFFIXES = {
+    ".flac",
+    ".m4a",
+    ".mp3",
+    ".mpeg",
+    ".mpga",
+    ".oga",
+    ".ogg",
+    ".opus",
+    ".wav",
+    ".webm",
+}
+MIN_TRANSCODE_BITRATE_KBPS = 32
+PAYLOAD_HEADROOM = 0.95
+
+
+class NoAudioTrack(ValueError):
+    """The media has no audio stream to transcribe."""
+
+
+@dataclass(frozen=True)
+class MediaProbe:
+    """Subset of ffprobe output needed to plan audio preparation."""
+
+    format_name: str
+    duration: Optional[float]
+    size: Optional[int]
+    audio_codec: Optional[str]
+    audio_bitrate: Optional[int]
+    channels: Optional[int]
+    sample_rate: Optional[int]
+    has_video: bool
+
+    @property
+    def has_audio(self) -> bool:
+        return self.audio_codec is not None
+
+    def estimated_audio_bytes(self) -> Optional[int]:
+        if not self.audio_bitrate or not self.duration:
+            return None
+        return int(self.audio_bitrate * self.duration / 8)
+
+
+@dataclass(frozen=True)
+class TranscodePlan:
+    """Decision on how a downloaded file should be handed to a provider."""
+
+    action: str
+    target_suffix: str
+    reason: str
+    bitrate: Optional[str] = None
+
+    def build_command(
+        self,
+        source_path: Path,
+        target_path: Path,
+        *,
+        sample_rate: int,
+        channels: int,
+    ) -> list[str]:
+        if self.action == REMUX:
+            return [
+                "ffmpeg",
+                "-y",
+                "-i",
+                str(source_path),
+                "-map",
+                "0:a:0",
+                "-vn",
+                "-c",
+                "copy",
+                str(target_path),
+            ]
+        if self.action == TRANSCODE:
+            return [
+                "ffmpeg",
+                "-y",
+                "-i",
+                str(source_path),
+                "-map",
+                "0:a:0",
+                "-vn",
+                "-ac",
+                str(channels),
+                "-ar",
+                str(sample_rate),
+                "-codec:a",
+                "libmp3lame",
+                "-b:a",
+                self.bitrate or "96k",
+                str(target_path),
+            ]
+        raise ValueError(f"Plan {self.action!r} does not need an ffmpeg command.")
+
+
+def probe_media(path: Path, timeout: int = 30) -> Optional[MediaProbe]:
+    """Run ffprobe on ``path`` and return codec/bitrate/duration details."""
+    command = [
+        "ffprobe",
+        "-v",
+        "error",
+        "-print_format",
+        "json",
+        "-show_format",
+        "-show_streams",
+        str(path),
+    ]
+    try:
+        completed = subprocess.run(
+            command,
+            check=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            timeout=timeout,
+        )
+        payload = json.loads(completed.stdout or b"{}")
+    except (OSError, subprocess.SubprocessError, ValueError) as exc:
+        logger.warning("ffprobe gagal membaca %s: %s", path.name, exc)
+        return None
+
+    streams = payload.get("streams") or []
+    fmt = payload.get("format") or {}
+    audio = next((s for s in streams if s.get("codec_type") == "audio"), None)
+    has_video = any(
+        s.get("codec_type") == "video"
+        and not (s.get("disposition") or {}).get("attached_pic")
+        for s in streams
+    )
+
+    duration = _to_float(fmt.get("duration"))
+    if duration is None and audio:
+        duration = _to_float(audio.get("duration"))
+
+    audio_codec = None
+    if audio:
+        audio_codec = (audio.get("codec_name") or "").lower() or None
+    audio_bitrate = _to_int(audio.get("bit_rate")) if audio else None
+    if audio_bitrate is None and audio and not has_video:
+        # Containers such as Ogg only report the overall bitrate.
+        audio_bitrate = _to_int(fmt.get("bit_rate"))
+
+    return MediaProbe(
+        format_name=fmt.get("format_name") or "",
+        duration=duration,
+        size=_to_int(fmt.get("size")),
+        audio_codec=audio_codec,
+        audio_bitrate=audio_bitrate,
+        channels=_to_int(audio.get("channels")) if audio else None,
+        sample_rate=_to_int(audio.get("sample_rate")) if audio else None,
+        has_video=has_video,
+    )
+
+
+def plan_transcode(
+    source_path: Path,
+    probe: Optional[MediaProbe],
+    *,
+    file_size: int,
+    payload_limit: Optional[int],
+    compression_threshold_bytes: int,
+    target_bitrate: str,
+) -> TranscodePlan:
+    """Choose between passthrough, audio stream-copy, and a real transcode.
+
+    A file the provider accepts as-is is sent untouched whatever its size, so
+    the compression threshold only applies when the payload limit is unknown.
+    """
+    suffix = source_path.suffix.lower()
+    size_budget = payload_limit or compression_threshold_bytes
+
+    if probe is None:
+        if suffix == ".mp3" and file_size < size_budget:
+            return TranscodePlan(PASSTHROUGH, suffix, "mp3 below threshold (no probe)")
+        return TranscodePlan(
+            TRANSCODE,
+            ".mp3",
+            "probe unavailable",
+            bitrate=_size_based_bitrate(file_size, target_bitrate),
+        )
+
+    if not probe.has_audio:
+        raise NoAudioTrack("File tidak memiliki track audio yang bisa ditranskripsi.")
+
+    codec = probe.audio_codec or ""
+    copy_suffix = COPYABLE_AUDIO_CODECS.get(codec)
+
+    if (
+        not probe.has_video
+        and copy_suffix
+        and suffix in PASSTHROUGH_SUFFIXES
+        and file_size < size_budget
+    ):
+        return TranscodePlan(
+            PASSTHROUGH, suffix, f"{codec} in {suffix} accepted by providers"
+        )
+
+    if probe.has_video and copy_suffix:
+        estimated = probe.estimated_audio_bytes()
+        if estimated is not None and estimated < size_budget:
+            return TranscodePlan(
+                REMUX,
+                copy_suffix,
+                f"copy {codec} track out of video (~{estimated} bytes)",
+            )
+
+    return TranscodePlan(
+        TRANSCODE,
+        ".mp3",
+        f"{codec or 'unknown'} audio needs re-encoding",
+        bitrate=_choose_bitrate(probe, file_size, payload_limit, target_bitrate),
+    )
+
+
+def _choose_bitrate(
+    probe: MediaProbe,
+    file_size: int,
+    payload_limit: Optional[int],
+    target_bitrate: str,
+) -> str:
+    kbps = _parse_kbps(_size_based_bitrate(file_size, target_bitrate))
+
+    if probe.audio_bitrate:
+        # Never encode above what the source carries.
+        kbps = min(kbps, max(MIN_TRANSCODE_BITRATE_KBPS, probe.audio_bitrate // 1000))
+
+    if payload_limit and probe.duration:
+        fit_kbps = int(payload_limit * 8 * PAYLOAD_HEADROOM / probe.duration / 1000)
+        kbps = min(kbps, max(MIN_TRANSCODE_BITRATE_KBPS, fit_kbps))
+
+    return f"{kbps}k"
+
+
+def _size_based_bitrate(file_size: int, target_bitrate: str) -> str:
+    if file_size > 100 * 1024 * 1024:  # >100MB
+        return "64k"
+    if file_size > 50 * 1024 * 1024:  # >50MB
+        return "80k"
+    return target_bitrate
+
+
+def _parse_kbps(bitrate: str) -> int:
+    value = bitrate.strip().lower().rstrip("k")
+    try:
+        return int(float(value))
+    except ValueError:
+        return 96
+
+
+def _to_float(value: object) -> Optional[float]:
+    try:
+        return float(value) if value not in (None, "N/A") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_int(value: object) -> Optional[int]:
+    parsed = _to_float(value)
+    return int(parsed) if parsed is not None else None
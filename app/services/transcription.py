@@ -1,19 +1,158 @@
 from __future__ import annotations
 
+import logging
+import time
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures.process import BrokenProcessPool
 from dataclasses import dataclass
-from typing import Dict, Iterable, Optional
+from typing import Deque, Dict, Iterable, Iterator, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class ProviderUnavailable(RuntimeError):
+    """The provider's circuit refused the request before it was sent."""
+
+
+def is_provider_failure(error: BaseException) -> bool:
+    """True for errors that say the backend is unhealthy, not the request."""
+    if isinstance(error, (requests.Timeout, requests.ConnectionError)):
+        return True
+    if isinstance(error, (BrokenProcessPool, ProviderUnavailable)):
+        return True
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        status = error.response.status_code
+        return status == 429 or status >= 500
+    return False
+
+
+class ProviderHealth:
+    """Rolling error rate, latency and circuit-breaker state for one provider."""
+
+    def __init__(
+        self,
+        *,
+        window: int = 20,
+        min_requests: int = 5,
+        failure_rate: float = 0.5,
+        consecutive_failures: int = 3,
+        open_seconds: float = 60.0,
+    ) -> None:
+        self.min_requests = min_requests
+        self.failure_rate_threshold = failure_rate
+        self.consecutive_threshold = consecutive_failures
+        self.open_seconds = open_seconds
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.last_status: Optional[int] = None
+        self._outcomes: Deque[bool] = deque(maxlen=window)
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._probe_started_at: Optional[float] = None
+
+    @property
+    def error_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return self._outcomes.count(False) / len(self._outcomes)
+
+    @property
+    def avg_latency(self) -> Optional[float]:
+        if not self._latencies:
+            return None
+        return sum(self._latencies) / len(self._latencies)
+
+    def is_available(self) -> bool:
+        if self.state == CLOSED:
+            return True
+        now = time.monotonic()
+        if self.state == OPEN:
+            return now - self._opened_at >= self.open_seconds
+        # Half-open: one probe at a time; a lost probe expires after open_seconds.
+        return (
+            self._probe_started_at is None
+            or now - self._probe_started_at >= self.open_seconds
+        )
+
+    def allow_request(self) -> bool:
+        """Claim a request; outside CLOSED it becomes the single half-open probe."""
+        if not self.is_available():
+            return False
+        if self.state != CLOSED:
+            self.state = HALF_OPEN
+            self._probe_started_at = time.monotonic()
+        return True
+
+    def release_probe(self) -> None:
+        """Free a probe that ended without a success or failure verdict."""
+        if self.state == HALF_OPEN:
+            self._probe_started_at = None
+
+    def record_success(self, latency: Optional[float] = None) -> None:
+        if self.state != CLOSED:
+            # Start the recovered circuit with a clean window.
+            self._outcomes.clear()
+        self._outcomes.append(True)
+        if latency is not None:
+            self._latencies.append(latency)
+        self.consecutive_failures = 0
+        self.last_status = None
+        self.state = CLOSED
+        self._probe_started_at = None
+
+    def record_failure(self, status: Optional[int] = None) -> None:
+        self._outcomes.append(False)
+        self.consecutive_failures += 1
+        self.last_status = status
+        if self.state == HALF_OPEN or self._should_open():
+            self.state = OPEN
+            self._opened_at = time.monotonic()
+            self._probe_started_at = None
+
+    def _should_open(self) -> bool:
+        if self.consecutive_failures >= self.consecutive_threshold:
+            return True
+        return (
+            len(self._outcomes) >= self.min_requests
+            and self.error_rate >= self.failure_rate_threshold
+        )
+
+    def snapshot(self) -> Dict[str, object]:
+        return {
+            "state": self.state,
+            "error_rate": round(self.error_rate, 3),
+            "avg_latency": self.avg_latency,
+            "consecutive_failures": self.consecutive_failures,
+            "last_status": self.last_status,
+        }
 
 
 class TranscriberRegistry:
     """Registry of available transcription backends."""
 
-    def __init__(self, default_provider: str, transcribers: Dict[str, object]) -> None:
+    def __init__(
+        self,
+        default_provider: str,
+        transcribers: Dict[str, object],
+        *,
+        health_options: Optional[Dict[str, float]] = None,
+    ) -> None:
         if not transcribers:
             raise ValueError("At least one transcriber must be configured.")
         if default_provider not in transcribers:
             raise ValueError("Default provider must exist within the transcribers mapping.")
         self._default = default_provider
         self._transcribers = transcribers
+        self._health = {
+            name: ProviderHealth(**(health_options or {})) for name in transcribers
+        }
 
     @property
     def default_provider(self) -> str:
@@ -25,6 +164,98 @@ class TranscriberRegistry:
     def get(self, name: str) -> Optional[object]:
         return self._transcribers.get(name)
 
+    def health(self, name: str) -> Optional[ProviderHealth]:
+        return self._health.get(name)
+
+    def is_available(self, name: str) -> bool:
+        health = self._health.get(name)
+        return health is not None and health.is_available()
+
+    def accepts(self, name: str, duration: Optional[float]) -> bool:
+        """Whether ``name`` takes media of ``duration`` (local backends are capped)."""
+        accepts = getattr(self._transcribers.get(name), "accepts", None)
+        return accepts(duration) if accepts else name in self._transcribers
+
+    def has_duration_limits(self) -> bool:
+        return any(hasattr(t, "accepts") for t in self._transcribers.values())
+
+    def select(self, name: str, duration: Optional[float] = None) -> Optional[str]:
+        """Return ``name`` if its circuit admits a request, else a healthy fallback.
+
+        Only checks availability; ``request`` claims the circuit when the call
+        is actually sent.
+        """
+        if name not in self._transcribers:
+            name = self._default
+        candidates = [name] + [other for other in self._transcribers if other != name]
+        for candidate in candidates:
+            if not self.accepts(candidate, duration):
+                continue
+            if self._health[candidate].is_available():
+                if candidate != name and not self.accepts(name, duration):
+                    logger.info(
+                        "Durasi %s di luar batas provider %s; memakai %s",
+                        duration,
+                        name,
+                        candidate,
+                    )
+                elif candidate != name:
+                    logger.warning(
+                        "Circuit %s %s; mengalihkan task ke %s",
+                        name,
+                        self._health[name].state,
+                        candidate,
+                    )
+                return candidate
+        return None
+
+    @contextmanager
+    def request(self, transcriber: object) -> Iterator[None]:
+        """Hold ``transcriber``'s circuit for one provider call.
+
+        Raises ``ProviderUnavailable`` if the circuit is open or its half-open
+        probe is taken. A probe is released on every exit; ``record_outcome``
+        inside the block closes or reopens the circuit first.
+        """
+        name = getattr(transcriber, "provider_name", None)
+        health = self._health.get(name) if name else None
+        if health is None:
+            yield
+            return
+        probing = health.state != CLOSED
+        if not health.allow_request():
+            raise ProviderUnavailable(f"Circuit {name} {health.state}")
+        try:
+            yield
+        finally:
+            if probing:
+                health.release_probe()
+
+    def record_outcome(
+        self,
+        transcriber: object,
+        latency: Optional[float] = None,
+        error: Optional[BaseException] = None,
+    ) -> None:
+        name = getattr(transcriber, "provider_name", None)
+        health = self._health.get(name) if name else None
+        if health is None:
+            return
+        if error is None:
+            if health.state != CLOSED:
+                logger.info("Circuit %s pulih setelah probe sukses", name)
+            health.record_success(latency)
+        elif is_provider_failure(error):
+            response = getattr(error, "response", None)
+            health.record_failure(getattr(response, "status_code", None))
+            if health.state == OPEN:
+                logger.warning(
+                    "Circuit %s terbuka (error rate %.0f%%, %d gagal beruntun)",
+                    name,
+                    health.error_rate * 100,
+                    health.consecutive_failures,
+                )
+
 
 @dataclass
 class ProviderPreferences:
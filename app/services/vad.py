@@ -0,0 +1,299 @@
+from __future__ import annotations
+
+import bisect
+import logging
+import subprocess
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+Region = Tuple[float, float]
+
+
+@dataclass
+class TimelineMap:
+    """Map timestamps on the trimmed (speech-only) audio back to the original."""
+
+    regions: List[Region]
+    original_duration: float
+    _trimmed_starts: List[float] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        offset = 0.0
+        self._trimmed_starts = []
+        for start, end in self.regions:
+            self._trimmed_starts.append(offset)
+            offset += end - start
+
+    @property
+    def kept_duration(self) -> float:
+        return sum(end - start for start, end in self.regions)
+
+    @property
+    def savings_ratio(self) -> float:
+        if self.original_duration <= 0:
+            return 0.0
+        return 1 - self.kept_duration / self.original_duration
+
+    def to_original(
+        self, seconds: Optional[float], *, is_end: bool = False
+    ) -> Optional[float]:
+        if seconds is None or not self.regions:
+            return seconds
+        # An end time sitting exactly on a cut belongs to the earlier region.
+        finder = bisect.bisect_left if is_end else bisect.bisect_right
+        idx = max(0, finder(self._trimmed_starts, seconds) - 1)
+        start, end = self.regions[idx]
+        return min(end, start + (seconds - self._trimmed_starts[idx]))
+
+    def remap_segments(self, segments: Optional[List[dict]]) -> Optional[List[dict]]:
+        if not segments:
+            return segments
+        remapped = []
+        for segment in segments:
+            if not isinstance(segment, dict):
+                remapped.append(segment)
+                continue
+            updated = dict(segment)
+            updated["start"] = self.to_original(segment.get("start"))
+            updated["end"] = self.to_original(segment.get("end"), is_end=True)
+            remapped.append(updated)
+        return remapped
+
+
+class VoiceActivityDetector:
+    """Energy/zero-crossing speech detector that cuts silence with ffmpeg."""
+
+    def __init__(
+        self,
+        *,
+        sample_rate: int = 16000,
+        frame_ms: int = 30,
+        energy_margin_db: float = 12.0,
+        min_energy_db: float = -55.0,
+        zcr_threshold: float = 0.15,
+        min_speech_ms: int = 250,
+        min_silence_ms: int = 800,
+        padding_ms: int = 250,
+        min_duration: float = 60.0,
+        min_savings: float = 0.1,
+    ) -> None:
+        self.min_duration = min_duration
+        self.min_savings = min_savings
+        self.sample_rate = sample_rate
+        self.frame_size = int(sample_rate * frame_ms / 1000)
+        self.frame_seconds = self.frame_size / sample_rate
+        self.energy_margin_db = energy_margin_db
+        self.min_energy_db = min_energy_db
+        self.zcr_threshold = zcr_threshold
+        self.min_speech_frames = max(1, int(min_speech_ms / frame_ms))
+        self.min_silence_frames = max(1, int(min_silence_ms / frame_ms))
+        self.padding_frames = int(padding_ms / frame_ms)
+
+    def detect(self, source_path: Path) -> Tuple[List[Region], float]:
+        """Return speech regions (in seconds) and the decoded duration."""
+        energies, zcrs = self._frame_features(source_path)
+        duration = len(energies) * self.frame_seconds
+        if not len(energies):
+            return [], 0.0
+
+        voiced = self._classify(energies, zcrs)
+        voiced = self._smooth(voiced)
+        return self._to_regions(voiced), duration
+
+    def trim(
+        self,
+        source_path: Path,
+        target_path: Path,
+        regions: List[Region],
+        original_duration: float,
+        *,
+        bitrate: str,
+        channels: int,
+    ) -> TimelineMap:
+        """Encode only ``regions`` of ``source_path`` into ``target_path``."""
+        script_path = target_path.with_suffix(".vad.txt")
+        selection = "+".join(
+            f"between(t,{start:.3f},{end:.3f})" for start, end in regions
+        )
+        script_path.write_text(
+            f"aselect='{selection}',asetpts=N/SR/TB", encoding="utf-8"
+        )
+        command = [
+            "ffmpeg",
+            "-y",
+            "-i",
+            str(source_path),
+            "-map",
+            "0:a:0",
+            "-vn",
+            "-filter_script:a",
+            str(script_path),
+            "-ac",
+            str(channels),
+            "-ar",
+            str(self.sample_rate),
+            "-codec:a",
+            "libmp3lame",
+            "-b:a",
+            bitrate,
+            str(target_path),
+        ]
+        try:
+            subprocess.run(
+                command,
+                check=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+            )
+        finally:
+            script_path.unlink(missing_ok=True)
+        return TimelineMap(regions=regions, original_duration=original_duration)
+
+    def trim_silence(
+        self,
+        source_path: Path,
+        *,
+        bitrate: str,
+        channels: int,
+    ) -> Optional[Tuple[Path, TimelineMap]]:
+        """Cut silence out of ``source_path`` if it saves at least ``min_savings``."""
+        regions, duration = self.detect(source_path)
+        if not regions:
+            logger.info(
+                "VAD found no speech in %s; sending original audio", source_path.name
+            )
+            return None
+
+        kept = sum(end - start for start, end in regions)
+        savings = 1 - kept / duration if duration else 0.0
+        if savings < self.min_savings:
+            logger.info(
+                "VAD savings for %s only %.1f%%; skipping trim",
+                source_path.name,
+                savings * 100,
+            )
+            return None
+
+        target_path = source_path.with_name(f"{source_path.stem}.speech.mp3")
+        timeline = self.trim(
+            source_path,
+            target_path,
+            regions,
+            duration,
+            bitrate=bitrate,
+            channels=channels,
+        )
+        logger.info(
+            "✂️ VAD trimmed %s: %.1fs → %.1fs (%.1f%% silence removed, %d regions)",
+            source_path.name,
+            duration,
+            kept,
+            savings * 100,
+            len(regions),
+        )
+        return target_path, timeline
+
+    def _frame_features(self, source_path: Path) -> Tuple[np.ndarray, np.ndarray]:
+        command = [
+            "ffmpeg",
+            "-v",
+            "error",
+            "-i",
+            str(source_path),
+            "-map",
+            "0:a:0",
+            "-vn",
+            "-ac",
+            "1",
+            "-ar",
+            str(self.sample_rate),
+            "-f",
+            "s16le",
+            "-",
+        ]
+        # Stream PCM in blocks so long recordings never sit in memory whole.
+        block_bytes = self.frame_size * 2 * 1000
+        energies: List[np.ndarray] = []
+        zcrs: List[np.ndarray] = []
+        leftover = b""
+        with subprocess.Popen(
+            command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+        ) as process:
+            assert process.stdout is not None
+            while True:
+                chunk = process.stdout.read(block_bytes)
+                if not chunk:
+                    break
+                data = leftover + chunk
+                usable = len(data) - len(data) % (self.frame_size * 2)
+                leftover = data[usable:]
+                if not usable:
+                    continue
+                frames = np.frombuffer(data[:usable], dtype="<i2").reshape(
+                    -1, self.frame_size
+                )
+                samples = frames.astype(np.float32) / 32768.0
+                rms = np.sqrt(np.mean(samples * samples, axis=1))
+                energies.append(20 * np.log10(np.maximum(rms, 1e-10)))
+                signs = np.signbit(samples)
+                zcrs.append(np.mean(signs[:, 1:] != signs[:, :-1], axis=1))
+            if process.wait() != 0:
+                raise subprocess.CalledProcessError(process.returncode, command)
+
+        if not energies:
+            return np.empty(0), np.empty(0)
+        return np.concatenate(energies), np.concatenate(zcrs)
+
+    def _classify(self, energies: np.ndarray, zcrs: np.ndarray) -> np.ndarray:
+        noise_floor = float(np.percentile(energies, 10))
+        threshold = max(self.min_energy_db, noise_floor + self.energy_margin_db)
+        loud = energies >= threshold
+        # Unvoiced consonants are quiet but noisy; keep them if near threshold.
+        fricative = (energies >= threshold - self.energy_margin_db / 2) & (
+            zcrs >= self.zcr_threshold
+        )
+        return loud | fricative
+
+    def _smooth(self, voiced: np.ndarray) -> np.ndarray:
+        voiced = voiced.copy()
+        runs = _runs(voiced)
+
+        for start, end, value in runs:
+            if not value and end - start < self.min_silence_frames:
+                voiced[start:end] = True
+        for start, end, value in _runs(voiced):
+            if value and end - start < self.min_speech_frames:
+                voiced[start:end] = False
+
+        if self.padding_frames:
+            padded = voiced.copy()
+            for start, end, value in _runs(voiced):
+                if value:
+                    padded[
+                        max(0, start - self.padding_frames) : end + self.padding_frames
+                    ] = True
+            voiced = padded
+        return voiced
+
+    def _to_regions(self, voiced: np.ndarray) -> List[Region]:
+        return [
+            (start * self.frame_seconds, end * self.frame_seconds)
+            for start, end, value in _runs(voiced)
+            if value
+        ]
+
+
+def _runs(mask: np.ndarray) -> List[Tuple[int, int, bool]]:
+    if not len(mask):
+        return []
+    changes = np.flatnonzero(mask[1:] != mask[:-1]) + 1
+    bounds = np.concatenate(([0], changes, [len(mask)]))
+    return [
+        (int(bounds[idx]), int(bounds[idx + 1]), bool(mask[bounds[idx]]))
+        for idx in range(len(bounds) - 1)
+    ]
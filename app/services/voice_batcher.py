@@ -0,0 +1,323 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import subprocess
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from .executors import StageExecutors
+from .groq_service import TranscriptionResult
+from .provider_gateway import ProviderGateway
+from .transcode_planner import probe_media
+
+logger = logging.getLogger(__name__)
+
+# Longer than Deepgram's 2s segment-flush gap so clips never share a segment.
+DEFAULT_GAP_SECONDS = 3.0
+# Backstop for a clip whose batch never resolves it; batches are short audio.
+DEFAULT_RESULT_TIMEOUT = 900.0
+# Slack for provider timestamps before a segment counts as touching a clip.
+BOUNDARY_TOLERANCE = 0.1
+
+
+class SegmentSpansClips(ValueError):
+    """A segment of the batch transcript overlaps more than one clip."""
+
+
+@dataclass
+class _PendingClip:
+    path: Path
+    duration: float
+    future: asyncio.Future
+
+
+@dataclass
+class _Batch:
+    transcriber: object
+    clips: List[_PendingClip] = field(default_factory=list)
+    timer: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def duration(self) -> float:
+        return sum(clip.duration for clip in self.clips)
+
+
+class VoiceNoteBatcher:
+    """Coalesce short clips arriving close together into one provider request.
+
+    Callers pick the batch ``key``; it must include the chat so audio from
+    different chats never shares a request.
+    """
+
+    def __init__(
+        self,
+        stage_executors: StageExecutors,
+        provider_gateway: ProviderGateway,
+        *,
+        window_seconds: float = 2.0,
+        max_clip_duration: float = 15.0,
+        max_batch_clips: int = 10,
+        max_batch_duration: float = 120.0,
+        gap_seconds: float = DEFAULT_GAP_SECONDS,
+        sample_rate: int = 16000,
+        bitrate: str = "64k",
+        result_timeout: float = DEFAULT_RESULT_TIMEOUT,
+    ) -> None:
+        self.stage_executors = stage_executors
+        self.gateway = provider_gateway
+        self.window_seconds = window_seconds
+        self.max_clip_duration = max_clip_duration
+        self.max_batch_clips = max(1, max_batch_clips)
+        self.max_batch_duration = max_batch_duration
+        self.gap_seconds = gap_seconds
+        self.sample_rate = sample_rate
+        self.bitrate = bitrate
+        self.result_timeout = result_timeout
+        self._batches: Dict[str, _Batch] = {}
+        self._flush_tasks: Set[asyncio.Task] = set()
+        self.requests_sent = 0
+        self.clips_transcribed = 0
+
+    def accepts(self, duration: Optional[float]) -> bool:
+        return duration is not None and 0 < duration <= self.max_clip_duration
+
+    async def transcribe(
+        self,
+        key: str,
+        transcriber: object,
+        file_path: Path,
+        duration: float,
+    ) -> TranscriptionResult:
+        """Queue ``file_path`` into the batch for ``key`` and await its own result."""
+        loop = asyncio.get_running_loop()
+        batch = self._batches.get(key)
+        if batch is None:
+            batch = _Batch(transcriber=transcriber)
+            self._batches[key] = batch
+            batch.timer = loop.call_later(
+                self.window_seconds, self._schedule_flush, key
+            )
+
+        clip = _PendingClip(
+            path=file_path, duration=duration, future=loop.create_future()
+        )
+        batch.clips.append(clip)
+
+        if (
+            len(batch.clips) >= self.max_batch_clips
+            or batch.duration >= self.max_batch_duration
+        ):
+            self._schedule_flush(key)
+
+        # On timeout the future is cancelled, so a late flush skips this clip.
+        return await asyncio.wait_for(clip.future, self.result_timeout)
+
+    def _schedule_flush(self, key: str) -> None:
+        batch = self._batches.pop(key, None)
+        if batch is None:
+            return
+        if batch.timer:
+            batch.timer.cancel()
+        flush_task = asyncio.ensure_future(self._flush(key, batch))
+        self._flush_tasks.add(flush_task)
+        flush_task.add_done_callback(self._flush_tasks.discard)
+
+    async def _flush(self, key: str, batch: _Batch) -> None:
+        clips = [clip for clip in batch.clips if not clip.future.done()]
+        if not clips:
+            return
+        try:
+            await self._flush_clips(key, batch, clips)
+        except BaseException as exc:
+            # Every waiting task holds a worker slot: never leave one pending.
+            for clip in clips:
+                if clip.future.done():
+                    continue
+                if isinstance(exc, asyncio.CancelledError):
+                    clip.future.cancel()
+                else:
+                    clip.future.set_exception(exc)
+            if not isinstance(exc, Exception):
+                raise
+            logger.exception("Batch %s gagal", key)
+
+    async def _flush_clips(
+        self, key: str, batch: _Batch, clips: List[_PendingClip]
+    ) -> None:
+        if len(clips) == 1:
+            await self._transcribe_single(batch.transcriber, clips[0])
+            return
+
+        batch_path = clips[0].path.with_name(f"batch_{uuid.uuid4().hex[:8]}.mp3")
+        try:
+            offsets = await self.stage_executors.cpu.run(
+                self._build_batch_audio, clips, batch_path
+            )
+        except (OSError, subprocess.CalledProcessError) as exc:
+            logger.warning("Gagal menggabungkan %d voice note: %s", len(clips), exc)
+            await asyncio.gather(
+                *(self._transcribe_single(batch.transcriber, clip) for clip in clips)
+            )
+            return
+
+        logger.info(
+            "📦 Batch %s: %d clips (%.1fs audio) in one request",
+            key,
+            len(clips),
+            sum(clip.duration for clip in clips),
+        )
+        try:
+            result = await self._call(
+                batch.transcriber,
+                batch_path,
+                sum(clip.duration for clip in clips)
+                + self.gap_seconds * (len(clips) - 1),
+            )
+        except Exception as exc:  # noqa: BLE001
+            for clip in clips:
+                if not clip.future.done():
+                    clip.future.set_exception(exc)
+            return
+        finally:
+            batch_path.unlink(missing_ok=True)
+
+        if not result.segments:
+            # Without timestamps the text cannot be attributed; fall back.
+            logger.warning(
+                "Batch %s returned no segments; transcribing clips individually", key
+            )
+            await asyncio.gather(
+                *(self._transcribe_single(batch.transcriber, clip) for clip in clips)
+            )
+            return
+
+        try:
+            clip_results = self.split_result(result, clips, offsets)
+        except SegmentSpansClips as exc:
+            logger.warning("Batch %s: %s; transcribing clips individually", key, exc)
+            await asyncio.gather(
+                *(self._transcribe_single(batch.transcriber, clip) for clip in clips)
+            )
+            return
+
+        self.clips_transcribed += len(clips)
+        for clip, clip_result in zip(clips, clip_results):
+            if not clip.future.done():
+                clip.future.set_result(clip_result)
+
+    async def _transcribe_single(self, transcriber: object, clip: _PendingClip) -> None:
+        try:
+            result = await self._call(transcriber, clip.path, clip.duration)
+        except Exception as exc:  # noqa: BLE001
+            if not clip.future.done():
+                clip.future.set_exception(exc)
+            return
+        self.clips_transcribed += 1
+        if not clip.future.done():
+            clip.future.set_result(result)
+
+    async def _call(
+        self, transcriber: object, file_path: Path, audio_seconds: float
+    ) -> TranscriptionResult:
+        self.requests_sent += 1
+        return await self.gateway.transcribe(transcriber, file_path, audio_seconds)
+
+    def _build_batch_audio(
+        self, clips: List[_PendingClip], target_path: Path
+    ) -> List[float]:
+        """Concatenate clips with silence gaps; return each clip's start offset."""
+        for clip in clips:
+            probe = probe_media(clip.path)
+            if probe and probe.duration:
+                clip.duration = probe.duration
+
+        command = ["ffmpeg", "-y"]
+        filters = []
+        for idx, clip in enumerate(clips):
+            command += ["-i", str(clip.path)]
+            filters.append(
+                f"[{idx}:a:0]aresample={self.sample_rate},"
+                f"aformat=sample_fmts=s16:channel_layouts=mono,"
+                f"apad=pad_dur={self.gap_seconds}[a{idx}]"
+            )
+        inputs = "".join(f"[a{idx}]" for idx in range(len(clips)))
+        filters.append(f"{inputs}concat=n={len(clips)}:v=0:a=1[out]")
+        command += [
+            "-filter_complex",
+            ";".join(filters),
+            "-map",
+            "[out]",
+            "-codec:a",
+            "libmp3lame",
+            "-b:a",
+            self.bitrate,
+            str(target_path),
+        ]
+        subprocess.run(
+            command,
+            check=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+
+        offsets = []
+        position = 0.0
+        for clip in clips:
+            offsets.append(position)
+            position += clip.duration + self.gap_seconds
+        return offsets
+
+    def split_result(
+        self,
+        result: TranscriptionResult,
+        clips: List[_PendingClip],
+        offsets: List[float],
+    ) -> List[TranscriptionResult]:
+        """Assign each segment to the clip whose audio it overlaps.
+
+        Segments inside a silence gap go to the clip before it. Raises
+        ``SegmentSpansClips`` if a segment overlaps two clips, since its words
+        cannot be attributed.
+        """
+        per_clip: List[List[dict]] = [[] for _ in clips]
+        for segment in result.segments or []:
+            if not isinstance(segment, dict):
+                continue
+            start = float(segment.get("start") or 0.0)
+            end = float(segment.get("end") or start)
+            touched = [
+                idx
+                for idx, (clip, offset) in enumerate(zip(clips, offsets))
+                if start < offset + clip.duration - BOUNDARY_TOLERANCE
+                and end > offset + BOUNDARY_TOLERANCE
+            ]
+            if len(touched) > 1:
+                raise SegmentSpansClips(
+                    f"segment {start:.2f}-{end:.2f}s spans clips {touched}"
+                )
+            if touched:
+                idx = touched[0]
+            else:
+                idx = max(
+                    (idx for idx, offset in enumerate(offsets) if start >= offset),
+                    default=0,
+                )
+            offset = offsets[idx]
+            duration = clips[idx].duration
+            shifted = dict(segment)
+            shifted["start"] = min(max(0.0, start - offset), duration)
+            shifted["end"] = min(max(0.0, end - offset), duration)
+            per_clip[idx].append(shifted)
+
+        results = []
+        for segments in per_clip:
+            text = " ".join(
+                segment.get("text", "").strip()
+                for segment in segments
+                if segment.get("text")
+            )
+            results.append(TranscriptionResult(text=text, segments=segments or None))
+        return results
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import signal
+from typing import Callable, Iterable
+
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+
+from .config import Settings
+
+logger = logging.getLogger(__name__)
+
+RouteRegistrar = Callable[[web.Application], None]
+
+
+def webhook_endpoint(settings: Settings) -> str:
+    path = settings.webhook_path
+    if not path.startswith("/"):
+        path = f"/{path}"
+    return f"{settings.webhook_url.rstrip('/')}{path}"
+
+
+def build_webhook_app(
+    bot: Bot,
+    dispatcher: Dispatcher,
+    settings: Settings,
+    *,
+    extra_routes: Iterable[RouteRegistrar] = (),
+) -> web.Application:
+    """aiohttp app that feeds Telegram updates into ``dispatcher``.
+
+    Updates are acknowledged with 200 immediately and handled in background
+    tasks, so a slow handler never makes Telegram retry or back off.
+    """
+    app = web.Application()
+    SimpleRequestHandler(
+        dispatcher=dispatcher,
+        bot=bot,
+        handle_in_background=True,
+        secret_token=settings.webhook_secret,
+    ).register(app, path=settings.webhook_path)
+    for register in extra_routes:
+        register(app)
+
+    async def on_startup(bot: Bot) -> None:
+        url = webhook_endpoint(settings)
+        await bot.set_webhook(
+            url,
+            secret_token=settings.webhook_secret,
+            allowed_updates=dispatcher.resolve_used_update_types(),
+        )
+        logger.info("🌐 Webhook terpasang di %s", url)
+
+    async def on_shutdown(bot: Bot) -> None:
+        if settings.webhook_delete_on_shutdown:
+            await bot.delete_webhook()
+            logger.info("Webhook dihapus")
+
+    dispatcher.startup.register(on_startup)
+    dispatcher.shutdown.register(on_shutdown)
+    setup_application(app, dispatcher, bot=bot)
+    return app
+
+
+async def run_webhook(
+    bot: Bot,
+    dispatcher: Dispatcher,
+    settings: Settings,
+    *,
+    extra_routes: Iterable[RouteRegistrar] = (),
+) -> None:
+    """Serve the webhook until SIGTERM/SIGINT or cancellation, then shut down."""
+    app = build_webhook_app(bot, dispatcher, settings, extra_routes=extra_routes)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, settings.webhook_host, settings.webhook_port)
+    await site.start()
+    logger.info(
+        "Webhook server listening on %s:%d%s",
+        settings.webhook_host,
+        settings.webhook_port,
+        settings.webhook_path,
+    )
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:  # Windows
+            pass
+    try:
+        await stop.wait()
+        logger.info("Sinyal berhenti diterima, menutup webhook server")
+    finally:
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.remove_signal_handler(sig)
+            except NotImplementedError:
+                pass
+        await runner.cleanup()
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import signal
+from typing import Any, Optional
+
+from aiogram import Bot
+
+from .config import Settings, load_settings
+from .handlers.media import (
+    PROCESSOR_DEPENDENCIES,
+    meta_from_job,
+    process_transcription,
+)
+from .main import build_dependencies, close_dependencies, configure_logging
+from .services.broker import Job, JobBroker, build_broker, worker_id
+from .services.delivery import DeliveryOptions, DeliveryPreferences
+from .services.outbound import OutboundSender
+from .services.reply_target import ReplyTarget
+
+logger = logging.getLogger(__name__)
+
+POLL_TIMEOUT = 5.0
+
+
+async def run_worker(settings: Optional[Settings] = None) -> None:
+    """Pull jobs from the broker and run the transcription pipeline on them.
+
+    Runs without a dispatcher: replies go straight through the Bot API, so
+    any number of worker processes (on any host that reaches the broker) can
+    share the load of a single front-end. SIGTERM stops taking new jobs and
+    gives running ones ``shutdown_grace_seconds`` before handing them back.
+    """
+    settings = settings or load_settings()
+    bot = Bot(settings.telegram_bot_token)
+    broker = build_broker(
+        settings.broker_url, visibility_timeout=settings.broker_visibility_timeout
+    )
+    dependencies = await build_dependencies(
+        settings, serve_callbacks=False, queue_depth=broker.size
+    )
+    processor_kwargs = {name: dependencies[name] for name in PROCESSOR_DEPENDENCIES}
+
+    # Resized at runtime by the autoscaler and /workers.
+    slots = dependencies["worker_limiter"]
+    running: set[asyncio.Task] = set()
+    logger.info(
+        "👷 Worker %s started (slots: %d, broker: %s)",
+        worker_id(),
+        slots.limit,
+        settings.broker_url,
+    )
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:  # Windows
+            pass
+
+    def release(task: asyncio.Task) -> None:
+        running.discard(task)
+        slots.release()
+
+    try:
+        while not stop.is_set():
+            await slots.acquire()
+            try:
+                job = None if stop.is_set() else await broker.get(timeout=POLL_TIMEOUT)
+            except BaseException:
+                slots.release()
+                raise
+            if job is None:
+                slots.release()
+                continue
+            task = asyncio.ensure_future(
+                _run_job(
+                    bot,
+                    broker,
+                    job,
+                    processor_kwargs,
+                    settings,
+                    dependencies["outbound_sender"],
+                    dependencies["delivery_preferences"],
+                )
+            )
+            running.add(task)
+            task.add_done_callback(release)
+        if running:
+            logger.info(
+                "⏳ Worker berhenti: menunggu %d job (maks %ds)",
+                len(running),
+                settings.shutdown_grace_seconds,
+            )
+            await asyncio.wait(set(running), timeout=settings.shutdown_grace_seconds)
+    finally:
+        for task in list(running):
+            task.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+        await close_dependencies(dependencies)
+        await broker.close()
+        await bot.session.close()
+
+
+async def _run_job(
+    bot: Bot,
+    broker: JobBroker,
+    job: Job,
+    processor_kwargs: dict[str, Any],
+    settings: Settings,
+    outbound_sender: Optional[OutboundSender] = None,
+    delivery_preferences: Optional[DeliveryPreferences] = None,
+) -> None:
+    target = ReplyTarget(
+        bot=bot,
+        chat_id=job.chat_id,
+        message_id=job.message_id,
+        source_name=job.source_name,
+        sender=outbound_sender,
+        delivery=(
+            delivery_preferences.options(job.delivery)
+            if delivery_preferences
+            else DeliveryOptions()
+        ),
+    )
+    meta = meta_from_job(job)
+    logger.info("Job %s diambil untuk chat %s", job.job_id[:8], job.chat_id)
+    heartbeat = asyncio.create_task(
+        _keep_claimed(broker, job, settings.broker_visibility_timeout / 3)
+    )
+    try:
+        await process_transcription(
+            target=target,
+            meta=meta,
+            requested_provider=job.provider,
+            requested_model=job.model,
+            job_id=job.job_id,
+            queued_at=job.created_at,
+            **processor_kwargs,
+        )
+    except asyncio.CancelledError:
+        # Shutting down: hand the job back so another worker picks it up.
+        await asyncio.shield(broker.nack(job))
+        raise
+    except Exception:  # noqa: BLE001
+        logger.exception("Job %s gagal", job.job_id[:8])
+        if job.attempts < settings.queue_max_retries:
+            await broker.nack(job)
+            return
+    finally:
+        heartbeat.cancel()
+    await broker.ack(job)
+
+
+async def _keep_claimed(broker: JobBroker, job: Job, interval: float) -> None:
+    """Extend the job's claim so a long transcription is not handed out again."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await broker.touch(job)
+        except Exception:  # noqa: BLE001
+            logger.warning("Gagal memperpanjang klaim job %s", job.job_id[:8])
+
+
+def main() -> None:
+    configure_logging()
+    asyncio.run(run_worker())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""Micro-benchmarks for pure-Python code that runs on every task.
+
+Inputs are synthetic transcripts from 10 seconds to 5 hours of speech.
+Needs ``pytest`` and ``pytest-benchmark``; the file is named ``bench_*`` so
+a plain ``pytest`` run does not pick it up.
+
+Save a baseline on the reference machine::
+
+    pytest benchmarks/bench_hot_paths.py \\
+        --benchmark-storage=benchmarks/baselines --benchmark-save=baseline
+
+Compare a change against it, failing on a >20% median regression::
+
+    pytest benchmarks/bench_hot_paths.py \\
+        --benchmark-storage=benchmarks/baselines \\
+        --benchmark-compare --benchmark-compare-fail=median:20%
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+from datetime import datetime
+
+import pytest
+from aiogram.types import Message
+
+from app.handlers.media import _pick_media, _sanitize_filename
+from app.services.audio_optimizer import TranscriptCache
+from app.services.deepgram_service import DeepgramTranscriber
+from app.services.groq_service import GroqTranscriber, TranscriptionResult
+
+WORDS_PER_SECOND = 2.5
+SEGMENT_SECONDS = 5.0
+VOCABULARY = (
+    "jadi kita akan membahas transkripsi audio yang panjang dan pendek "
+    "dengan beberapa pembicara berbeda di dalam satu rekaman"
+).split()
+
+DURATIONS = {
+    "10s": 10,
+    "1m": 60,
+    "10m": 600,
+    "1h": 3600,
+    "5h": 5 * 3600,
+}
+
+
+def _words(seconds: float, seed: int = 7) -> list[dict]:
+    """Deepgram-style word list with sentence ends and occasional pauses."""
+    rng = random.Random(seed)
+    words = []
+    clock = 0.0
+    for index in range(int(seconds * WORDS_PER_SECOND)):
+        word = rng.choice(VOCABULARY)
+        length = 1 / WORDS_PER_SECOND
+        punctuated = word.capitalize() if index % 12 == 0 else word
+        if index % 12 == 11:
+            punctuated += rng.choice(".?!")
+        words.append(
+            {
+                "word": word,
+                "punctuated_word": punctuated,
+                "start": round(clock, 3),
+                "end": round(clock + length * 0.8, 3),
+                "confidence": 0.98,
+            }
+        )
+        clock += length + (2.5 if index % 97 == 96 else 0.0)
+    return words
+
+
+def _segments(words: list[dict]) -> list[dict]:
+    """Group words into Groq-style ``verbose_json`` segments."""
+    segments = []
+    for offset in range(0, len(words), int(SEGMENT_SECONDS * WORDS_PER_SECOND)):
+        chunk = words[offset : offset + int(SEGMENT_SECONDS * WORDS_PER_SECOND)]
+        segments.append(
+            {
+                "id": len(segments),
+                "start": chunk[0]["start"],
+                "end": chunk[-1]["end"],
+                "text": " " + " ".join(word["punctuated_word"] for word in chunk),
+            }
+        )
+    return segments
+
+
+@pytest.fixture(scope="module", params=list(DURATIONS), ids=list(DURATIONS))
+def transcript(request) -> dict:
+    words = _words(DURATIONS[request.param])
+    segments = _segments(words)
+    return {
+        "words": words,
+        "segments": segments,
+        "text": "".join(segment["text"] for segment in segments).strip(),
+    }
+
+
+@pytest.fixture(scope="module")
+def event_loop_runner():
+    loop = asyncio.new_event_loop()
+    yield loop.run_until_complete
+    loop.close()
+
+
+def test_to_srt(benchmark, transcript) -> None:
+    result = TranscriptionResult(
+        text=transcript["text"], segments=transcript["segments"]
+    )
+    srt = benchmark(result.to_srt)
+    assert srt.startswith("1\n")
+
+
+def test_format_timestamp(benchmark) -> None:
+    stamps = [index * 1.337 for index in range(1000)]
+
+    def run() -> None:
+        for seconds in stamps:
+            TranscriptionResult._format_timestamp(seconds)
+
+    benchmark(run)
+
+
+def test_deepgram_build_segments(benchmark, transcript) -> None:
+    transcriber = DeepgramTranscriber("benchmark")
+    segments = benchmark(transcriber._build_segments, transcript["words"])
+    assert segments
+
+
+def test_deepgram_parse_response(benchmark, transcript) -> None:
+    transcriber = DeepgramTranscriber("benchmark")
+    payload = {
+        "results": {
+            "channels": [
+                {
+                    "alternatives": [
+                        {"transcript": transcript["text"], "words": transcript["words"]}
+                    ]
+                }
+            ]
+        }
+    }
+    text, _ = benchmark(transcriber._parse_response, payload)
+    assert text
+
+
+def test_groq_parse_payload(benchmark, transcript) -> None:
+    payload = {"text": transcript["text"], "segments": transcript["segments"]}
+    result = benchmark(GroqTranscriber.parse_payload, payload)
+    assert result.segments
+
+
+def test_groq_parse_payload_segments_only(benchmark, transcript) -> None:
+    # Text rebuilt from segments: the slower normalization branch.
+    payload = {"text": "", "segments": transcript["segments"]}
+    result = benchmark(GroqTranscriber.parse_payload, payload)
+    assert result.text
+
+
+@pytest.mark.parametrize(
+    "name",
+    ["voice_note.ogg", "Rapat Mingguan (final) — 2024/05/01.m4a", "ü" * 200 + ".mp3"],
+    ids=["plain", "punctuated", "long-unicode"],
+)
+def test_sanitize_filename(benchmark, name) -> None:
+    benchmark(_sanitize_filename, name)
+
+
+@pytest.mark.parametrize("kind", ["voice", "audio", "document"])
+def test_pick_media(benchmark, kind) -> None:
+    media = {
+        "voice": {
+            "voice": {
+                "file_id": "v",
+                "file_unique_id": "v",
+                "duration": 42,
+                "file_size": 300_000,
+            }
+        },
+        "audio": {
+            "audio": {
+                "file_id": "a",
+                "file_unique_id": "a",
+                "duration": 3600,
+                "file_name": "podcast.m4a",
+                "file_size": 60_000_000,
+            }
+        },
+        "document": {
+            "document": {
+                "file_id": "d",
+                "file_unique_id": "d",
+                "file_name": "meeting.wav",
+                "mime_type": "audio/wav",
+                "file_size": 200_000_000,
+            }
+        },
+    }[kind]
+    message = Message.model_validate(
+        {
+            "message_id": 1,
+            "date": int(datetime.now().timestamp()),
+            "chat": {"id": 1, "type": "private"},
+            **media,
+        }
+    )
+    assert benchmark(_pick_media, message) is not None
+
+
+def test_cache_set(benchmark, transcript, event_loop_runner) -> None:
+    cache = TranscriptCache(max_size=1000)
+    keys = iter(range(10**9))
+
+    def run() -> None:
+        event_loop_runner(
+            cache.set(f"{next(keys):064x}", transcript["text"], transcript["segments"])
+        )
+
+    benchmark(run)
+
+
+def test_cache_get_hit(benchmark, transcript, event_loop_runner) -> None:
+    cache = TranscriptCache(max_size=1000)
+    event_loop_runner(cache.set("f" * 64, transcript["text"], transcript["segments"]))
+    result = benchmark(lambda: event_loop_runner(cache.get("f" * 64)))
+    assert result is not None
+
+
+def test_cache_get_miss(benchmark, event_loop_runner) -> None:
+    cache = TranscriptCache(max_size=1000)
+    benchmark(lambda: event_loop_runner(cache.get("0" * 64)))
@@ -0,0 +1,464 @@
+"""End-to-end load test against local stand-ins for Telegram and the providers.
+
+Synthetic updates go through the real ``Dispatcher``, handlers, task queue and
+audio pipeline. Only the edges are faked: MTProto downloads are served from an
+ffmpeg-generated file at a fixed bandwidth, the Bot API and Groq/Deepgram are
+small local aiohttp servers with configurable latency and error rates. Needs
+ffmpeg on PATH; no network access.
+
+    python -m benchmarks.load_test --users 10 --files-per-user 2 --audio-seconds 120
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from aiohttp import web
+
+BOT_TOKEN = "123456:LOADTEST"
+CHUNK_SIZE = 256 * 1024
+# Bot API methods whose result aiogram parses as a Message.
+MESSAGE_METHODS = {"sendMessage", "sendDocument", "sendAudio", "editMessageText"}
+
+
+def generate_audio(path: Path, seconds: float, bitrate: str) -> Path:
+    """Mono speech-band tone; continuous, so VAD has nothing to trim."""
+    subprocess.run(
+        [
+            "ffmpeg",
+            "-hide_banner",
+            "-loglevel",
+            "error",
+            "-y",
+            "-f",
+            "lavfi",
+            "-i",
+            f"sine=frequency=440:sample_rate=16000:duration={seconds}",
+            "-ac",
+            "1",
+            "-b:a",
+            bitrate,
+            str(path),
+        ],
+        check=True,
+    )
+    return path
+
+
+def percentile(values: List[float], ratio: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(ratio * len(ordered)))]
+
+
+class FakeTelethonDownloader:
+    """Copy the source file in chunks, paced to ``bandwidth`` bytes/second."""
+
+    def __init__(self, source: Path, bandwidth: float) -> None:
+        self.source = source
+        self.bandwidth = bandwidth
+
+    async def download_media(
+        self, chat_id, message_id, file_path, progress_callback=None
+    ) -> None:
+        total = self.source.stat().st_size
+        copied = 0
+        with self.source.open("rb") as source, open(file_path, "wb") as target:
+            while chunk := source.read(CHUNK_SIZE):
+                target.write(chunk)
+                copied += len(chunk)
+                if progress_callback:
+                    progress_callback(copied, total)
+                await asyncio.sleep(len(chunk) / self.bandwidth)
+
+
+class FakeBotApi:
+    """Answer every Bot API call with a plausible result after ``latency``."""
+
+    def __init__(self, latency: float) -> None:
+        self.latency = latency
+        self.calls: Dict[str, int] = defaultdict(int)
+        self._message_id = 0
+
+    def app(self) -> web.Application:
+        app = web.Application(client_max_size=256 * 1024 * 1024)
+        app.router.add_post("/bot{token}/{method}", self.handle)
+        return app
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        form = await request.post()
+        self.calls[method] += 1
+        await asyncio.sleep(self.latency)
+        if method == "sendMediaGroup":
+            count = len(json.loads(form.get("media", "[]")))
+            result = [self._message(form) for _ in range(max(1, count))]
+        elif method in MESSAGE_METHODS:
+            result = self._message(form)
+        else:
+            result = True
+        return web.json_response({"ok": True, "result": result})
+
+    def _message(self, form) -> dict:
+        self._message_id += 1
+        chat_id = int(form.get("chat_id", 0) or 0)
+        return {
+            "message_id": self._message_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "text": str(form.get("text", "")),
+        }
+
+
+class FakeProviders:
+    """Groq- and Deepgram-shaped endpoints with injected latency and errors.
+
+    Each request takes ``latency + latency_per_mb * payload_mb`` seconds;
+    ``error_rate`` of them fail with HTTP 500 and ``rate_limit_rate`` with
+    HTTP 429 and a ``retry-after`` header.
+    """
+
+    def __init__(
+        self,
+        *,
+        latency: float,
+        latency_per_mb: float,
+        error_rate: float,
+        rate_limit_rate: float,
+        seed: int,
+    ) -> None:
+        self.latency = latency
+        self.latency_per_mb = latency_per_mb
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.errors: Dict[int, int] = defaultdict(int)
+
+    def app(self) -> web.Application:
+        app = web.Application(client_max_size=512 * 1024 * 1024)
+        app.router.add_post("/openai/v1/audio/transcriptions", self.groq)
+        app.router.add_post("/v1/listen", self.deepgram)
+        return app
+
+    async def groq(self, request: web.Request) -> web.Response:
+        failure = await self._serve(request)
+        if failure is not None:
+            return failure
+        segments = [{"start": 0.0, "end": 5.0, "text": " load test transcript"}]
+        return web.json_response({"text": "load test transcript", "segments": segments})
+
+    async def deepgram(self, request: web.Request) -> web.Response:
+        failure = await self._serve(request)
+        if failure is not None:
+            return failure
+        alternative = {"transcript": "load test transcript", "words": []}
+        return web.json_response(
+            {"results": {"channels": [{"alternatives": [alternative]}]}}
+        )
+
+    async def _serve(self, request: web.Request) -> Optional[web.Response]:
+        payload = await request.read()
+        self.requests += 1
+        await asyncio.sleep(
+            self.latency + self.latency_per_mb * len(payload) / (1024 * 1024)
+        )
+        roll = self.random.random()
+        if roll < self.rate_limit_rate:
+            self.errors[429] += 1
+            return web.json_response(
+                {"error": "rate limited"}, status=429, headers={"retry-after": "1"}
+            )
+        if roll < self.rate_limit_rate + self.error_rate:
+            self.errors[500] += 1
+            return web.json_response({"error": "injected failure"}, status=500)
+        return None
+
+
+class StageRecorder:
+    """Span hook collecting stage durations of every finished task."""
+
+    def __init__(self) -> None:
+        self.durations: Dict[str, List[float]] = defaultdict(list)
+        self.finished = 0
+        self.done = asyncio.Event()
+        self.expected = 0
+
+    def span_started(self, trace, span_) -> None:
+        pass
+
+    def span_finished(self, trace, span_) -> None:
+        if span_ is not trace.root:
+            return
+        self.durations["task"].append(span_.duration)
+        for stage in trace.spans:
+            self.durations[stage.name].append(stage.duration)
+        self.finished += 1
+        if self.finished >= self.expected:
+            self.done.set()
+
+
+async def _serve(app: web.Application) -> tuple[web.AppRunner, int]:
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", 0).start()
+    return runner, runner.addresses[0][1]
+
+
+def _configure_environment(args, provider_port: int, workdir: Path) -> None:
+    forced = {
+        "TELEGRAM_BOT_TOKEN": BOT_TOKEN,
+        "TELEGRAM_API_ID": "1",
+        "TELEGRAM_API_HASH": "loadtest",
+        "GROQ_API_KEY": "loadtest" if args.provider == "groq" else "",
+        "DEEPGRAM_API_KEY": "loadtest" if args.provider == "deepgram" else "",
+        "TRANSCRIPTION_PROVIDER": args.provider,
+        "GROQ_BASE_URL": f"http://127.0.0.1:{provider_port}/openai/v1/audio/transcriptions",
+        "DEEPGRAM_BASE_URL": f"http://127.0.0.1:{provider_port}/v1/listen",
+        "DEEPGRAM_CALLBACK_URL": "",
+        "WEBHOOK_URL": "",
+        "APP_MODE": "all",
+        "TRACING_ENABLED": "true",
+        "TRACE_SLOW_REPORT_INTERVAL": "0",
+        "TRACE_EXPORT_PATH": "",
+        "TRACE_OTLP_ENDPOINT": "",
+        "METRICS_ENABLED": "true",
+        "JOB_JOURNAL_PATH": str(workdir / "journal.db"),
+        "QUEUE_RATE_LIMIT_PER_USER": str(max(args.files_per_user, 1)),
+    }
+    defaults = {
+        "CACHE_ENABLED": "true" if args.cache else "false",
+        "JOB_JOURNAL_ENABLED": "false",
+        "ADMISSION_ENABLED": "false",
+        "LOCAL_WHISPER_ENABLED": "false",
+        "GROQ_RATE_LIMIT_RPM": "0",
+        "GROQ_RATE_LIMIT_AUDIO_SECONDS_PER_HOUR": "0",
+        "DEEPGRAM_RATE_LIMIT_RPM": "0",
+        "DEEPGRAM_RATE_LIMIT_AUDIO_SECONDS_PER_HOUR": "0",
+    }
+    if args.workers:
+        forced["QUEUE_MAX_WORKERS"] = str(args.workers)
+    os.environ.update(forced)
+    for key, value in defaults.items():
+        os.environ.setdefault(key, value)
+
+
+def _update(index: int, chat_id: int, audio: Path, seconds: float) -> dict:
+    return {
+        "update_id": index,
+        "message": {
+            "message_id": index,
+            "date": int(datetime.now().timestamp()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": chat_id, "is_bot": False, "first_name": f"load{chat_id}"},
+            "audio": {
+                "file_id": f"load-{index}",
+                "file_unique_id": f"load-{index}",
+                "duration": int(seconds),
+                "file_name": f"load_{index}{audio.suffix}",
+                "mime_type": "audio/mpeg",
+                "file_size": audio.stat().st_size,
+            },
+        },
+    }
+
+
+async def run(args: argparse.Namespace) -> dict:
+    workdir = Path(tempfile.mkdtemp(prefix="transhades-load-"))
+    audio = generate_audio(workdir / "source.mp3", args.audio_seconds, args.bitrate)
+
+    providers = FakeProviders(
+        latency=args.provider_latency,
+        latency_per_mb=args.provider_latency_per_mb,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        seed=args.seed,
+    )
+    bot_api = FakeBotApi(args.telegram_latency)
+    provider_runner, provider_port = await _serve(providers.app())
+    bot_api_runner, bot_api_port = await _serve(bot_api.app())
+    _configure_environment(args, provider_port, workdir)
+
+    # Imported after the environment is in place.
+    from aiogram import Bot, Dispatcher
+    from aiogram.client.session.aiohttp import AiohttpSession
+    from aiogram.client.telegram import TelegramAPIServer
+    from aiogram.types import Update
+
+    from app.config import load_settings
+    from app.handlers import build_router
+    from app.handlers.media import drain_processing
+    from app.main import build_dependencies, close_dependencies
+    from app.middlewares import DependencyMiddleware
+
+    settings = load_settings()
+    bot = Bot(
+        BOT_TOKEN,
+        session=AiohttpSession(
+            api=TelegramAPIServer.from_base(f"http://127.0.0.1:{bot_api_port}")
+        ),
+    )
+    dispatcher = Dispatcher()
+    dispatcher.include_router(build_router())
+    dependencies = await build_dependencies(
+        settings, serve_callbacks=False, serve_metrics=False
+    )
+    dependencies["telethon_downloader"] = FakeTelethonDownloader(
+        audio, args.bandwidth_mbps * 1_000_000 / 8
+    )
+    recorder = StageRecorder()
+    recorder.expected = args.users * args.files_per_user
+    dependencies["task_tracer"].add_hook(recorder)
+    middleware = DependencyMiddleware(**dependencies)
+    dispatcher.message.middleware.register(middleware)
+
+    async def user(number: int) -> None:
+        await asyncio.sleep(args.ramp_seconds * number / max(args.users, 1))
+        chat_id = 10_000 + number
+        for sequence in range(args.files_per_user):
+            index = number * args.files_per_user + sequence + 1
+            update = Update.model_validate(
+                _update(index, chat_id, audio, args.audio_seconds),
+                context={"bot": bot},
+            )
+            await dispatcher.feed_update(bot, update)
+            if args.think_seconds:
+                await asyncio.sleep(args.think_seconds)
+
+    started = time.monotonic()
+    try:
+        await asyncio.gather(*(user(number) for number in range(args.users)))
+        await asyncio.wait_for(recorder.done.wait(), args.timeout)
+    except asyncio.TimeoutError:
+        print(
+            f"timeout: {recorder.finished}/{recorder.expected} tasks finished",
+            file=sys.stderr,
+        )
+    elapsed = time.monotonic() - started
+
+    metrics = dependencies["pipeline_metrics"]
+    report = {
+        "users": args.users,
+        "tasks": recorder.expected,
+        "finished": recorder.finished,
+        "done": int(metrics.tasks.value(outcome="done")),
+        "failed": int(metrics.tasks.value(outcome="failed")),
+        "elapsed_seconds": round(elapsed, 2),
+        "throughput_per_minute": round(recorder.finished / elapsed * 60, 2),
+        "audio_seconds_per_second": round(
+            recorder.finished * args.audio_seconds / elapsed, 2
+        ),
+        "stages": {
+            name: {
+                "count": len(values),
+                "p50": round(percentile(values, 0.50), 3),
+                "p95": round(percentile(values, 0.95), 3),
+                "p99": round(percentile(values, 0.99), 3),
+            }
+            for name, values in sorted(recorder.durations.items())
+        },
+        "peak_rss_mb": round(_peak_rss(resource.RUSAGE_SELF) / 1024 / 1024, 1),
+        "peak_child_rss_mb": round(
+            _peak_rss(resource.RUSAGE_CHILDREN) / 1024 / 1024, 1
+        ),
+        "provider_requests": providers.requests,
+        "provider_errors": dict(providers.errors),
+        "telegram_calls": dict(bot_api.calls),
+    }
+
+    await drain_processing(settings.shutdown_grace_seconds)
+    await close_dependencies(dependencies)
+    await bot.session.close()
+    await provider_runner.cleanup()
+    await bot_api_runner.cleanup()
+    return report
+
+
+def _peak_rss(who: int) -> int:
+    peak = resource.getrusage(who).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def print_report(report: dict) -> None:
+    print(
+        f"{report['finished']}/{report['tasks']} tasks "
+        f"({report['done']} ok, {report['failed']} failed) "
+        f"from {report['users']} users in {report['elapsed_seconds']}s"
+    )
+    print(
+        f"throughput: {report['throughput_per_minute']} tasks/min, "
+        f"{report['audio_seconds_per_second']} audio-s/s"
+    )
+    print(
+        f"peak RSS: {report['peak_rss_mb']} MB "
+        f"(largest ffmpeg child {report['peak_child_rss_mb']} MB)"
+    )
+    print(
+        f"provider requests: {report['provider_requests']}, "
+        f"injected errors: {report['provider_errors'] or 0}"
+    )
+    print()
+    print(f"{'stage':<20}{'n':>6}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for name, stage in report["stages"].items():
+        print(
+            f"{name:<20}{stage['count']:>6}"
+            f"{stage['p50']:>9.2f}s{stage['p95']:>9.2f}s{stage['p99']:>9.2f}s"
+        )
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--files-per-user", type=int, default=1)
+    parser.add_argument("--audio-seconds", type=float, default=60)
+    parser.add_argument("--bitrate", default="64k")
+    parser.add_argument(
+        "--bandwidth-mbps",
+        type=float,
+        default=50,
+        help="simulated MTProto download speed per file (megabit/s)",
+    )
+    parser.add_argument("--provider", choices=("groq", "deepgram"), default="groq")
+    parser.add_argument("--provider-latency", type=float, default=1.0)
+    parser.add_argument("--provider-latency-per-mb", type=float, default=0.2)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--telegram-latency", type=float, default=0.05)
+    parser.add_argument(
+        "--workers", type=int, default=0, help="QUEUE_MAX_WORKERS (default: env)"
+    )
+    parser.add_argument(
+        "--ramp-seconds", type=float, default=0, help="spread user starts"
+    )
+    parser.add_argument("--think-seconds", type=float, default=0)
+    parser.add_argument("--cache", action="store_true", help="keep the cache on")
+    parser.add_argument("--timeout", type=float, default=900)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", type=Path, help="also write the report here")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    report = asyncio.run(run(args))
+    print_report(report)
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()